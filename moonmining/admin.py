@@ -28,6 +28,8 @@ class EveOreTypeAdmin(admin.ModelAdmin):
     ordering = ("name",)
     list_filter = (
         "extras__pricing_method",
+        "extras__rarity_class",
+        "extras__quality_class",
         ("eve_group", admin.RelatedOnlyFieldListFilter),
     )
     search_fields = ("name",)
@@ -79,10 +81,9 @@ class ExtractionAdmin(admin.ModelAdmin):
         description=_("Update calculated properties for selected extractions.")
     )
     def update_calculated_properties(self, request, queryset):
-        num = 0
-        for obj in queryset:
-            tasks.update_extraction_calculated_properties.delay(extraction_pk=obj.pk)
-            num += 1
+        extraction_pks = list(queryset.values_list("pk", flat=True))
+        tasks.update_extractions.delay(extraction_pks=extraction_pks)
+        num = len(extraction_pks)
         self.message_user(
             request,
             _("Started updating calculated properties for %d extractions." % num),
@@ -256,10 +257,9 @@ class MoonAdmin(admin.ModelAdmin):
 
     @admin.display(description=_("Update calculated properties for selected moons."))
     def update_calculated_properties(self, request, queryset):
-        num = 0
-        for obj in queryset:
-            tasks.update_moon_calculated_properties.delay(moon_pk=obj.pk)
-            num += 1
+        moon_pks = list(queryset.values_list("pk", flat=True))
+        tasks.update_moons.delay(moon_pks=moon_pks)
+        num = len(moon_pks)
         self.message_user(
             request, _("Started updating calculated properties for %d moons." % num)
         )
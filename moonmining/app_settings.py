@@ -17,6 +17,14 @@ MOONMINING_USE_REPROCESS_PRICING = clean_setting(
 Will use direct ore prices when switched off.
 """
 
+MOONMINING_PRICE_CHANGE_THRESHOLD = clean_setting(
+    "MOONMINING_PRICE_CHANGE_THRESHOLD", 0.01, min_value=0
+)
+"""Relative change of an ore price that is needed for updating it,
+e.g. 0.01 for 1%. Only moons and extractions with ore types
+that have updated prices are recalculated during the regular value updates.
+"""
+
 MOONMINING_VOLUME_PER_DAY = clean_setting("MOONMINING_VOLUME_PER_DAY", 960_400)
 MOONMINING_DAYS_PER_MONTH = clean_setting("MOONMINING_DAYS_PER_MONTH", 30.4)
 MOONMINING_VOLUME_PER_MONTH = MOONMINING_VOLUME_PER_DAY * MOONMINING_DAYS_PER_MONTH
@@ -34,3 +42,15 @@ MOONMINING_OVERWRITE_SURVEYS_WITH_ESTIMATES = clean_setting(
 )
 """whether uploaded survey are automatically overwritten by product estimates from
 extractions to keep the moon values current."""
+
+MOONMINING_NOTIFICATIONS_MAX_AGE_DAYS = clean_setting(
+    "MOONMINING_NOTIFICATIONS_MAX_AGE_DAYS", 90
+)
+"""Number of days after which notifications are deleted,
+unless they belong to an open extraction."""
+
+MOONMINING_NOTIFICATIONS_MAX_PER_OWNER = clean_setting(
+    "MOONMINING_NOTIFICATIONS_MAX_PER_OWNER", 1_000
+)
+"""Maximum number of notifications kept per owner.
+Notifications of open extractions are kept in addition."""
@@ -7,3 +7,6 @@ class MoonPlanerConfig(AppConfig):
     name = "moonmining"
     label = "moonmining"
     verbose_name = "Moon Mining v{}".format(__version__)
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,235 @@
+"""Caches used by this app."""
+
+import datetime as dt
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from allianceauth.authentication.models import CharacterOwnership
+
+CHARACTER_2_USER_KEY = "moonmining_character_2_user"
+CHARACTER_2_USER_TIMEOUT = 3600 * 24
+MOON_LIST_KEY = "moonmining_moon_list"
+MOON_LIST_TIMEOUT = 3600 * 24
+DETAILS_KEY = "moonmining_details"
+DETAILS_TIMEOUT = 3600
+EXTRACTIONS_KEY = "moonmining_extractions"
+MINING_LEDGER_KEY = "moonmining_mining_ledger"
+ORE_PRICES_KEY = "moonmining_ore_prices"
+OWNER_TOKEN_KEY = "moonmining_owner_token"
+OWNER_TOKEN_EXPIRY_MARGIN = 60
+USERS_KEY = "moonmining_users"
+_NO_USER = 0
+
+
+def _current_version(name: str) -> int:
+    """Return current version of a cache."""
+    key = f"{name}_version"
+    version = cache.get(key)
+    if version is None:
+        # seed with a value, which was never used before,
+        # so versions are not reused after the cache has been cleared
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _increment_version(name: str) -> None:
+    """Increment version of a cache, which invalidates all of its entries."""
+    key = f"{name}_version"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def character_2_user(character_ids: Iterable[int]) -> Dict[int, int]:
+    """Return user IDs for given character IDs.
+
+    Only characters which are owned by a user are included in the result.
+    """
+    character_ids = set(character_ids)
+    if not character_ids:
+        return {}
+    version = _current_version(CHARACTER_2_USER_KEY)
+    keys = {
+        f"{CHARACTER_2_USER_KEY}_{character_id}": character_id
+        for character_id in character_ids
+    }
+    cached = cache.get_many(keys.keys(), version=version)
+    result = {keys[key]: user_id for key, user_id in cached.items()}
+    missing_ids = character_ids - set(result.keys())
+    if missing_ids:
+        found = dict(
+            CharacterOwnership.objects.filter(
+                character__character_id__in=missing_ids
+            ).values_list("character__character_id", "user_id")
+        )
+        new_entries = {
+            character_id: found.get(character_id, _NO_USER)
+            for character_id in missing_ids
+        }
+        cache.set_many(
+            {
+                f"{CHARACTER_2_USER_KEY}_{character_id}": user_id
+                for character_id, user_id in new_entries.items()
+            },
+            timeout=CHARACTER_2_USER_TIMEOUT,
+            version=version,
+        )
+        result.update(new_entries)
+    return {
+        character_id: user_id
+        for character_id, user_id in result.items()
+        if user_id != _NO_USER
+    }
+
+
+def invalidate_character_2_user() -> None:
+    """Invalidate all cached character to user mappings."""
+    _increment_version(CHARACTER_2_USER_KEY)
+
+
+def _moon_list_get_or_fetch(key: str, fetch_func: Callable[[], Any]) -> Any:
+    """Return cached value derived from the moon list or fetch it when missing."""
+    version = _current_version(MOON_LIST_KEY)
+    value = cache.get(key, version=version)
+    if value is None:
+        value = fetch_func()
+        cache.set(key, value, timeout=MOON_LIST_TIMEOUT, version=version)
+    return value
+
+
+def moon_list_options(
+    scope: str, column: str, fetch_func: Callable[[], List[str]]
+) -> List[str]:
+    """Return drop down options of a moon list column.
+
+    Options are cached per scope and column
+    and fetched with the given function when missing.
+    """
+    return _moon_list_get_or_fetch(f"{MOON_LIST_KEY}_{scope}_{column}", fetch_func)
+
+
+def owned_value_report(
+    language: str, fetch_func: Callable[[], List[dict]]
+) -> List[dict]:
+    """Return rows of the owned value report.
+
+    Rows are cached per language and fetched with the given function when missing.
+    """
+    return _moon_list_get_or_fetch(
+        f"{MOON_LIST_KEY}_owned_value_report_{language}", fetch_func
+    )
+
+
+def invalidate_moon_list() -> None:
+    """Invalidate all cached data derived from the moon list."""
+    _increment_version(MOON_LIST_KEY)
+
+
+def _details_get_or_fetch(
+    name: str, pk: int, language: str, fetch_func: Callable[[], dict]
+) -> dict:
+    """Return cached details of an object or fetch them when missing.
+
+    Entries are keyed by object, language and both the global
+    and the object's version stamp.
+    """
+    stamp = _current_version(DETAILS_KEY)
+    version = _current_version(f"{DETAILS_KEY}_{name}_{pk}")
+    key = f"{DETAILS_KEY}_{name}_{pk}_{language}_{stamp}"
+    value = cache.get(key, version=version)
+    if value is None:
+        value = fetch_func()
+        cache.set(key, value, timeout=DETAILS_TIMEOUT, version=version)
+    return value
+
+
+def moon_details(moon_pk: int, language: str, fetch_func: Callable[[], dict]) -> dict:
+    """Return rendered details of a moon.
+
+    Details are cached per moon and language
+    and fetched with the given function when missing.
+    """
+    return _details_get_or_fetch("moon", moon_pk, language, fetch_func)
+
+
+def extraction_details(
+    extraction_pk: int, language: str, fetch_func: Callable[[], dict]
+) -> dict:
+    """Return rendered details of an extraction.
+
+    Details are cached per extraction and language
+    and fetched with the given function when missing.
+    """
+    return _details_get_or_fetch("extraction", extraction_pk, language, fetch_func)
+
+
+def invalidate_moon_details(moon_pks: Iterable[int]) -> None:
+    """Invalidate cached details of given moons."""
+    for moon_pk in moon_pks:
+        _increment_version(f"{DETAILS_KEY}_moon_{moon_pk}")
+
+
+def invalidate_extraction_details(extraction_pks: Iterable[int]) -> None:
+    """Invalidate cached details of given extractions."""
+    for extraction_pk in extraction_pks:
+        _increment_version(f"{DETAILS_KEY}_extraction_{extraction_pk}")
+
+
+def invalidate_details() -> None:
+    """Invalidate cached details of all moons and extractions."""
+    _increment_version(DETAILS_KEY)
+
+
+def data_versions(*names: str) -> str:
+    """Return the current versions of given data as fingerprint."""
+    return "-".join(str(_current_version(name)) for name in names)
+
+
+def invalidate_extractions() -> None:
+    """Invalidate fingerprints derived from extractions."""
+    _increment_version(EXTRACTIONS_KEY)
+
+
+def invalidate_mining_ledger() -> None:
+    """Invalidate fingerprints derived from the mining ledger."""
+    _increment_version(MINING_LEDGER_KEY)
+
+
+def invalidate_ore_prices() -> None:
+    """Invalidate fingerprints derived from ore prices."""
+    _increment_version(ORE_PRICES_KEY)
+
+
+def invalidate_users() -> None:
+    """Invalidate fingerprints derived from main characters of users."""
+    _increment_version(USERS_KEY)
+
+
+def owner_token_pk(
+    owner_pk: int, fetch_func: Callable[[], Tuple[int, dt.datetime]]
+) -> int:
+    """Return primary key of the token of an owner.
+
+    Tokens are fetched with the given function when missing,
+    which returns the primary key of the token and the expiry of its access token.
+    They are cached until shortly before the access token expires.
+    Only the primary key is cached, never the access token itself.
+    """
+    key = f"{OWNER_TOKEN_KEY}_{owner_pk}"
+    token_pk = cache.get(key)
+    if token_pk is None:
+        token_pk, expires_at = fetch_func()
+        timeout = (expires_at - now()).total_seconds() - OWNER_TOKEN_EXPIRY_MARGIN
+        if timeout > 0:
+            cache.set(key, token_pk, timeout=timeout)
+    return token_pk
+
+
+def invalidate_owner_token(owner_pk: int) -> None:
+    """Invalidate cached token of an owner."""
+    cache.delete(f"{OWNER_TOKEN_KEY}_{owner_pk}")
@@ -1,7 +1,7 @@
 import datetime as dt
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from enum import IntEnum, auto
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from . import helpers
 
@@ -45,6 +45,28 @@ class CalculatedExtraction:
             return self.chunk_arrival_at - self.started_at
         raise ValueError("chunk_arrival_at and/or started_at not defined")
 
+    def to_dict(self) -> dict:
+        """Convert into a dict, which can be serialized to JSON."""
+        data = asdict(self)
+        data["status"] = self.status.value
+        for name, value in data.items():
+            if isinstance(value, dt.datetime):
+                data[name] = value.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CalculatedExtraction":
+        """Create new object from a dict created by to_dict()."""
+        params = dict(data)
+        for name, value in data.items():
+            if name.endswith("_at") and value:
+                params[name] = dt.datetime.fromisoformat(value)
+        if params.get("products") is not None:
+            params["products"] = [
+                CalculatedExtractionProduct(**product) for product in params["products"]
+            ]
+        return cls(**params)
+
     def total_volume(self) -> float:
         if not self.products:
             return 0
@@ -103,3 +125,87 @@ class CalculatedMoonProduct:
 
     def __post_init__(self):
         self.ore_type_id = int(self.ore_type_id)
+
+
+@dataclass
+class MoonSurveyProduct:
+    """Product of a moon survey as reported by the Eve client."""
+
+    ore_type_id: int
+    amount: float
+    line_no: int
+
+
+@dataclass
+class MoonSurvey:
+    """A moon survey parsed from the survey input of the Eve client."""
+
+    moon_name: str
+    line_no: int
+    moon_id: Optional[int] = None
+    products: List[MoonSurveyProduct] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors and self.moon_id is not None and bool(self.products)
+
+    def error_summary(self) -> str:
+        """Return all errors of this survey as one string."""
+        if self.errors:
+            return "; ".join(self.errors)
+        if not self.products:
+            return f"line {self.line_no}: Survey has no products"
+        return ""
+
+    def _add_product_from_columns(self, columns: List[str], line_no: int) -> None:
+        try:
+            amount = float(columns[2])
+            ore_type_id = int(columns[3])
+            moon_id = int(columns[6])
+        except (IndexError, ValueError) as ex:
+            self.errors.append(f"line {line_no}: {type(ex).__name__}")
+            return
+        if self.moon_id is None:
+            self.moon_id = moon_id
+        elif self.moon_id != moon_id:
+            self.errors.append(f"line {line_no}: Moon ID does not match")
+            return
+        if any(obj.ore_type_id == ore_type_id for obj in self.products):
+            self.errors.append(f"line {line_no}: Duplicate ore type")
+            return
+        self.products.append(
+            MoonSurveyProduct(ore_type_id=ore_type_id, amount=amount, line_no=line_no)
+        )
+
+
+def parse_moon_surveys(text: str) -> Iterator[MoonSurvey]:
+    """Parse moon surveys from raw survey input and yield them one by one.
+
+    The input is processed in a single pass. Malformed lines do not abort parsing,
+    but are reported as errors of the survey they belong to.
+    """
+    survey = None
+    is_first_line = True
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        columns = line.split("\t")
+        if is_first_line:
+            is_first_line = False
+            if columns[0] == "Moon":
+                continue  # header
+        if columns[0]:
+            if survey:
+                yield survey
+            survey = MoonSurvey(moon_name=columns[0].strip(), line_no=line_no)
+        elif survey:
+            survey._add_product_from_columns(columns, line_no)
+        else:
+            yield MoonSurvey(
+                moon_name="",
+                line_no=line_no,
+                errors=[f"line {line_no}: Product without moon"],
+            )
+    if survey:
+        yield survey
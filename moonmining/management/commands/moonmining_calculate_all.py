@@ -26,7 +26,7 @@ class Command(BaseCommand):
         user_input = get_input("Are you sure you want to proceed? (Y/n)?")
 
         if user_input.lower() != "n":
-            tasks.run_calculated_properties_update.delay()
+            tasks.run_calculated_properties_update.delay(full_update=True)
             self.stdout.write(self.style.SUCCESS("Update started."))
         else:
             self.stdout.write(self.style.WARNING("Aborted"))
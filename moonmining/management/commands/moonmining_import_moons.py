@@ -206,10 +206,7 @@ class Command(BaseCommand):
             MoonProduct.objects.bulk_create(product_objects, batch_size=BULK_BATCH_SIZE)
 
     def update_moons(self, moons):
-        moons_to_update_qs = Moon.objects.filter(pk__in=moons.keys())
-        for moon in moons_to_update_qs:
-            tasks.update_moon_calculated_properties.delay(moon.pk)
         self.stdout.write(
-            f"Updating calculated properties for {moons_to_update_qs.count():,} "
-            "moons started..."
+            f"Updating calculated properties for {len(moons):,} moons started..."
         )
+        tasks.update_moons.delay(moon_pks=list(moons.keys()))
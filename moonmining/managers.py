@@ -1,36 +1,90 @@
-from collections import namedtuple
-from typing import List, Optional, Tuple
+import datetime as dt
+import time
+from collections import defaultdict, namedtuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from django.contrib.auth.models import User
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import ExpressionWrapper, F, FloatField, IntegerField, Sum
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    BooleanField,
+    Case,
+    DateTimeField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from eveuniverse.managers import EveTypeManager
-from eveuniverse.models import EveMoon
+from eveuniverse.models import (
+    EveEntity,
+    EveMoon,
+    EveTypeDogmaAttribute,
+    EveTypeMaterial,
+)
 
 from allianceauth.notifications import notify
 from allianceauth.services.hooks import get_extension_logger
 from app_utils.logging import LoggerAddTag
 
-from . import __title__
+from . import __title__, caches
 from .app_settings import (
+    MOONMINING_NOTIFICATIONS_MAX_AGE_DAYS,
+    MOONMINING_NOTIFICATIONS_MAX_PER_OWNER,
+    MOONMINING_PRICE_CHANGE_THRESHOLD,
     MOONMINING_REPROCESSING_YIELD,
     MOONMINING_USE_REPROCESS_PRICING,
 )
-from .constants import EveCategoryId
-from .core import CalculatedExtraction
+from .constants import EveCategoryId, EveDogmaAttributeId
+from .core import CalculatedExtraction, MoonSurvey, parse_moon_surveys
 from .helpers import eve_entity_get_or_create_esi_safe
 
 MAX_THREAD_WORKERS = 20
 BULK_BATCH_SIZE = 500
+UPDATE_CHUNK_SIZE = 2_000
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
 SurveyProcessResult = namedtuple(
     "SurveyProcessResult", ["moon_name", "success", "error_name"]
 )
+PriceUpdateResult = namedtuple(
+    "PriceUpdateResult",
+    ["updated_count", "created_count", "duration", "changed_ore_type_ids"],
+)
+
+
+def _price_has_changed(
+    old_price: Optional[float], new_price: Optional[float], threshold: float
+) -> bool:
+    """Return True when a price changed by more than the relative threshold."""
+    if old_price is None or new_price is None or not old_price:
+        return old_price != new_price
+    return abs(new_price - old_price) / abs(old_price) > threshold
+
+
+def _chunks_by_pk(qs: models.QuerySet, chunk_size: int) -> Iterator[models.QuerySet]:
+    """Split a queryset into chunks of consecutive primary keys."""
+    remaining_qs = qs.order_by("pk")
+    while True:
+        chunk_end_pks = list(
+            remaining_qs.values_list("pk", flat=True)[chunk_size - 1 : chunk_size]
+        )
+        if not chunk_end_pks:
+            yield remaining_qs
+            return
+        yield remaining_qs.filter(pk__lte=chunk_end_pks[0])
+        remaining_qs = remaining_qs.filter(pk__gt=chunk_end_pks[0])
 
 
 class EveOreTypeManger(EveTypeManager):
@@ -44,51 +98,547 @@ class EveOreTypeManger(EveTypeManager):
             .filter(eve_group__eve_category_id=EveCategoryId.ASTEROID)
         )
 
-    def update_current_prices(self, use_process_pricing: Optional[bool] = None):
-        """Update current prices for all ores."""
+    def quality_classes(
+        self, ore_type_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, str]:
+        """Return quality classes of all or the given ore types by ore type ID."""
+        from .models import OreQualityClass
+
+        ore_types = self.all()
+        if ore_type_ids is not None:
+            ore_types = ore_types.filter(id__in=ore_type_ids)
+        dogma_values = EveTypeDogmaAttribute.objects.filter(
+            eve_type__in=ore_types,
+            eve_dogma_attribute_id=EveDogmaAttributeId.ORE_QUALITY,
+        ).values_list("eve_type_id", "value")
+        quality_classes = {
+            ore_type_id: OreQualityClass.UNDEFINED
+            for ore_type_id in ore_types.values_list("id", flat=True)
+        }
+        for ore_type_id, value in dogma_values:
+            quality_classes[ore_type_id] = OreQualityClass.from_dogma_value(value)
+        return quality_classes
+
+    def update_classes(self, ore_type_ids: Iterable[int]) -> None:
+        """Store quality and rarity classes of the given ore types in their extras.
+
+        Creates missing extras.
+        """
+        from .models import EveOreTypeExtras, OreRarityClass
+
+        ore_type_ids = set(ore_type_ids)
+        quality_classes = self.quality_classes(ore_type_ids)
+        existing_pks = dict(
+            EveOreTypeExtras.objects.filter(ore_type_id__in=ore_type_ids).values_list(
+                "ore_type_id", "pk"
+            )
+        )
+        extras_to_update = []
+        extras_to_create = []
+        for ore_type_id, eve_group_id in self.filter(id__in=ore_type_ids).values_list(
+            "id", "eve_group_id"
+        ):
+            obj = EveOreTypeExtras(
+                pk=existing_pks.get(ore_type_id),
+                ore_type_id=ore_type_id,
+                quality_class=quality_classes[ore_type_id],
+                rarity_class=OreRarityClass.from_eve_group_id(eve_group_id),
+            )
+            if obj.pk:
+                extras_to_update.append(obj)
+            else:
+                extras_to_create.append(obj)
+        EveOreTypeExtras.objects.bulk_update(
+            extras_to_update,
+            fields=["quality_class", "rarity_class"],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        EveOreTypeExtras.objects.bulk_create(
+            extras_to_create, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+
+    def update_missing_classes(self, ore_type_ids: Iterable[int]) -> None:
+        """Store quality and rarity classes of the given ore types,
+        which have no extras yet.
+        """
         from .models import EveOreTypeExtras
 
+        ore_type_ids = set(ore_type_ids)
+        existing_ids = set(
+            EveOreTypeExtras.objects.filter(ore_type_id__in=ore_type_ids).values_list(
+                "ore_type_id", flat=True
+            )
+        )
+        missing_ids = ore_type_ids - existing_ids
+        if missing_ids:
+            self.update_classes(missing_ids)
+
+    def update_current_prices(
+        self,
+        use_process_pricing: Optional[bool] = None,
+        change_threshold: Optional[float] = None,
+    ) -> PriceUpdateResult:
+        """Update current prices and classes for all ores in bulk.
+
+        Prices are only updated when they changed by more than the threshold
+        relative to the current price, so that calculated values
+        only need to be updated for ores with changed prices.
+        """
+        from .models import EveOreTypeExtras, OreRarityClass
+
         if use_process_pricing is None:
             use_process_pricing = MOONMINING_USE_REPROCESS_PRICING
+        if change_threshold is None:
+            change_threshold = MOONMINING_PRICE_CHANGE_THRESHOLD
 
-        for obj in self.filter(published=True).select_related("market_price"):
+        started = time.perf_counter()
+        ore_types = list(
+            self.filter(published=True).values_list(
+                "id", "eve_group_id", "market_price", "market_price__average_price"
+            )
+        )
+        if use_process_pricing:
+            refined_prices = self._calc_refined_prices(MOONMINING_REPROCESSING_YIELD)
+        quality_classes = self.quality_classes()
+        existing_extras = {
+            ore_type_id: (pk, current_price, pricing_method)
+            for ore_type_id, pk, current_price, pricing_method in (
+                EveOreTypeExtras.objects.values_list(
+                    "ore_type_id", "pk", "current_price", "pricing_method"
+                )
+            )
+        }
+        extras_to_update = []
+        extras_to_create = []
+        changed_ore_type_ids = set()
+        for ore_type_id, eve_group_id, market_price_id, average_price in ore_types:
             if use_process_pricing:
-                price = obj.calc_refined_value_per_unit(MOONMINING_REPROCESSING_YIELD)
+                price = refined_prices.get(ore_type_id, 0.0)
                 pricing_method = EveOreTypeExtras.PricingMethod.REPROCESSED_MATERIALS
+            elif market_price_id:
+                price = average_price
+                pricing_method = EveOreTypeExtras.PricingMethod.EVE_CLIENT
             else:
-                try:
-                    price = obj.market_price.average_price
-                    pricing_method = EveOreTypeExtras.PricingMethod.EVE_CLIENT
-                except ObjectDoesNotExist:
-                    price = None
-                    pricing_method = EveOreTypeExtras.PricingMethod.UNKNOWN
-            EveOreTypeExtras.objects.update_or_create(
-                ore_type=obj,
-                defaults={"current_price": price, "pricing_method": pricing_method},
+                price = None
+                pricing_method = EveOreTypeExtras.PricingMethod.UNKNOWN
+            try:
+                pk, old_price, old_pricing_method = existing_extras[ore_type_id]
+            except KeyError:
+                pk = None
+                changed_ore_type_ids.add(ore_type_id)
+            else:
+                if pricing_method != old_pricing_method or _price_has_changed(
+                    old_price, price, change_threshold
+                ):
+                    changed_ore_type_ids.add(ore_type_id)
+                else:
+                    price = old_price
+            obj = EveOreTypeExtras(
+                pk=pk,
+                ore_type_id=ore_type_id,
+                current_price=price,
+                pricing_method=pricing_method,
+                quality_class=quality_classes[ore_type_id],
+                rarity_class=OreRarityClass.from_eve_group_id(eve_group_id),
             )
+            if obj.pk:
+                extras_to_update.append(obj)
+            else:
+                extras_to_create.append(obj)
+        with transaction.atomic():
+            EveOreTypeExtras.objects.bulk_update(
+                extras_to_update,
+                fields=[
+                    "current_price",
+                    "pricing_method",
+                    "quality_class",
+                    "rarity_class",
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            EveOreTypeExtras.objects.bulk_create(
+                extras_to_create, batch_size=BULK_BATCH_SIZE
+            )
+        result = PriceUpdateResult(
+            updated_count=len(extras_to_update),
+            created_count=len(extras_to_create),
+            duration=time.perf_counter() - started,
+            changed_ore_type_ids=changed_ore_type_ids,
+        )
+        logger.info(
+            "Updated current prices for %d ore types and added %d in %.2f seconds. "
+            "Prices have changed for %d ore types.",
+            result.updated_count,
+            result.created_count,
+            result.duration,
+            len(result.changed_ore_type_ids),
+        )
+        return result
 
+    def _calc_refined_prices(self, reprocessing_yield: float) -> Dict[int, float]:
+        """Calculate refined prices per unit for all ores from one materials query.
 
-class MiningLedgerRecordManager(models.Manager):
-    def get_queryset(self):
-        """Add calculated values to all object."""
-        sum_price = ExpressionWrapper(
-            F("quantity") * Coalesce(F("unit_price"), 0.0),
-            output_field=FloatField(),
-        )
-        sum_volume = ExpressionWrapper(
-            F("quantity") * F("ore_type__volume"), output_field=IntegerField()
+        Matches the results of EveOreType.calc_refined_value_per_unit().
+        """
+        materials = EveTypeMaterial.objects.filter(
+            eve_type__in=self.filter(published=True),
+            material_eve_type__market_price__average_price__isnull=False,
+        ).values_list(
+            "eve_type_id", "quantity", "material_eve_type__market_price__average_price"
         )
+        refined_prices = defaultdict(float)
+        for ore_type_id, quantity, price in materials:
+            refined_prices[ore_type_id] += price * quantity * reprocessing_yield / 100
+        return refined_prices
+
+
+class MiningLedgerRecordQuerySet(models.QuerySet):
+    def with_totals(self) -> models.QuerySet:
+        """Add unit price, total price and total volume to each record."""
         return (
-            super()
-            .get_queryset()
-            .select_related("ore_type", "ore_type__extras")
+            self.select_related("ore_type", "ore_type__extras")
             .annotate(unit_price=F("ore_type__extras__current_price"))
-            .annotate(total_price=Sum(sum_price, distinct=True))
-            .annotate(total_volume=Sum(sum_volume, distinct=True))
+            .annotate(
+                total_price=ExpressionWrapper(
+                    F("quantity") * Coalesce(F("unit_price"), 0.0),
+                    output_field=FloatField(),
+                )
+            )
+            .annotate(
+                total_volume=ExpressionWrapper(
+                    F("quantity") * F("ore_type__volume"), output_field=IntegerField()
+                )
+            )
+        )
+
+
+class MiningLedgerRecordManagerBase(models.Manager):
+    def update_or_create_from_esi(
+        self, refinery, records: List[dict], character_2_user: Dict[int, int]
+    ) -> Tuple[int, int]:
+        """Update or create ledger records for a refinery from ESI records in bulk.
+
+        Existing records are only updated when they have changed.
+
+        Returns the number of created and updated records.
+        """
+        day_field = self.model._meta.get_field("day")
+        records_by_key = {
+            (
+                record["character_id"],
+                day_field.to_python(record["last_updated"]),
+                record["type_id"],
+            ): record
+            for record in records
+        }
+        if not records_by_key:
+            return 0, 0
+        entity_ids = {record["character_id"] for record in records} | {
+            record["recorded_corporation_id"] for record in records
+        }
+        EveEntity.objects.bulk_create(
+            [EveEntity(id=entity_id) for entity_id in entity_ids],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        min_day = min(day for _, day, _ in records_by_key)
+        existing_records = {
+            (character_id, day, ore_type_id): (pk, corporation_id, quantity, user_id)
+            for pk, character_id, day, ore_type_id, corporation_id, quantity, user_id in (
+                self.filter(refinery=refinery, day__gte=min_day).values_list(
+                    "pk",
+                    "character_id",
+                    "day",
+                    "ore_type_id",
+                    "corporation_id",
+                    "quantity",
+                    "user_id",
+                )
+            )
+        }
+        objs_to_create = []
+        objs_to_update = []
+        for key, record in records_by_key.items():
+            character_id, day, ore_type_id = key
+            obj = self.model(
+                refinery=refinery,
+                day=day,
+                character_id=character_id,
+                ore_type_id=ore_type_id,
+                corporation_id=record["recorded_corporation_id"],
+                quantity=record["quantity"],
+                user_id=character_2_user.get(character_id),
+            )
+            try:
+                pk, *old_values = existing_records[key]
+            except KeyError:
+                objs_to_create.append(obj)
+            else:
+                if old_values != [obj.corporation_id, obj.quantity, obj.user_id]:
+                    obj.pk = pk
+                    objs_to_update.append(obj)
+        with transaction.atomic():
+            self.bulk_update(
+                objs_to_update,
+                fields=["corporation", "quantity", "user"],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            self.bulk_create(
+                objs_to_create, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+            )
+        if objs_to_create or objs_to_update:
+            from .models import ExtractionLedgerSummary, MiningLedgerSummary
+
+            changed_min_day = min(obj.day for obj in objs_to_create + objs_to_update)
+            MiningLedgerSummary.objects.update_for_refinery(
+                refinery=refinery, start_day=changed_min_day
+            )
+            ExtractionLedgerSummary.objects.update_for_refinery(
+                refinery=refinery, start_day=changed_min_day
+            )
+            caches.invalidate_mining_ledger()
+        return len(objs_to_create), len(objs_to_update)
+
+
+MiningLedgerRecordManager = MiningLedgerRecordManagerBase.from_queryset(
+    MiningLedgerRecordQuerySet
+)
+
+
+class MiningLedgerSummaryManager(models.Manager):
+    def update_for_refinery(self, refinery, start_day: dt.date) -> int:
+        """Rebuild summaries of a refinery for all months from the given day.
+
+        Returns the number of summaries for those months.
+        """
+        from .models import MiningLedgerRecord
+
+        start_month = start_day.replace(day=1)
+        rollups = (
+            MiningLedgerRecord.objects.filter(
+                refinery=refinery, day__gte=start_month, user__isnull=False
+            )
+            .annotate(month=TruncMonth("day"))
+            .values("user_id", "month", "ore_type_id")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_volume=Sum(
+                    F("quantity") * Coalesce(F("ore_type__volume"), 0.0),
+                    output_field=FloatField(),
+                ),
+                total_value=Sum(
+                    F("quantity") * Coalesce(F("ore_type__extras__current_price"), 0.0),
+                    output_field=FloatField(),
+                ),
+            )
+            .order_by()
+        )
+        summaries = [
+            self.model(
+                user_id=rollup["user_id"],
+                refinery=refinery,
+                month=rollup["month"],
+                ore_type_id=rollup["ore_type_id"],
+                quantity=rollup["total_quantity"],
+                volume=rollup["total_volume"],
+                value=rollup["total_value"],
+            )
+            for rollup in rollups
+        ]
+        with transaction.atomic():
+            self.filter(refinery=refinery, month__gte=start_month).delete()
+            self.bulk_create(summaries, batch_size=BULK_BATCH_SIZE)
+        return len(summaries)
+
+    def update_values(self, ore_type_ids: Optional[Iterable[int]] = None) -> int:
+        """Update values of all summaries or of summaries for given ore types
+        from current prices.
+
+        Returns the number of updated summaries.
+        """
+        from .models import EveOreTypeExtras
+
+        current_price = EveOreTypeExtras.objects.filter(
+            ore_type_id=OuterRef("ore_type_id")
+        ).values("current_price")
+        qs = self.all()
+        if ore_type_ids is not None:
+            qs = qs.filter(ore_type_id__in=ore_type_ids)
+        return qs.update(
+            value=F("quantity") * Coalesce(Subquery(current_price), Value(0.0))
+        )
+
+
+class ExtractionLedgerSummaryManager(models.Manager):
+    def update_for_refinery(self, refinery, start_day: dt.date) -> int:
+        """Rebuild summaries of all extractions of a refinery,
+        which ledger window includes the given day or later days.
+
+        Returns the number of summaries for those extractions.
+        """
+        from .models import Extraction
+
+        extractions = refinery.extractions.filter(
+            chunk_arrival_at__gte=dt.datetime.combine(
+                start_day - dt.timedelta(days=Extraction.LEDGER_DAYS_AFTER_ARRIVAL + 1),
+                dt.time(),
+                tzinfo=dt.timezone.utc,
+            ),
+            chunk_arrival_at__lte=now(),
+        )
+        return self.update_for_extractions(extractions)
+
+    def update_for_extractions(self, extractions: Iterable) -> int:
+        """Rebuild summaries of the given extractions from their mining ledger.
+
+        The ledgers of all extractions are fetched with a single query.
+
+        Returns the number of summaries for those extractions.
+        """
+        from .models import MiningLedgerRecord
+
+        extractions = list(extractions)
+        if not extractions:
+            return 0
+        day_field = MiningLedgerRecord._meta.get_field("day")
+        ledger_windows = {
+            extraction.pk: (
+                day_field.to_python(extraction.chunk_arrival_at),
+                day_field.to_python(
+                    extraction.chunk_arrival_at
+                    + dt.timedelta(days=extraction.LEDGER_DAYS_AFTER_ARRIVAL)
+                ),
+            )
+            for extraction in extractions
+        }
+        windows_by_refinery = defaultdict(list)
+        for extraction in extractions:
+            windows_by_refinery[extraction.refinery_id].append(
+                ledger_windows[extraction.pk]
+            )
+        condition = Q()
+        for refinery_id, windows in windows_by_refinery.items():
+            condition |= Q(
+                refinery_id=refinery_id,
+                day__gte=min(first_day for first_day, _ in windows),
+                day__lte=max(last_day for _, last_day in windows),
+            )
+        rollups = (
+            MiningLedgerRecord.objects.filter(condition)
+            .values("refinery_id", "day", "character_id", "ore_type_id")
+            .annotate(
+                last_user_id=Max("user_id"),
+                total_quantity=Sum("quantity"),
+                total_volume=Sum(
+                    F("quantity") * Coalesce(F("ore_type__volume"), 0.0),
+                    output_field=FloatField(),
+                ),
+                total_value=Sum(
+                    F("quantity") * Coalesce(F("ore_type__extras__current_price"), 0.0),
+                    output_field=FloatField(),
+                ),
+            )
+            .order_by()
+        )
+        rollups_by_refinery = defaultdict(list)
+        for rollup in rollups:
+            rollups_by_refinery[rollup["refinery_id"]].append(rollup)
+        summaries = []
+        for extraction in extractions:
+            first_day, last_day = ledger_windows[extraction.pk]
+            extraction_summaries = {}
+            for rollup in rollups_by_refinery[extraction.refinery_id]:
+                if not first_day <= rollup["day"] <= last_day:
+                    continue
+                key = rollup["character_id"], rollup["ore_type_id"]
+                try:
+                    summary = extraction_summaries[key]
+                except KeyError:
+                    extraction_summaries[key] = self.model(
+                        extraction=extraction,
+                        character_id=rollup["character_id"],
+                        ore_type_id=rollup["ore_type_id"],
+                        user_id=rollup["last_user_id"],
+                        quantity=rollup["total_quantity"],
+                        volume=rollup["total_volume"],
+                        value=rollup["total_value"],
+                    )
+                else:
+                    if rollup["last_user_id"] is not None and (
+                        summary.user_id is None
+                        or rollup["last_user_id"] > summary.user_id
+                    ):
+                        summary.user_id = rollup["last_user_id"]
+                    summary.quantity += rollup["total_quantity"]
+                    summary.volume += rollup["total_volume"]
+                    summary.value += rollup["total_value"]
+            summaries += extraction_summaries.values()
+        with transaction.atomic():
+            self.filter(extraction_id__in=ledger_windows.keys()).delete()
+            self.bulk_create(summaries, batch_size=BULK_BATCH_SIZE)
+        return len(summaries)
+
+    def update_values(self, ore_type_ids: Optional[Iterable[int]] = None) -> int:
+        """Update values of all summaries or of summaries for given ore types
+        from current prices.
+
+        Returns the number of updated summaries.
+        """
+        from .models import EveOreTypeExtras
+
+        current_price = EveOreTypeExtras.objects.filter(
+            ore_type_id=OuterRef("ore_type_id")
+        ).values("current_price")
+        qs = self.all()
+        if ore_type_ids is not None:
+            qs = qs.filter(ore_type_id__in=ore_type_ids)
+        return qs.update(
+            value=F("quantity") * Coalesce(Subquery(current_price), Value(0.0))
         )
 
 
 class MoonQuerySet(models.QuerySet):
+    def filter_ore_types(self, ore_type_ids: Iterable[int]) -> models.QuerySet:
+        """Filter moons which have any of the given ore types as product."""
+        from .models import MoonProduct
+
+        moon_pks = MoonProduct.objects.filter(ore_type_id__in=ore_type_ids).values(
+            "moon_id"
+        )
+        return self.filter(pk__in=moon_pks)
+
+    def update_calculated_properties(self, chunk_size: int = UPDATE_CHUNK_SIZE) -> int:
+        """Update calculated properties of all moons in this queryset in bulk.
+
+        Moons are updated in chunks of consecutive primary keys
+        with one UPDATE statement per chunk.
+
+        Returns the number of updated moons.
+        """
+        return sum(
+            chunk._update_calculated_properties_chunk()
+            for chunk in _chunks_by_pk(self, chunk_size)
+        )
+
+    def _update_calculated_properties_chunk(self) -> int:
+        from .models import MoonProduct, OreRarityClass
+
+        products = MoonProduct.objects.filter(moon=OuterRef("pk")).values("moon")
+        value_qs = products.annotate(
+            total_value=self.model._total_price_db_func()
+        ).values("total_value")
+        rarity_qs = products.annotate(
+            max_rarity=Max(
+                OreRarityClass.eve_group_id_db_expression("ore_type__eve_group_id")
+            )
+        ).values("max_rarity")
+        return self.update(
+            value=Subquery(value_qs),
+            rarity_class=Coalesce(
+                Subquery(rarity_qs), Value(OreRarityClass.NONE.value)
+            ),
+        )
+
     def selected_related_defaults(self) -> models.QuerySet:
         return self.select_related(
             "eve_moon",
@@ -111,118 +661,123 @@ class MoonManagerBase(models.Manager):
             scans: raw text input from user containing moon survey data
             user: (optional) user who submitted the data
         """
-        surveys, error_name = self._parse_scans(scans)
-        if surveys:
-            process_results, success = self._process_surveys(surveys, user)
-        else:
-            process_results = None
-            success = False
-
+        process_results, success = self._process_surveys(
+            parse_moon_surveys(scans), user
+        )
         if user:
             success = self._send_survey_process_report_to_user(
-                process_results, error_name, user, success
+                process_results, user, success
             )
         return success
 
-    @staticmethod
-    def _parse_scans(scans: str) -> tuple:
-        surveys = []
-        try:
-            lines = scans.split("\n")
-            lines_ = []
-            for line in lines:
-                line = line.strip("\r").split("\t")
-                lines_.append(line)
-            lines = lines_
-
-            # Find all groups of scans.
-            if len(lines[0]) == 0 or lines[0][0] == "Moon":
-                lines = lines[1:]
-            sub_lists = []
-            for line in lines:
-                # Find the lines that start a scan
-                if line[0] == "":
-                    pass
-                else:
-                    sub_lists.append(lines.index(line))
-
-            # Separate out individual surveys
-            for i in range(len(sub_lists)):
-                # The First List
-                if i == 0:
-                    if i + 2 > len(sub_lists):
-                        surveys.append(lines[sub_lists[i] :])
-                    else:
-                        surveys.append(lines[sub_lists[i] : sub_lists[i + 1]])
-                else:
-                    if i + 2 > len(sub_lists):
-                        surveys.append(lines[sub_lists[i] :])
-                    else:
-                        surveys.append(lines[sub_lists[i] : sub_lists[i + 1]])
-
-        except (TypeError, ValueError, KeyError, AttributeError, IndexError) as ex:
-            logger.warning(
-                "An issue occurred while trying to parse the surveys", exc_info=True
-            )
-            error_name = type(ex).__name__
-
-        else:
-            error_name = ""
-        return surveys, error_name
-
     def _process_surveys(
-        self, surveys: list, user: Optional[User]
+        self, surveys: Iterable[MoonSurvey], user: Optional[User]
     ) -> Tuple[List[SurveyProcessResult], bool]:
-        from .models import EveOreType, MoonProduct
-
-        overall_success = True
+        """Process surveys in bulk with a constant number of queries."""
         process_results = list()
+        valid_surveys = dict()
         for survey in surveys:
-            moon_name = ""
-            try:
-                moon_name = survey[0][0]
-                moon_id = survey[1][6]
-                eve_moon = EveMoon.objects.get_or_create_esi(id=moon_id)[0]
-                moon = self.get_or_create(eve_moon=eve_moon)[0]
-                moon_products = list()
-                survey = survey[1:]
-                for product_data in survey:
-                    # Trim off the empty index at the front
-                    product_data = product_data[1:]
-                    ore_type = EveOreType.objects.get_or_create_esi(id=product_data[2])[
-                        0
-                    ]
-                    moon_products.append(
-                        MoonProduct(
-                            moon=moon, amount=product_data[1], ore_type=ore_type
-                        )
+            if survey.is_valid:
+                valid_surveys[len(process_results)] = survey
+                process_results.append(None)
+            else:
+                logger.warning(
+                    "Invalid moon survey for %s: %s",
+                    survey.moon_name,
+                    survey.error_summary(),
+                )
+                process_results.append(
+                    SurveyProcessResult(
+                        moon_name=survey.moon_name,
+                        success=False,
+                        error_name=survey.error_summary(),
                     )
-                moon.update_products(moon_products, updated_by=user)
-                logger.info("Added moon survey for %s", moon.name)
+                )
 
-            except Exception as ex:
-                logger.warning(
-                    "An issue occurred while processing the following moon survey: %s",
-                    survey,
-                    exc_info=True,
+        if valid_surveys:
+            failed_surveys = self._store_surveys(list(valid_surveys.values()), user)
+            for num, survey in valid_surveys.items():
+                error_name = failed_surveys.get(id(survey))
+                process_results[num] = SurveyProcessResult(
+                    moon_name=survey.moon_name,
+                    success=error_name is None,
+                    error_name=error_name,
                 )
-                error_name = type(ex).__name__
-                overall_success = success = False
+
+        overall_success = bool(process_results) and all(
+            result.success for result in process_results
+        )
+        return process_results, overall_success
+
+    def _store_surveys(self, surveys: List[MoonSurvey], user: Optional[User]) -> dict:
+        """Store moon products from valid surveys in bulk.
+
+        Returns errors of failed surveys by survey object ID.
+        """
+        from .models import EveOreType, MoonListEntry, MoonProduct
+
+        moon_ids = {survey.moon_id for survey in surveys}
+        ore_type_ids = {
+            product.ore_type_id for survey in surveys for product in survey.products
+        }
+        fetch_error_name = "ObjectDoesNotExist"
+        try:
+            EveMoon.objects.bulk_get_or_create_esi(ids=moon_ids)
+            EveOreType.objects.bulk_get_or_create_esi(ids=ore_type_ids)
+        except Exception as ex:
+            logger.warning(
+                "An issue occurred while fetching eve objects for moon surveys",
+                exc_info=True,
+            )
+            fetch_error_name = type(ex).__name__
+        EveOreType.objects.update_classes(ore_type_ids)
+        existing_moon_ids = set(
+            EveMoon.objects.filter(id__in=moon_ids).values_list("id", flat=True)
+        )
+        existing_ore_type_ids = set(
+            EveOreType.objects.filter(id__in=ore_type_ids).values_list("id", flat=True)
+        )
+        failed_surveys = dict()
+        surveys_by_moon_id = dict()
+        for survey in surveys:
+            if survey.moon_id not in existing_moon_ids or any(
+                product.ore_type_id not in existing_ore_type_ids
+                for product in survey.products
+            ):
+                failed_surveys[id(survey)] = fetch_error_name
             else:
-                success = True
-                error_name = None
+                surveys_by_moon_id[survey.moon_id] = survey  # latest survey wins
+        if not surveys_by_moon_id:
+            return failed_surveys
 
-            process_results.append(
-                SurveyProcessResult(
-                    moon_name=moon_name, success=success, error_name=error_name
-                )
+        moon_products = [
+            MoonProduct(
+                moon_id=moon_id,
+                ore_type_id=product.ore_type_id,
+                amount=product.amount,
             )
-        return process_results, overall_success
+            for moon_id, survey in surveys_by_moon_id.items()
+            for product in survey.products
+        ]
+        with transaction.atomic():
+            self.bulk_create(
+                [self.model(eve_moon_id=moon_id) for moon_id in surveys_by_moon_id],
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            moons = self.filter(pk__in=surveys_by_moon_id.keys())
+            moons.update(products_updated_at=now(), products_updated_by=user)
+            MoonProduct.objects.filter(moon_id__in=surveys_by_moon_id.keys()).delete()
+            MoonProduct.objects.bulk_create(moon_products, batch_size=BULK_BATCH_SIZE)
+        moons.update_calculated_properties()
+        MoonListEntry.objects.update_for_moons(surveys_by_moon_id.keys())
+        caches.invalidate_moon_details(surveys_by_moon_id.keys())
+        logger.info("Added moon surveys for %d moons", len(surveys_by_moon_id))
+        return failed_surveys
 
     @staticmethod
     def _send_survey_process_report_to_user(
-        process_results: Optional[List[SurveyProcessResult]],
-        error_name: str,
+        process_results: List[SurveyProcessResult],
         user: User,
         success: bool,
     ) -> bool:
@@ -258,7 +813,128 @@ class MoonManagerBase(models.Manager):
 MoonManager = MoonManagerBase.from_queryset(MoonQuerySet)
 
 
+class MoonListEntryManager(models.Manager):
+    def update_for_moons(
+        self,
+        moon_pks: Optional[Iterable[int]] = None,
+        chunk_size: int = UPDATE_CHUNK_SIZE,
+    ) -> int:
+        """Create or update list entries for all moons or the given moons only.
+
+        Unchanged entries are skipped.
+        Returns the number of created or updated entries.
+        """
+        from .models import Moon
+
+        moons_qs = Moon.objects.all()
+        if moon_pks is not None:
+            moons_qs = moons_qs.filter(pk__in=moon_pks)
+        return sum(
+            self._update_for_moons_chunk(chunk)
+            for chunk in _chunks_by_pk(moons_qs, chunk_size)
+        )
+
+    def update_for_owner(self, owner) -> int:
+        """Update list entries for all moons of an owner.
+
+        This includes moons, where the owner no longer has a refinery.
+        """
+        from .models import Moon
+
+        moon_pks = set(
+            Moon.objects.filter(refinery__owner=owner).values_list("pk", flat=True)
+        )
+        moon_pks |= set(
+            self.filter(
+                Q(owner=owner) | Q(has_refinery=True, owner__isnull=True)
+            ).values_list("pk", flat=True)
+        )
+        return self.update_for_moons(moon_pks)
+
+    def _update_for_moons_chunk(self, moons_qs: models.QuerySet) -> int:
+        from .models import Extraction
+
+        current_extraction_qs = Extraction.objects.filter(
+            refinery__moon=OuterRef("pk"),
+            status__in=[Extraction.Status.STARTED, Extraction.Status.READY],
+        )
+        moons = moons_qs.select_related(
+            "eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region",
+            "refinery__owner__corporation__alliance",
+            "label",
+        ).annotate(extraction_pk=Subquery(current_extraction_qs.values("pk")[:1]))
+        entries = [self._entry_from_moon(moon) for moon in moons]
+        if not entries:
+            return 0
+        field_names = [
+            field.attname
+            for field in self.model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        existing_values = {
+            row[0]: row[1:]
+            for row in self.filter(moon__in=moons_qs.values("pk")).values_list(
+                "pk", *field_names
+            )
+        }
+        changed_entries = [
+            entry
+            for entry in entries
+            if entry.pk in existing_values
+            and existing_values[entry.pk]
+            != tuple(getattr(entry, name) for name in field_names)
+        ]
+        new_entries = [entry for entry in entries if entry.pk not in existing_values]
+        if not changed_entries and not new_entries:
+            return 0
+        with transaction.atomic():
+            self.bulk_update(
+                changed_entries, fields=field_names, batch_size=BULK_BATCH_SIZE
+            )
+            self.bulk_create(new_entries, batch_size=BULK_BATCH_SIZE)
+        caches.invalidate_moon_list()
+        return len(changed_entries) + len(new_entries)
+
+    def _entry_from_moon(self, moon) -> models.Model:
+        solar_system = moon.eve_moon.eve_planet.eve_solar_system
+        constellation = solar_system.eve_constellation
+        entry = self.model(
+            moon=moon,
+            constellation_name=constellation.name,
+            extraction_pk=moon.extraction_pk,
+            has_extraction=moon.extraction_pk is not None,
+            name=moon.name,
+            products_updated_by_id=moon.products_updated_by_id,
+            rarity_class=moon.rarity_class,
+            region_name=constellation.eve_region.name,
+            security_status=solar_system.security_status,
+            solar_system_name=solar_system.name,
+            value=moon.value,
+        )
+        if moon.label:
+            entry.label_name = moon.label.name
+            entry.label_style = moon.label.style
+        if moon.is_owned:
+            refinery = moon.refinery
+            entry.has_refinery = True
+            entry.refinery_name = refinery.name
+            entry.owner_id = refinery.owner_id
+            entry.owner_name = refinery.owner.name
+            entry.corporation_name = refinery.owner.corporation.corporation_name
+            entry.alliance_name = refinery.owner.alliance_name
+        return entry
+
+
 class ExtractionQuerySet(models.QuerySet):
+    def filter_ore_types(self, ore_type_ids: Iterable[int]) -> models.QuerySet:
+        """Filter extractions which have any of the given ore types as product."""
+        from .models import ExtractionProduct
+
+        extraction_pks = ExtractionProduct.objects.filter(
+            ore_type_id__in=ore_type_ids
+        ).values("extraction_id")
+        return self.filter(pk__in=extraction_pks)
+
     def selected_related_defaults(self) -> models.QuerySet:
         return self.select_related(
             "refinery",
@@ -272,22 +948,96 @@ class ExtractionQuerySet(models.QuerySet):
 
     def update_status(self):
         """Update status of given extractions according to current time."""
-        self.exclude(
+        ready_qs = self.exclude(
             status__in=[self.model.Status.READY, self.model.Status.CANCELED]
-        ).filter(
-            chunk_arrival_at__lte=now(),
-            auto_fracture_at__gt=now(),
-        ).update(
-            status=self.model.Status.READY
-        )
-        self.exclude(
+        ).filter(chunk_arrival_at__lte=now(), auto_fracture_at__gt=now())
+        ready_pks = list(ready_qs.values_list("pk", flat=True))
+        if ready_pks:
+            self.filter(pk__in=ready_pks).update(status=self.model.Status.READY)
+        completed_qs = self.exclude(
             status__in=[self.model.Status.COMPLETED, self.model.Status.CANCELED]
-        ).filter(auto_fracture_at__lte=now()).update(status=self.model.Status.COMPLETED)
+        ).filter(auto_fracture_at__lte=now())
+        completed_pks = list(completed_qs.values_list("pk", flat=True))
+        if completed_pks:
+            self.filter(pk__in=completed_pks).update(status=self.model.Status.COMPLETED)
+        if ready_pks or completed_pks:
+            caches.invalidate_extraction_details(ready_pks + completed_pks)
+            caches.invalidate_extractions()
 
     def annotate_volume(self) -> models.QuerySet:
         """Add volume of all products"""
         return self.annotate(volume=Sum("products__volume"))
 
+    def annotate_mined_value(self) -> models.QuerySet:
+        """Add value of all ore mined from this extraction according to the ledger.
+
+        The value is None when there are no ledger records for an extraction.
+        """
+        from .models import MiningLedgerRecord
+
+        mined_value = (
+            MiningLedgerRecord.objects.filter(
+                refinery=OuterRef("refinery"),
+                day__gte=OuterRef("ledger_first_day"),
+                day__lte=OuterRef("ledger_last_day"),
+            )
+            .values("refinery")
+            .annotate(
+                total_value=Sum(
+                    F("quantity") * Coalesce(F("ore_type__extras__current_price"), 0.0),
+                    output_field=FloatField(),
+                )
+            )
+            .values("total_value")
+        )
+        return self.annotate(
+            ledger_first_day=TruncDate("chunk_arrival_at"),
+            ledger_last_day=TruncDate(
+                ExpressionWrapper(
+                    F("chunk_arrival_at")
+                    + dt.timedelta(days=self.model.LEDGER_DAYS_AFTER_ARRIVAL),
+                    output_field=DateTimeField(),
+                )
+            ),
+        ).annotate(mined_value=Subquery(mined_value))
+
+    def update_calculated_properties(self, chunk_size: int = UPDATE_CHUNK_SIZE) -> int:
+        """Update calculated properties of all extractions in this queryset in bulk.
+
+        Extractions are updated in chunks of consecutive primary keys
+        with one UPDATE statement per chunk.
+
+        Returns the number of updated extractions.
+        """
+        return sum(
+            chunk._update_calculated_properties_chunk()
+            for chunk in _chunks_by_pk(self, chunk_size)
+        )
+
+    def _update_calculated_properties_chunk(self) -> int:
+        from .models import ExtractionProduct, OreQualityClass
+
+        products = ExtractionProduct.objects.filter(extraction=OuterRef("pk"))
+        value_qs = (
+            products.values("extraction")
+            .annotate(total_value=self.model._total_price_db_func())
+            .values("total_value")
+        )
+        is_jackpot = Case(
+            When(~Exists(products), then=Value(None)),
+            When(
+                Exists(
+                    products.exclude(
+                        ore_type__extras__quality_class=OreQualityClass.EXCELLENT
+                    )
+                ),
+                then=Value(False),
+            ),
+            default=Value(True),
+            output_field=BooleanField(),
+        )
+        return self.update(value=Subquery(value_qs), is_jackpot=is_jackpot)
+
 
 class ExtractionManagerBase(models.Manager):
     def update_from_calculated(self, calculated: CalculatedExtraction) -> bool:
@@ -361,9 +1111,9 @@ class ExtractionManagerBase(models.Manager):
             updated = True
         if calculated.products and (status_changed or not extraction.products.exists()):
             # preload eve ore types before transaction starts
-            EveOreType.objects.bulk_get_or_create_esi(
-                ids=[product.ore_type_id for product in calculated.products]
-            )
+            ore_type_ids = [product.ore_type_id for product in calculated.products]
+            EveOreType.objects.bulk_get_or_create_esi(ids=ore_type_ids)
+            EveOreType.objects.update_missing_classes(ore_type_ids)
             products = [
                 ExtractionProduct(
                     extraction=extraction,
@@ -385,6 +1135,74 @@ class ExtractionManagerBase(models.Manager):
 ExtractionManager = ExtractionManagerBase.from_queryset(ExtractionQuerySet)
 
 
+class NotificationManager(models.Manager):
+    def delete_obsolete(
+        self,
+        max_age_days: int = MOONMINING_NOTIFICATIONS_MAX_AGE_DAYS,
+        max_per_owner: int = MOONMINING_NOTIFICATIONS_MAX_PER_OWNER,
+    ) -> int:
+        """Delete notifications which are no longer needed and return count.
+
+        Only notifications which have already been processed into the extractions
+        of their refinery can be deleted, i.e. the ones at or before the cursor
+        of that refinery. Notifications of open extractions are always kept.
+        All other notifications are deleted when they are older than the age limit
+        or exceed the row budget of their owner.
+        """
+        from .models import Extraction, Refinery
+
+        cutoff = now() - dt.timedelta(days=max_age_days)
+        processed = defaultdict(Q)
+        refineries = Refinery.objects.filter(
+            last_notification_id__isnull=False,
+            last_notification_timestamp__isnull=False,
+        ).values_list(
+            "owner_id", "id", "last_notification_timestamp", "last_notification_id"
+        )
+        for owner_id, refinery_id, last_timestamp, last_notification_id in refineries:
+            processed[owner_id] |= Q(details__structureID=refinery_id) & (
+                Q(timestamp__lt=last_timestamp)
+                | Q(
+                    timestamp=last_timestamp,
+                    notification_id__lte=last_notification_id,
+                )
+            )
+        open_extractions = (
+            Extraction.objects.filter(
+                status__in=[Extraction.Status.STARTED, Extraction.Status.READY]
+            )
+            .values("refinery__owner_id", "refinery_id")
+            .annotate(oldest_started_at=Min("started_at"))
+            .order_by()
+        )
+        protected = defaultdict(Q)
+        for row in open_extractions:
+            condition = Q(details__structureID=row["refinery_id"])
+            if row["oldest_started_at"]:
+                condition &= Q(timestamp__gte=row["oldest_started_at"])
+            protected[row["refinery__owner_id"]] |= condition
+        deleted_count = 0
+        owner_ids = self.values_list("owner_id", flat=True).order_by().distinct()
+        for owner_id in owner_ids:
+            if owner_id not in processed:
+                continue
+            obsolete_qs = self.filter(processed[owner_id], owner_id=owner_id)
+            if owner_id in protected:
+                obsolete_qs = obsolete_qs.exclude(protected[owner_id])
+            count, _ = obsolete_qs.filter(timestamp__lt=cutoff).delete()
+            deleted_count += count
+            excess_count = self.filter(owner_id=owner_id).count() - max_per_owner
+            if excess_count > 0:
+                excess_pks = list(
+                    obsolete_qs.order_by("timestamp", "notification_id").values_list(
+                        "pk", flat=True
+                    )[:excess_count]
+                )
+                count, _ = self.filter(pk__in=excess_pks).delete()
+                deleted_count += count
+        return deleted_count
+
+
 class RefineryManager(models.Manager):
     def ids(self) -> set:
         return set(self.values_list("id", flat=True))
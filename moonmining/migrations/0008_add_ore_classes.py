@@ -0,0 +1,69 @@
+# Generated by Django 4.0.10 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+ORE_QUALITY_DOGMA_ATTRIBUTE_ID = 2699
+MAP_DOGMA_VALUE_2_QUALITY_CLASS = {1: "RE", 3: "IM", 5: "EX"}
+MAP_GROUP_ID_2_RARITY_CLASS = {1884: 4, 1920: 8, 1921: 16, 1922: 32, 1923: 64}
+
+
+def forwards(apps, schema_editor):
+    EveOreTypeExtras = apps.get_model("moonmining", "EveOreTypeExtras")
+    EveTypeDogmaAttribute = apps.get_model("eveuniverse", "EveTypeDogmaAttribute")
+    dogma_values = dict(
+        EveTypeDogmaAttribute.objects.filter(
+            eve_dogma_attribute_id=ORE_QUALITY_DOGMA_ATTRIBUTE_ID
+        ).values_list("eve_type_id", "value")
+    )
+    extras = list(EveOreTypeExtras.objects.select_related("ore_type"))
+    for obj in extras:
+        dogma_value = dogma_values.get(obj.ore_type_id)
+        obj.quality_class = MAP_DOGMA_VALUE_2_QUALITY_CLASS.get(
+            int(dogma_value) if dogma_value is not None else None, "UN"
+        )
+        obj.rarity_class = MAP_GROUP_ID_2_RARITY_CLASS.get(obj.ore_type.eve_group_id, 0)
+    EveOreTypeExtras.objects.bulk_update(
+        extras, fields=["quality_class", "rarity_class"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("eveuniverse", "0007_evetype_description"),
+        ("moonmining", "0007_add_localization"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eveoretypeextras",
+            name="quality_class",
+            field=models.CharField(
+                choices=[
+                    ("UN", "undefined"),
+                    ("RE", "regular"),
+                    ("IM", "improved"),
+                    ("EX", "excellent"),
+                ],
+                db_index=True,
+                default="UN",
+                max_length=2,
+            ),
+        ),
+        migrations.AddField(
+            model_name="eveoretypeextras",
+            name="rarity_class",
+            field=models.PositiveIntegerField(
+                choices=[
+                    (0, ""),
+                    (4, "R 4"),
+                    (8, "R 8"),
+                    (16, "R16"),
+                    (32, "R32"),
+                    (64, "R64"),
+                ],
+                db_index=True,
+                default=0,
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 4.0.10 on 2026-10-17 07:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+def forwards(apps, schema_editor):
+    MiningLedgerRecord = apps.get_model("moonmining", "MiningLedgerRecord")
+    MiningLedgerSummary = apps.get_model("moonmining", "MiningLedgerSummary")
+    rollups = (
+        MiningLedgerRecord.objects.filter(user__isnull=False)
+        .annotate(month=TruncMonth("day"))
+        .values("user_id", "refinery_id", "month", "ore_type_id")
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_volume=Sum(
+                F("quantity") * Coalesce(F("ore_type__volume"), 0.0),
+                output_field=FloatField(),
+            ),
+            total_value=Sum(
+                F("quantity") * Coalesce(F("ore_type__extras__current_price"), 0.0),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by()
+    )
+    MiningLedgerSummary.objects.bulk_create(
+        [
+            MiningLedgerSummary(
+                user_id=rollup["user_id"],
+                refinery_id=rollup["refinery_id"],
+                month=rollup["month"],
+                ore_type_id=rollup["ore_type_id"],
+                quantity=rollup["total_quantity"],
+                volume=rollup["total_volume"],
+                value=rollup["total_value"],
+            )
+            for rollup in rollups
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("moonmining", "0008_add_ore_classes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MiningLedgerSummary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(
+                        db_index=True,
+                        help_text="first day of the month of the mining activity",
+                    ),
+                ),
+                ("quantity", models.PositiveBigIntegerField()),
+                ("volume", models.FloatField(help_text="total volume in m3")),
+                (
+                    "value",
+                    models.FloatField(
+                        help_text="estimated value in ISK at current prices"
+                    ),
+                ),
+                (
+                    "ore_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="moonmining.eveoretype",
+                    ),
+                ),
+                (
+                    "refinery",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mining_ledger_summaries",
+                        to="moonmining.refinery",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mining_ledger_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ledger summary",
+                "verbose_name_plural": "ledger summaries",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="miningledgersummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "refinery", "month", "ore_type"),
+                name="functional_pk_mining_ledger_summary",
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
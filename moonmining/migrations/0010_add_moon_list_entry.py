@@ -0,0 +1,169 @@
+# Generated by Django 4.0.10 on 2026-10-17 07:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def forwards(apps, schema_editor):
+    Extraction = apps.get_model("moonmining", "Extraction")
+    Moon = apps.get_model("moonmining", "Moon")
+    MoonListEntry = apps.get_model("moonmining", "MoonListEntry")
+    current_extraction_qs = Extraction.objects.filter(
+        refinery__moon=OuterRef("pk"), status__in=["ST", "RD"]
+    )
+    moons = Moon.objects.select_related(
+        "eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region",
+        "refinery__owner__corporation__alliance",
+        "label",
+    ).annotate(extraction_pk=Subquery(current_extraction_qs.values("pk")[:1]))
+    entries = []
+    for moon in moons.iterator(chunk_size=2000):
+        solar_system = moon.eve_moon.eve_planet.eve_solar_system
+        constellation = solar_system.eve_constellation
+        entry = MoonListEntry(
+            moon=moon,
+            constellation_name=constellation.name,
+            extraction_pk=moon.extraction_pk,
+            has_extraction=moon.extraction_pk is not None,
+            name=moon.eve_moon.name.replace("Moon ", ""),
+            products_updated_by_id=moon.products_updated_by_id,
+            rarity_class=moon.rarity_class,
+            region_name=constellation.eve_region.name,
+            security_status=solar_system.security_status,
+            solar_system_name=solar_system.name,
+            value=moon.value,
+        )
+        if moon.label:
+            entry.label_name = moon.label.name
+            entry.label_style = moon.label.style
+        if hasattr(moon, "refinery"):
+            corporation = moon.refinery.owner.corporation
+            alliance = corporation.alliance
+            entry.has_refinery = True
+            entry.refinery_name = moon.refinery.name
+            entry.owner_id = moon.refinery.owner_id
+            entry.corporation_name = corporation.corporation_name
+            entry.owner_name = corporation.corporation_name
+            if alliance:
+                entry.alliance_name = alliance.alliance_name
+                entry.owner_name += f" [{alliance.alliance_ticker}]"
+        entries.append(entry)
+    MoonListEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("moonmining", "0009_add_mining_ledger_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MoonListEntry",
+            fields=[
+                (
+                    "moon",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="list_entry",
+                        serialize=False,
+                        to="moonmining.moon",
+                    ),
+                ),
+                (
+                    "alliance_name",
+                    models.CharField(db_index=True, default="", max_length=254),
+                ),
+                ("constellation_name", models.CharField(db_index=True, max_length=100)),
+                (
+                    "corporation_name",
+                    models.CharField(db_index=True, default="", max_length=254),
+                ),
+                (
+                    "extraction_pk",
+                    models.PositiveIntegerField(
+                        default=None,
+                        help_text="Current extraction of this moon",
+                        null=True,
+                    ),
+                ),
+                ("has_extraction", models.BooleanField(db_index=True, default=False)),
+                ("has_refinery", models.BooleanField(db_index=True, default=False)),
+                (
+                    "label_name",
+                    models.CharField(db_index=True, default="", max_length=100),
+                ),
+                (
+                    "label_style",
+                    models.CharField(
+                        choices=[
+                            ("primary", "dark blue"),
+                            ("success", "green"),
+                            ("default", "grey"),
+                            ("info", "light blue"),
+                            ("warning", "orange"),
+                            ("danger", "red"),
+                        ],
+                        default="",
+                        max_length=16,
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=100)),
+                ("owner_name", models.CharField(default="", max_length=254)),
+                (
+                    "rarity_class",
+                    models.PositiveIntegerField(
+                        choices=[
+                            (0, ""),
+                            (4, "R 4"),
+                            (8, "R 8"),
+                            (16, "R16"),
+                            (32, "R32"),
+                            (64, "R64"),
+                        ],
+                        db_index=True,
+                        default=0,
+                    ),
+                ),
+                ("refinery_name", models.CharField(default="", max_length=150)),
+                ("region_name", models.CharField(db_index=True, max_length=100)),
+                ("security_status", models.FloatField(default=0)),
+                ("solar_system_name", models.CharField(db_index=True, max_length=100)),
+                ("value", models.FloatField(db_index=True, default=None, null=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        default=None,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="moonmining.owner",
+                    ),
+                ),
+                (
+                    "products_updated_by",
+                    models.ForeignKey(
+                        default=None,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "moon list entry",
+                "verbose_name_plural": "moon list entries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="moonlistentry",
+            index=models.Index(
+                fields=["has_refinery", "name"], name="moonmining_list_owned_idx"
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
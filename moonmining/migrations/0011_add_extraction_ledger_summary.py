@@ -0,0 +1,134 @@
+# Generated by Django 4.0.10 on 2026-10-17 08:05
+
+import datetime as dt
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField, Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+LEDGER_DAYS_AFTER_ARRIVAL = 6
+
+
+def forwards(apps, schema_editor):
+    Extraction = apps.get_model("moonmining", "Extraction")
+    ExtractionLedgerSummary = apps.get_model("moonmining", "ExtractionLedgerSummary")
+    MiningLedgerRecord = apps.get_model("moonmining", "MiningLedgerRecord")
+    summaries = []
+    for extraction in Extraction.objects.filter(chunk_arrival_at__lte=now()):
+        rollups = (
+            MiningLedgerRecord.objects.filter(
+                refinery_id=extraction.refinery_id,
+                day__gte=extraction.chunk_arrival_at,
+                day__lte=extraction.chunk_arrival_at
+                + dt.timedelta(days=LEDGER_DAYS_AFTER_ARRIVAL),
+            )
+            .values("character_id", "ore_type_id")
+            .annotate(
+                last_user_id=Max("user_id"),
+                total_quantity=Sum("quantity"),
+                total_volume=Sum(
+                    F("quantity") * Coalesce(F("ore_type__volume"), 0.0),
+                    output_field=FloatField(),
+                ),
+                total_value=Sum(
+                    F("quantity") * Coalesce(F("ore_type__extras__current_price"), 0.0),
+                    output_field=FloatField(),
+                ),
+            )
+            .order_by()
+        )
+        summaries += [
+            ExtractionLedgerSummary(
+                extraction_id=extraction.pk,
+                character_id=rollup["character_id"],
+                ore_type_id=rollup["ore_type_id"],
+                user_id=rollup["last_user_id"],
+                quantity=rollup["total_quantity"],
+                volume=rollup["total_volume"],
+                value=rollup["total_value"],
+            )
+            for rollup in rollups
+        ]
+    ExtractionLedgerSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("moonmining", "0010_add_moon_list_entry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExtractionLedgerSummary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveBigIntegerField()),
+                ("volume", models.FloatField(help_text="total volume in m3")),
+                (
+                    "value",
+                    models.FloatField(
+                        help_text="estimated value in ISK at current prices"
+                    ),
+                ),
+                (
+                    "character",
+                    models.ForeignKey(
+                        help_text="character that did the mining",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="eveuniverse.eveentity",
+                    ),
+                ),
+                (
+                    "extraction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_summaries",
+                        to="moonmining.extraction",
+                    ),
+                ),
+                (
+                    "ore_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="moonmining.eveoretype",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        default=None,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "extraction ledger summary",
+                "verbose_name_plural": "extraction ledger summaries",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="extractionledgersummary",
+            constraint=models.UniqueConstraint(
+                fields=("extraction", "character", "ore_type"),
+                name="functional_pk_extraction_ledger_summary",
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
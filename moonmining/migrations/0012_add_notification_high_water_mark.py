@@ -0,0 +1,50 @@
+# Generated by Django 4.0.10 on 2026-10-17 08:27
+
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    Notification = apps.get_model("moonmining", "Notification")
+    Owner = apps.get_model("moonmining", "Owner")
+    for owner in Owner.objects.all():
+        newest = (
+            Notification.objects.filter(owner=owner)
+            .order_by("-timestamp", "-notification_id")
+            .values_list("timestamp", "notification_id")
+            .first()
+        )
+        if newest:
+            owner.last_notification_timestamp, owner.last_notification_id = newest
+            owner.save(
+                update_fields=["last_notification_id", "last_notification_timestamp"]
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moonmining", "0011_add_extraction_ledger_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="owner",
+            name="last_notification_id",
+            field=models.PositiveBigIntegerField(
+                default=None,
+                editable=False,
+                help_text="ID of the newest notification received from ESI",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="owner",
+            name="last_notification_timestamp",
+            field=models.DateTimeField(
+                default=None,
+                editable=False,
+                help_text="Timestamp of the newest notification received from ESI",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
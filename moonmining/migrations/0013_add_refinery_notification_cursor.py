@@ -0,0 +1,42 @@
+# Generated by Django 4.0.10 on 2026-10-17 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moonmining", "0012_add_notification_high_water_mark"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refinery",
+            name="calculated_extraction",
+            field=models.JSONField(
+                default=None,
+                editable=False,
+                help_text="Extraction calculated from the notifications processed so far",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="refinery",
+            name="last_notification_id",
+            field=models.PositiveBigIntegerField(
+                default=None,
+                editable=False,
+                help_text="ID of the last notification processed for this refinery",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="refinery",
+            name="last_notification_timestamp",
+            field=models.DateTimeField(
+                default=None,
+                editable=False,
+                help_text="Timestamp of the last notification processed for this refinery",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,7 +1,8 @@
 import datetime as dt
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import Enum
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import yaml
 
@@ -9,7 +10,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models, transaction
-from django.db.models import F, Sum, Value
+from django.db.models import Case, F, Sum, Value, When
 from django.db.models.functions import Coalesce
 from django.utils.functional import cached_property, classproperty
 from django.utils.html import format_html
@@ -30,7 +31,7 @@ from app_utils.views import (
     bootstrap_label_html,
 )
 
-from . import __title__
+from . import __title__, caches
 from .app_settings import (
     MOONMINING_OVERWRITE_SURVEYS_WITH_ESTIMATES,
     MOONMINING_REPROCESSING_YIELD,
@@ -40,15 +41,24 @@ from .app_settings import (
 from .constants import EveDogmaAttributeId, EveGroupId, EveTypeId, IconSize
 from .core import CalculatedExtraction, CalculatedExtractionProduct
 from .managers import (
+    BULK_BATCH_SIZE,
+    MAX_THREAD_WORKERS,
     EveOreTypeManger,
+    ExtractionLedgerSummaryManager,
     ExtractionManager,
     MiningLedgerRecordManager,
+    MiningLedgerSummaryManager,
+    MoonListEntryManager,
     MoonManager,
+    NotificationManager,
     RefineryManager,
 )
 from .providers import esi
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+# use the much faster C implementation of the YAML loader when available
+YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 # MAX_DISTANCE_TO_MOON_METERS = 3000000
 
 
@@ -132,6 +142,23 @@ class OreRarityClass(models.IntegerChoices):
         """Create object from eve type"""
         return cls.from_eve_group_id(eve_type.eve_group_id)
 
+    @classmethod
+    def eve_group_id_db_expression(cls, eve_group_id_field: str) -> Case:
+        """Return DB expression for the rarity class derived from an eve group ID."""
+        whens = [
+            When(**{eve_group_id_field: eve_group_id}, then=Value(rarity_class.value))
+            for eve_group_id, rarity_class in (
+                (eve_group_id, cls.from_eve_group_id(eve_group_id))
+                for eve_group_id in EveGroupId
+            )
+            if rarity_class != cls.NONE
+        ]
+        return Case(
+            *whens,
+            default=Value(cls.NONE.value),
+            output_field=models.PositiveIntegerField(),
+        )
+
 
 class OreQualityClass(models.TextChoices):
     """Quality class of an ore"""
@@ -155,23 +182,28 @@ class OreQualityClass(models.TextChoices):
             return ""
 
     @classmethod
-    def from_eve_type(cls, eve_type: EveType) -> "OreQualityClass":
-        """Create object from given eve type."""
+    def from_dogma_value(cls, value: float) -> "OreQualityClass":
+        """Create object from value of the ore quality dogma attribute."""
         map_value_2_quality_class = {
             1: cls.REGULAR,
             3: cls.IMPROVED,
             5: cls.EXCELLENT,
         }
+        try:
+            return map_value_2_quality_class[int(value)]
+        except (KeyError, TypeError, ValueError):
+            return cls.UNDEFINED
+
+    @classmethod
+    def from_eve_type(cls, eve_type: EveType) -> "OreQualityClass":
+        """Create object from given eve type."""
         try:
             dogma_attribute = eve_type.dogma_attributes.get(
                 eve_dogma_attribute_id=EveDogmaAttributeId.ORE_QUALITY
             )
         except ObjectDoesNotExist:
             return cls.UNDEFINED
-        try:
-            return map_value_2_quality_class[int(dogma_attribute.value)]
-        except KeyError:
-            return cls.UNDEFINED
+        return cls.from_dogma_value(dogma_attribute.value)
 
 
 class EveOreType(EveType):
@@ -193,11 +225,17 @@ class EveOreType(EveType):
 
     @property
     def rarity_class(self) -> OreRarityClass:
-        return OreRarityClass.from_eve_type(self)
+        try:
+            return OreRarityClass(self.extras.rarity_class)
+        except ObjectDoesNotExist:
+            return OreRarityClass.from_eve_type(self)
 
     @cached_property
     def quality_class(self) -> OreQualityClass:
-        return OreQualityClass.from_eve_type(self)
+        try:
+            return OreQualityClass(self.extras.quality_class)
+        except ObjectDoesNotExist:
+            return OreQualityClass.from_eve_type(self)
 
     @cached_property
     def price(self) -> float:
@@ -263,6 +301,15 @@ class EveOreTypeExtras(models.Model):
     pricing_method = models.CharField(
         max_length=2, choices=PricingMethod.choices, default=PricingMethod.UNKNOWN
     )
+    quality_class = models.CharField(
+        max_length=2,
+        choices=OreQualityClass.choices,
+        default=OreQualityClass.UNDEFINED,
+        db_index=True,
+    )
+    rarity_class = models.PositiveIntegerField(
+        choices=OreRarityClass.choices, default=OreRarityClass.NONE, db_index=True
+    )
 
     class Meta:
         verbose_name = _("ore type extra")
@@ -275,6 +322,8 @@ class EveOreTypeExtras(models.Model):
 class Extraction(models.Model):
     """A mining extraction."""
 
+    LEDGER_DAYS_AFTER_ARRIVAL = 6
+
     class Status(models.TextChoices):
         STARTED = "ST", _("started")  # has been started
         CANCELED = "CN", _("canceled")  # has been canceled
@@ -435,7 +484,9 @@ class Extraction(models.Model):
     @cached_property
     def ledger(self) -> models.QuerySet:
         """Return ledger for this extraction."""
-        max_day = self.chunk_arrival_at + dt.timedelta(days=6)
+        max_day = self.chunk_arrival_at + dt.timedelta(
+            days=self.LEDGER_DAYS_AFTER_ARRIVAL
+        )
         return self.refinery.mining_ledger.filter(
             day__gte=self.chunk_arrival_at,
             day__lte=max_day,
@@ -464,16 +515,14 @@ class Extraction(models.Model):
         Return None if extraction has no products.
         """
         try:
-            products_qualities = [
-                product.ore_type.quality_class == OreQualityClass.EXCELLENT
-                for product in self.products.select_related("ore_type").all()
-            ]
+            products = self.products.all()
         except (ObjectDoesNotExist, AttributeError):
             return None
-        else:
-            if not products_qualities:
-                return None
-            return all(products_qualities)
+        if not products.exists():
+            return None
+        return not products.exclude(
+            ore_type__extras__quality_class=OreQualityClass.EXCELLENT
+        ).exists()
 
     def update_calculated_properties(self) -> None:
         """Update calculated properties for this extraction."""
@@ -532,6 +581,39 @@ class Extraction(models.Model):
         return CalculatedExtraction(**params)
 
 
+class ExtractionLedgerSummary(models.Model):
+    """Mined ore per character from the ledger window of an extraction."""
+
+    extraction = models.ForeignKey(
+        Extraction, on_delete=models.CASCADE, related_name="ledger_summaries"
+    )
+    character = models.ForeignKey(
+        EveEntity,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text=_("character that did the mining"),
+    )
+    ore_type = models.ForeignKey(EveOreType, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveBigIntegerField()
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, default=None, null=True, related_name="+"
+    )
+    volume = models.FloatField(help_text=_("total volume in m3"))
+    value = models.FloatField(help_text=_("estimated value in ISK at current prices"))
+
+    objects = ExtractionLedgerSummaryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["extraction", "character", "ore_type"],
+                name="functional_pk_extraction_ledger_summary",
+            )
+        ]
+        verbose_name = _("extraction ledger summary")
+        verbose_name_plural = _("extraction ledger summaries")
+
+
 class ExtractionProduct(models.Model):
     """A product within a mining extraction."""
 
@@ -663,6 +745,36 @@ class MiningLedgerRecord(models.Model):
         verbose_name_plural = _("ledger records")
 
 
+class MiningLedgerSummary(models.Model):
+    """Mined ore per user, refinery and month rolled up from the mining ledger."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="mining_ledger_summaries"
+    )
+    refinery = models.ForeignKey(
+        "Refinery", on_delete=models.CASCADE, related_name="mining_ledger_summaries"
+    )
+    month = models.DateField(
+        db_index=True, help_text=_("first day of the month of the mining activity")
+    )
+    ore_type = models.ForeignKey(EveOreType, on_delete=models.CASCADE, related_name="+")
+    quantity = models.PositiveBigIntegerField()
+    volume = models.FloatField(help_text=_("total volume in m3"))
+    value = models.FloatField(help_text=_("estimated value in ISK at current prices"))
+
+    objects = MiningLedgerSummaryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "refinery", "month", "ore_type"],
+                name="functional_pk_mining_ledger_summary",
+            )
+        ]
+        verbose_name = _("ledger summary")
+        verbose_name_plural = _("ledger summaries")
+
+
 class Moon(models.Model):
     """Known moon through either survey data or anchored refinery.
 
@@ -700,6 +812,9 @@ class Moon(models.Model):
 
     objects = MoonManager()
 
+    # fields of this model which are shown in the moon list
+    LIST_FIELD_NAMES = ("label_id", "products_updated_by_id", "rarity_class", "value")
+
     class Meta:
         verbose_name = _("moon")
         verbose_name_plural = _("moons")
@@ -707,6 +822,21 @@ class Moon(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember listed values as loaded, so saves without changes can be skipped
+        instance.loaded_list_values = instance.list_values()
+        return instance
+
+    def list_values(self) -> tuple:
+        """Return values of the fields which are shown in the moon list."""
+        return tuple(self.__dict__.get(name) for name in self.LIST_FIELD_NAMES)
+
+    def has_list_changes(self) -> bool:
+        """Return True when values shown in the moon list have changed since loading."""
+        return getattr(self, "loaded_list_values", None) != self.list_values()
+
     @property
     def name(self) -> str:
         return self.eve_moon.name.replace("Moon ", "")
@@ -804,17 +934,15 @@ class Moon(models.Model):
         if extraction.products and (
             overwrite_survey or self.products_updated_by is None
         ):
+            products = extraction.moon_products_estimated(MOONMINING_VOLUME_PER_DAY)
+            ore_type_ids = [product.ore_type_id for product in products]
+            EveOreType.objects.bulk_get_or_create_esi(ids=ore_type_ids)
+            EveOreType.objects.update_missing_classes(ore_type_ids)
             moon_products = [
                 MoonProduct(
-                    moon=self,
-                    amount=product.amount,
-                    ore_type=EveOreType.objects.get_or_create_esi(
-                        id=product.ore_type_id
-                    )[0],
-                )
-                for product in extraction.moon_products_estimated(
-                    MOONMINING_VOLUME_PER_DAY
+                    moon=self, amount=product.amount, ore_type_id=product.ore_type_id
                 )
+                for product in products
             ]
             self.update_products(moon_products)
             return True
@@ -835,6 +963,80 @@ class Moon(models.Model):
         )
 
 
+class MoonListEntry(models.Model):
+    """Denormalized moon for listing and filtering moons without joins.
+
+    Entries are kept in sync with their moons by the update tasks.
+    """
+
+    moon = models.OneToOneField(
+        Moon, on_delete=models.CASCADE, primary_key=True, related_name="list_entry"
+    )
+    alliance_name = models.CharField(max_length=254, default="", db_index=True)
+    constellation_name = models.CharField(max_length=100, db_index=True)
+    corporation_name = models.CharField(max_length=254, default="", db_index=True)
+    extraction_pk = models.PositiveIntegerField(
+        null=True, default=None, help_text=_("Current extraction of this moon")
+    )
+    has_extraction = models.BooleanField(default=False, db_index=True)
+    has_refinery = models.BooleanField(default=False, db_index=True)
+    label_name = models.CharField(max_length=100, default="", db_index=True)
+    label_style = models.CharField(
+        max_length=16, default="", choices=Label.Style.choices
+    )
+    name = models.CharField(max_length=100, db_index=True)
+    owner = models.ForeignKey(
+        "Owner",
+        on_delete=models.SET_NULL,
+        null=True,
+        default=None,
+        related_name="+",
+    )
+    owner_name = models.CharField(max_length=254, default="")
+    products_updated_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, default=None, related_name="+"
+    )
+    rarity_class = models.PositiveIntegerField(
+        choices=OreRarityClass.choices, default=OreRarityClass.NONE, db_index=True
+    )
+    refinery_name = models.CharField(max_length=150, default="")
+    region_name = models.CharField(max_length=100, db_index=True)
+    security_status = models.FloatField(default=0)
+    solar_system_name = models.CharField(max_length=100, db_index=True)
+    value = models.FloatField(null=True, default=None, db_index=True)
+
+    objects = MoonListEntryManager()
+
+    class Meta:
+        verbose_name = _("moon list entry")
+        verbose_name_plural = _("moon list entries")
+        indexes = [
+            models.Index(
+                fields=["has_refinery", "name"], name="moonmining_list_owned_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+    @property
+    def rarity_class_str(self) -> str:
+        return f"R{self.rarity_class}"
+
+    def labels_html(self) -> str:
+        """Generate HTML with all labels."""
+        tags = [OreRarityClass(self.rarity_class).bootstrap_tag_html]
+        if self.label_name:
+            label = Label(name=self.label_name, style=self.label_style)
+            tags.append(label.tag_html)
+        return format_html(" ".join(tags))
+
+    def refinery_html(self) -> str:
+        if not self.has_refinery:
+            return "?"
+        return format_html("{}<br>{}", self.refinery_name, self.owner_name)
+
+
 class MoonProduct(models.Model):
     """A product of a moon, i.e. a specific ore."""
 
@@ -901,6 +1103,8 @@ class Notification(models.Model):
     )
     timestamp = models.DateTimeField(db_index=True)
 
+    objects = NotificationManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -1001,6 +1205,18 @@ class Owner(models.Model):
     last_update_ok = models.BooleanField(
         null=True, default=None, help_text=_("True if the last update was successful")
     )
+    last_notification_id = models.PositiveBigIntegerField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("ID of the newest notification received from ESI"),
+    )
+    last_notification_timestamp = models.DateTimeField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("Timestamp of the newest notification received from ESI"),
+    )
 
     class Meta:
         verbose_name = _("owner")
@@ -1048,41 +1264,46 @@ class Owner(models.Model):
             raise Token.DoesNotExist(f"{self}: No valid token found.")
         return token
 
+    def fetch_access_token(self) -> str:
+        """Return valid access token for this mining corp
+        or raise exception on any error.
+
+        The token is shared between all updates of this owner
+        until shortly before its access token expires.
+        """
+        token_pk = caches.owner_token_pk(self.pk, self._fetch_token_pk)
+        try:
+            token = Token.objects.get(pk=token_pk)
+        except Token.DoesNotExist:
+            caches.invalidate_owner_token(self.pk)
+            token = self.fetch_token()
+        return token.valid_access_token()
+
+    def _fetch_token_pk(self) -> Tuple[int, dt.datetime]:
+        token = self.fetch_token()
+        token.valid_access_token()
+        return token.pk, token.expires
+
     def update_refineries_from_esi(self):
         """Update all refineries from ESI."""
         logger.info("%s: Updating refineries...", self)
-        refineries = self._fetch_refineries_from_esi()
-        for structure_id in refineries.keys():
-            try:
-                self._update_or_create_refinery_from_esi(structure_id)
-            except OSError as exc:
-                exc_name = type(exc).__name__
-                msg = (
-                    f"{self}: Failed to fetch refinery with ID {structure_id} from ESI"
-                )
-                message_id = (
-                    f"{__title__}-update_refineries_from_esi-"
-                    f"{structure_id}-{exc_name}"
-                )
-                notify_admins_throttled(
-                    message_id=message_id,
-                    message=f"{msg}: {exc_name}: {exc}.",
-                    title=f"{__title__}: Failed to fetch refinery",
-                    level="warning",
-                )
-                logger.warning(msg, exc_info=True)
+        access_token = self.fetch_access_token()
+        refineries = self._fetch_refineries_from_esi(access_token)
+        structure_infos = self._fetch_structure_infos_from_esi(
+            refineries.keys(), access_token
+        )
+        self._update_or_create_refineries(refineries, structure_infos)
         # remove refineries that no longer exist
         self.refineries.exclude(id__in=refineries).delete()
 
         self.last_update_at = now()
         self.save()
 
-    def _fetch_refineries_from_esi(self) -> dict:
+    def _fetch_refineries_from_esi(self, access_token: str) -> dict:
         """Return current refineries with moon drills from ESI for this owner."""
         logger.info("%s: Fetching refineries from ESI...", self)
         structures = esi.client.Corporation.get_corporations_corporation_id_structures(
-            corporation_id=self.corporation.corporation_id,
-            token=self.fetch_token().valid_access_token(),
+            corporation_id=self.corporation.corporation_id, token=access_token
         ).results()
         refineries = dict()
         for structure_info in structures:
@@ -1102,23 +1323,93 @@ class Owner(models.Model):
                 refineries[structure_info["structure_id"]] = structure_info
         return refineries
 
-    def _update_or_create_refinery_from_esi(self, structure_id: int):
-        """Update or create a refinery with universe data from ESI."""
+    def _fetch_structure_infos_from_esi(
+        self, structure_ids: Iterable[int], access_token: str
+    ) -> Dict[int, dict]:
+        """Fetch universe data for given structures from ESI concurrently.
+
+        Structures that fail to fetch are reported and skipped.
+        """
+        structure_infos = {}
+        with ThreadPoolExecutor(max_workers=MAX_THREAD_WORKERS) as executor:
+            futures = {
+                executor.submit(
+                    self._fetch_structure_info_from_esi, structure_id, access_token
+                ): structure_id
+                for structure_id in structure_ids
+            }
+            for future in as_completed(futures):
+                structure_id = futures[future]
+                try:
+                    structure_infos[structure_id] = future.result()
+                except OSError as exc:
+                    exc_name = type(exc).__name__
+                    msg = (
+                        f"{self}: Failed to fetch refinery with ID {structure_id} "
+                        "from ESI"
+                    )
+                    message_id = (
+                        f"{__title__}-update_refineries_from_esi-"
+                        f"{structure_id}-{exc_name}"
+                    )
+                    notify_admins_throttled(
+                        message_id=message_id,
+                        message=f"{msg}: {exc_name}: {exc}.",
+                        title=f"{__title__}: Failed to fetch refinery",
+                        level="warning",
+                    )
+                    logger.warning(msg, exc_info=True)
+        return structure_infos
+
+    def _fetch_structure_info_from_esi(
+        self, structure_id: int, access_token: str
+    ) -> dict:
         logger.info("%s: Fetching details for refinery #%d", self, structure_id)
-        structure_info = esi.client.Universe.get_universe_structures_structure_id(
-            structure_id=structure_id, token=self.fetch_token().valid_access_token()
+        return esi.client.Universe.get_universe_structures_structure_id(
+            structure_id=structure_id, token=access_token
         ).results()
-        refinery, _ = Refinery.objects.update_or_create(
-            id=structure_id,
-            defaults={
-                "name": structure_info["name"],
-                "eve_type": EveType.objects.get(id=structure_info["type_id"]),
-                "owner": self,
-            },
-        )
-        if not refinery.moon:
-            refinery.update_moon_from_structure_info(structure_info)
-        return True
+
+    def _update_or_create_refineries(
+        self, refineries: dict, structure_infos: Dict[int, dict]
+    ) -> None:
+        """Update or create refineries from universe data in bulk
+        and find moons for refineries without one.
+        """
+        existing_refineries = Refinery.objects.in_bulk(structure_infos.keys())
+        refineries_to_create = []
+        refineries_to_update = []
+        for structure_id, structure_info in structure_infos.items():
+            name = structure_info["name"]
+            eve_type = refineries[structure_id]["_eve_type"]
+            try:
+                refinery = existing_refineries[structure_id]
+            except KeyError:
+                refineries_to_create.append(
+                    Refinery(id=structure_id, name=name, eve_type=eve_type, owner=self)
+                )
+            else:
+                if (refinery.name, refinery.eve_type_id, refinery.owner_id) != (
+                    name,
+                    eve_type.id,
+                    self.pk,
+                ):
+                    refinery.name = name
+                    refinery.eve_type = eve_type
+                    refinery.owner = self
+                    refineries_to_update.append(refinery)
+        with transaction.atomic():
+            Refinery.objects.bulk_update(
+                refineries_to_update, fields=["name", "eve_type", "owner"]
+            )
+            Refinery.objects.bulk_create(refineries_to_create)
+        moon_pks = [obj.moon_id for obj in refineries_to_update if obj.moon_id]
+        if moon_pks:
+            MoonListEntry.objects.update_for_moons(moon_pks)
+            caches.invalidate_moon_details(moon_pks)
+        for refinery in Refinery.objects.filter(
+            id__in=structure_infos.keys(), moon__isnull=True
+        ):
+            refinery.update_moon_from_structure_info(structure_infos[refinery.id])
 
     def fetch_notifications_from_esi(self) -> None:
         """fetches notification for the current owners and process them"""
@@ -1131,7 +1422,7 @@ class Owner(models.Model):
         all_notifications = (
             esi.client.Character.get_characters_character_id_notifications(
                 character_id=self.character_ownership.character.character_id,
-                token=self.fetch_token().valid_access_token(),
+                token=self.fetch_access_token(),
             ).results()
         )
         moon_notifications = [
@@ -1142,31 +1433,47 @@ class Owner(models.Model):
         return moon_notifications
 
     def _store_notifications(self, notifications: list) -> int:
-        """Store new notifications in database and return count of new objects."""
+        """Store new notifications in database and return count of new objects.
+
+        Only notifications newer than the high-water mark of this owner are stored.
+        """
         # identify new notifications
-        existing_notification_ids = set(
-            self.notifications.values_list("notification_id", flat=True)
-        )
-        new_notifications = [
-            obj
-            for obj in notifications
-            if obj["notification_id"] not in existing_notification_ids
-        ]
-        # create new notif objects
+        if self.last_notification_id and self.last_notification_timestamp:
+            high_water_mark = (
+                self.last_notification_timestamp,
+                self.last_notification_id,
+            )
+            new_notifications = [
+                obj
+                for obj in notifications
+                if (obj["timestamp"], obj["notification_id"]) > high_water_mark
+            ]
+        else:
+            new_notifications = list(notifications)
+        if not new_notifications:
+            logger.info("%s: No new notifications received from ESI", self)
+            return 0
+        # resolve senders in bulk
         sender_type_map = {
             "character": EveEntity.CATEGORY_CHARACTER,
             "corporation": EveEntity.CATEGORY_CORPORATION,
             "alliance": EveEntity.CATEGORY_ALLIANCE,
         }
+        sender_ids = {
+            notification["sender_id"]
+            for notification in new_notifications
+            if sender_type_map.get(notification["sender_type"])
+        }
+        if sender_ids:
+            EveEntity.objects.bulk_create(
+                [EveEntity(id=sender_id) for sender_id in sender_ids],
+                ignore_conflicts=True,
+            )
+            EveEntity.objects.filter(id__in=sender_ids, name="").update_from_esi()
+        # create new notif objects
         new_notification_objects = list()
         for notification in new_notifications:
             known_sender_type = sender_type_map.get(notification["sender_type"])
-            if known_sender_type:
-                sender, _ = EveEntity.objects.get_or_create_esi(
-                    id=notification["sender_id"]
-                )
-            else:
-                sender = None
             text = notification["text"] if "text" in notification else None
             is_read = notification["is_read"] if "is_read" in notification else None
             new_notification_objects.append(
@@ -1174,26 +1481,29 @@ class Owner(models.Model):
                     notification_id=notification["notification_id"],
                     owner=self,
                     created=now(),
-                    details=yaml.safe_load(text) if text else {},
+                    details=yaml.load(text, Loader=YamlSafeLoader) if text else {},
                     is_read=is_read,
                     last_updated=now(),
                     # at least one type has a trailing white space
                     # which we need to remove
                     notif_type=notification["type"].strip(),
-                    sender=sender,
+                    sender_id=notification["sender_id"] if known_sender_type else None,
                     timestamp=notification["timestamp"],
                 )
             )
 
-        Notification.objects.bulk_create(new_notification_objects)
-        if len(new_notification_objects) > 0:
-            logger.info(
-                "%s: Received %d new notifications from ESI",
-                self,
-                len(new_notification_objects),
-            )
-        else:
-            logger.info("%s: No new notifications received from ESI", self)
+        Notification.objects.bulk_create(
+            new_notification_objects, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+        self.last_notification_timestamp, self.last_notification_id = max(
+            (obj.timestamp, obj.notification_id) for obj in new_notification_objects
+        )
+        self.save(update_fields=["last_notification_id", "last_notification_timestamp"])
+        logger.info(
+            "%s: Received %d new notifications from ESI",
+            self,
+            len(new_notification_objects),
+        )
         return len(new_notification_objects)
 
     def update_extractions(self):
@@ -1211,7 +1521,7 @@ class Owner(models.Model):
         extractions = (
             esi.client.Industry.get_corporation_corporation_id_mining_extractions(
                 corporation_id=self.corporation.corporation_id,
-                token=self.fetch_token().valid_access_token(),
+                token=self.fetch_access_token(),
             ).results()
         )
         logger.info("%s: Received %d extractions from ESI.", self, len(extractions))
@@ -1237,118 +1547,62 @@ class Owner(models.Model):
             logger.info("%s: Created %d new extractions.", self, new_extractions_count)
 
     def update_extractions_from_notifications(self):
-        """Add information from notifications to extractions."""
+        """Add information from new notifications to extractions.
+
+        Each refinery keeps the extraction calculated from notifications so far
+        and a cursor, so that only new notifications need to be processed.
+        """
         logger.info("%s: Updating extractions from notifications...", self)
-        notifications_count = self.notifications.count()
-        if not notifications_count:
+        refineries = list(self.refineries.select_related("moon"))
+        notifications_qs = self.notifications.order_by("timestamp", "notification_id")
+        cursors = [refinery.last_notification_timestamp for refinery in refineries]
+        if cursors and all(cursors):
+            notifications_qs = notifications_qs.filter(timestamp__gte=min(cursors))
+        notifications = list(notifications_qs)
+        if not notifications:
             logger.info("%s: No moon notifications.", self)
-            return
-        logger.info("%s: Processing %d moon notifications.", self, notifications_count)
-
-        # create or update extractions from notifications by refinery
-        for refinery in self.refineries.all():
-            updated_count = 0
-            extraction = None
-            notifications_for_refinery = self.notifications.filter(
-                details__structureID=refinery.id
+        else:
+            logger.info(
+                "%s: Processing %d moon notifications.", self, len(notifications)
             )
-            if not refinery.moon and notifications_for_refinery.exists():
-                # Update the refinery's moon from notification in case
-                # it was not found by nearest_celestial.
-                notif = notifications_for_refinery.first()
-                refinery.update_moon_from_eve_id(notif.details["moonID"])
-            for notif in notifications_for_refinery.order_by("timestamp"):
-                if notif.notif_type == NotificationType.MOONMINING_EXTRACTION_STARTED:
-                    extraction = notif.to_calculated_extraction()
-                    if refinery.moon.update_products_from_calculated_extraction(
-                        extraction,
-                        overwrite_survey=MOONMINING_OVERWRITE_SURVEYS_WITH_ESTIMATES,
-                    ):
-                        logger.info(
-                            "%s: Products updated from extraction", refinery.moon
-                        )
-
-                elif extraction:
-                    if extraction.status == CalculatedExtraction.Status.STARTED:
-                        if (
-                            notif.notif_type
-                            == NotificationType.MOONMINING_EXTRACTION_CANCELLED
-                        ):
-                            extraction.status = CalculatedExtraction.Status.CANCELED
-                            extraction.canceled_at = notif.timestamp
-                            extraction.canceled_by = notif.details.get("cancelledBy")
-                            updated = Extraction.objects.update_from_calculated(
-                                extraction
-                            )
-                            updated_count += 1 if updated else 0
-                            extraction = None
-
-                        elif (
-                            notif.notif_type
-                            == NotificationType.MOONMINING_EXTRACTION_FINISHED
-                        ):
-                            extraction.status = CalculatedExtraction.Status.READY
-                            extraction.products = (
-                                CalculatedExtractionProduct.create_list_from_dict(
-                                    notif.details["oreVolumeByType"]
-                                )
-                            )
-
-                    elif extraction.status == CalculatedExtraction.Status.READY:
-                        if notif.notif_type == NotificationType.MOONMINING_LASER_FIRED:
-                            extraction.status = CalculatedExtraction.Status.COMPLETED
-                            extraction.fractured_at = notif.timestamp
-                            extraction.fractured_by = notif.details.get("firedBy")
-                            extraction.products = (
-                                CalculatedExtractionProduct.create_list_from_dict(
-                                    notif.details["oreVolumeByType"]
-                                )
-                            )
-                            updated = Extraction.objects.update_from_calculated(
-                                extraction
-                            )
-                            updated_count += 1 if updated else 0
-                            extraction = None
-
-                        elif (
-                            notif.notif_type
-                            == NotificationType.MOONMINING_AUTOMATIC_FRACTURE
-                        ):
-                            extraction.status = CalculatedExtraction.Status.COMPLETED
-                            extraction.fractured_at = notif.timestamp
-                            extraction.products = (
-                                CalculatedExtractionProduct.create_list_from_dict(
-                                    notif.details["oreVolumeByType"]
-                                )
-                            )
-                            updated = Extraction.objects.update_from_calculated(
-                                extraction
-                            )
-                            updated_count += 1 if updated else 0
-                            extraction = None
-                else:
-                    if (
-                        notif.notif_type
-                        == NotificationType.MOONMINING_EXTRACTION_FINISHED
-                    ):
-                        extraction = notif.to_calculated_extraction()
-
-            if extraction:
-                updated = Extraction.objects.update_from_calculated(extraction)
-                updated_count += 1 if updated else 0
-            if updated_count:
-                logger.info(
-                    "%s: %s: Updated %d extractions from notifications",
-                    self,
-                    refinery,
-                    updated_count,
-                )
+        notifications_by_refinery = defaultdict(list)
+        for notif in notifications:
+            notifications_by_refinery[notif.details.get("structureID")].append(notif)
+        newest_notif = notifications[-1] if notifications else None
+        changed_refineries = []
+        for refinery in refineries:
+            new_notifications = [
+                notif
+                for notif in notifications_by_refinery[refinery.id]
+                if refinery.is_new_notification(notif)
+            ]
+            if new_notifications:
+                refinery.update_extractions_from_notifications(new_notifications)
+            elif refinery.calculated_extraction:
+                # the matching extraction might not have existed in earlier runs
+                refinery.apply_calculated_extraction()
+            # all notifications up to the newest one have been seen by all refineries
+            if newest_notif and refinery.is_new_notification(newest_notif):
+                refinery.last_notification_timestamp = newest_notif.timestamp
+                refinery.last_notification_id = newest_notif.notification_id
+                changed_refineries.append(refinery)
+            elif new_notifications:
+                changed_refineries.append(refinery)
+        Refinery.objects.bulk_update(
+            changed_refineries,
+            fields=[
+                "calculated_extraction",
+                "last_notification_id",
+                "last_notification_timestamp",
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
 
     def fetch_mining_ledger_observers_from_esi(self) -> set:
         logger.info("%s: Fetching mining observers from ESI...", self)
         observers = esi.client.Industry.get_corporation_corporation_id_mining_observers(
             corporation_id=self.corporation.corporation_id,
-            token=self.fetch_token().valid_access_token(),
+            token=self.fetch_access_token(),
         ).results()
         logger.info("%s: Received %d observers from ESI.", self, len(observers))
         return {
@@ -1399,6 +1653,24 @@ class Refinery(models.Model):
         default=None,
         help_text=_("True if the last update of the mining ledger was successful"),
     )
+    calculated_extraction = models.JSONField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("Extraction calculated from the notifications processed so far"),
+    )
+    last_notification_id = models.PositiveBigIntegerField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("ID of the last notification processed for this refinery"),
+    )
+    last_notification_timestamp = models.DateTimeField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("Timestamp of the last notification processed for this refinery"),
+    )
 
     objects = RefineryManager()
 
@@ -1409,6 +1681,13 @@ class Refinery(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember moon as loaded, so moons of moved refineries can be refreshed
+        instance.loaded_moon_id = instance.__dict__.get("moon_id")
+        return instance
+
     def name_html(self) -> str:
         return format_html("{}<br>{}", self.name, self.owner.name)
 
@@ -1443,6 +1722,121 @@ class Refinery(models.Model):
         self.moon = moon
         self.save()
 
+    def update_extractions_from_notifications(self, notifications: list) -> int:
+        """Feed new notifications into the extraction calculated from notifications
+        and update related extractions. Return count of updated extractions.
+
+        Notifications must be newer than the last processed notification
+        and ordered by timestamp.
+        """
+        updated_count = 0
+        extraction = (
+            CalculatedExtraction.from_dict(self.calculated_extraction)
+            if self.calculated_extraction
+            else None
+        )
+        if not self.moon:
+            # Update the refinery's moon from notification in case
+            # it was not found by nearest_celestial.
+            self.update_moon_from_eve_id(notifications[0].details["moonID"])
+        for notif in notifications:
+            if notif.notif_type == NotificationType.MOONMINING_EXTRACTION_STARTED:
+                extraction = notif.to_calculated_extraction()
+                if self.moon.update_products_from_calculated_extraction(
+                    extraction,
+                    overwrite_survey=MOONMINING_OVERWRITE_SURVEYS_WITH_ESTIMATES,
+                ):
+                    logger.info("%s: Products updated from extraction", self.moon)
+
+            elif extraction:
+                if extraction.status == CalculatedExtraction.Status.STARTED:
+                    if (
+                        notif.notif_type
+                        == NotificationType.MOONMINING_EXTRACTION_CANCELLED
+                    ):
+                        extraction.status = CalculatedExtraction.Status.CANCELED
+                        extraction.canceled_at = notif.timestamp
+                        extraction.canceled_by = notif.details.get("cancelledBy")
+                        updated = Extraction.objects.update_from_calculated(extraction)
+                        updated_count += 1 if updated else 0
+                        extraction = None
+
+                    elif (
+                        notif.notif_type
+                        == NotificationType.MOONMINING_EXTRACTION_FINISHED
+                    ):
+                        extraction.status = CalculatedExtraction.Status.READY
+                        extraction.products = (
+                            CalculatedExtractionProduct.create_list_from_dict(
+                                notif.details["oreVolumeByType"]
+                            )
+                        )
+
+                elif extraction.status == CalculatedExtraction.Status.READY:
+                    if notif.notif_type == NotificationType.MOONMINING_LASER_FIRED:
+                        extraction.status = CalculatedExtraction.Status.COMPLETED
+                        extraction.fractured_at = notif.timestamp
+                        extraction.fractured_by = notif.details.get("firedBy")
+                        extraction.products = (
+                            CalculatedExtractionProduct.create_list_from_dict(
+                                notif.details["oreVolumeByType"]
+                            )
+                        )
+                        updated = Extraction.objects.update_from_calculated(extraction)
+                        updated_count += 1 if updated else 0
+                        extraction = None
+
+                    elif (
+                        notif.notif_type
+                        == NotificationType.MOONMINING_AUTOMATIC_FRACTURE
+                    ):
+                        extraction.status = CalculatedExtraction.Status.COMPLETED
+                        extraction.fractured_at = notif.timestamp
+                        extraction.products = (
+                            CalculatedExtractionProduct.create_list_from_dict(
+                                notif.details["oreVolumeByType"]
+                            )
+                        )
+                        updated = Extraction.objects.update_from_calculated(extraction)
+                        updated_count += 1 if updated else 0
+                        extraction = None
+            else:
+                if notif.notif_type == NotificationType.MOONMINING_EXTRACTION_FINISHED:
+                    extraction = notif.to_calculated_extraction()
+
+        if extraction:
+            updated = Extraction.objects.update_from_calculated(extraction)
+            updated_count += 1 if updated else 0
+        self.calculated_extraction = extraction.to_dict() if extraction else None
+        last_notif = notifications[-1]
+        self.last_notification_timestamp = last_notif.timestamp
+        self.last_notification_id = last_notif.notification_id
+        if updated_count:
+            logger.info(
+                "%s: Updated %d extractions from notifications", self, updated_count
+            )
+        return updated_count
+
+    def apply_calculated_extraction(self) -> bool:
+        """Update related extraction from the extraction calculated so far.
+
+        Return True when updated, else False.
+        """
+        if not self.calculated_extraction:
+            return False
+        return Extraction.objects.update_from_calculated(
+            CalculatedExtraction.from_dict(self.calculated_extraction)
+        )
+
+    def is_new_notification(self, notif: Notification) -> bool:
+        """Return True when a notification has not yet been processed, else False."""
+        if not self.last_notification_timestamp or not self.last_notification_id:
+            return True
+        return (notif.timestamp, notif.notification_id) > (
+            self.last_notification_timestamp,
+            self.last_notification_id,
+        )
+
     def update_mining_ledger_from_esi(self):
         logger.debug("%s: Fetching mining observer records from ESI...", self)
         self.ledger_last_update_at = now()
@@ -1451,39 +1845,34 @@ class Refinery(models.Model):
         records = esi.client.Industry.get_corporation_corporation_id_mining_observers_observer_id(
             corporation_id=self.owner.corporation.corporation_id,
             observer_id=self.id,
-            token=self.owner.fetch_token().valid_access_token(),
+            token=self.owner.fetch_access_token(),
         ).results()
         logger.info(
             "%s: Received %d mining observer records from ESI", self, len(records)
         )
         # preload all missing ore types
-        EveOreType.objects.bulk_get_or_create_esi(
-            ids=[record["type_id"] for record in records]
+        ore_type_ids = {record["type_id"] for record in records}
+        EveOreType.objects.bulk_get_or_create_esi(ids=ore_type_ids)
+        EveOreType.objects.update_missing_classes(ore_type_ids)
+        character_2_user = caches.character_2_user(
+            {record["character_id"] for record in records}
         )
-        character_2_user = {
-            obj[0]: obj[1]
-            for obj in CharacterOwnership.objects.values_list(
-                "character__character_id",
-                "user_id",
-            )
+        (
+            created_count,
+            updated_count,
+        ) = MiningLedgerRecord.objects.update_or_create_from_esi(
+            refinery=self, records=records, character_2_user=character_2_user
+        )
+        logger.info(
+            "%s: Added %d and updated %d mining ledger records",
+            self,
+            created_count,
+            updated_count,
+        )
+        entity_ids = {record["character_id"] for record in records} | {
+            record["recorded_corporation_id"] for record in records
         }
-        for record in records:
-            character, _ = EveEntity.objects.get_or_create(id=record["character_id"])
-            corporation, _ = EveEntity.objects.get_or_create(
-                id=record["recorded_corporation_id"]
-            )
-            MiningLedgerRecord.objects.update_or_create(
-                refinery=self,
-                character=character,
-                day=record["last_updated"],
-                ore_type_id=record["type_id"],
-                defaults={
-                    "corporation": corporation,
-                    "quantity": record["quantity"],
-                    "user_id": character_2_user.get(character.id),
-                },
-            )
-        EveEntity.objects.bulk_update_new_esi()
+        EveEntity.objects.filter(id__in=entity_ids, name="").update_from_esi()
         self.ledger_last_update_ok = True
         self.save()
 
@@ -1514,23 +1903,28 @@ class Refinery(models.Model):
                 )
         if new_extractions:
             Extraction.objects.bulk_create(new_extractions, batch_size=500)
+            caches.invalidate_extractions()
         return len(new_extractions)
 
     def cancel_started_extractions_missing_from_list(
         self, started_at_list: List[dt.datetime]
     ) -> int:
         """Cancel started extractions that are not included in given list."""
-        canceled_extractions_qs = self.extractions.filter(
-            status=Extraction.Status.STARTED
-        ).exclude(started_at__in=started_at_list)
-        canceled_extractions_count = canceled_extractions_qs.count()
+        canceled_extraction_pks = list(
+            self.extractions.filter(status=Extraction.Status.STARTED)
+            .exclude(started_at__in=started_at_list)
+            .values_list("pk", flat=True)
+        )
+        canceled_extractions_count = len(canceled_extraction_pks)
         if canceled_extractions_count:
             logger.info(
                 "%s: Found %d likely canceled extractions.",
                 self,
                 canceled_extractions_count,
             )
-            canceled_extractions_qs.update(
+            Extraction.objects.filter(pk__in=canceled_extraction_pks).update(
                 status=Extraction.Status.CANCELED, canceled_at=now()
             )
+            caches.invalidate_extraction_details(canceled_extraction_pks)
+            caches.invalidate_extractions()
         return canceled_extractions_count
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from allianceauth.authentication.models import CharacterOwnership, UserProfile
+from allianceauth.eveonline.models import EveCharacter
+
+from . import caches
+from .models import Extraction, Label, Moon, MoonListEntry, Refinery
+
+
+@receiver(post_save, sender=CharacterOwnership)
+@receiver(post_delete, sender=CharacterOwnership)
+def character_ownership_changed(sender, **kwargs):
+    caches.invalidate_character_2_user()
+    caches.invalidate_users()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=EveCharacter)
+def main_character_changed(sender, **kwargs):
+    caches.invalidate_users()
+
+
+@receiver(post_save, sender=Moon)
+def moon_saved(sender, instance, created, **kwargs):
+    if created or instance.has_list_changes():
+        MoonListEntry.objects.update_for_moons([instance.pk])
+        instance.loaded_list_values = instance.list_values()
+    caches.invalidate_moon_details([instance.pk])
+
+
+@receiver(post_save, sender=Extraction)
+def extraction_saved(sender, instance, **kwargs):
+    caches.invalidate_extraction_details([instance.pk])
+    caches.invalidate_extractions()
+
+
+@receiver(post_delete, sender=Extraction)
+def extraction_deleted(sender, instance, **kwargs):
+    caches.invalidate_extractions()
+
+
+@receiver(post_save, sender=Refinery)
+@receiver(post_delete, sender=Refinery)
+def refinery_changed(sender, instance, **kwargs):
+    moon_ids = {instance.moon_id, getattr(instance, "loaded_moon_id", None)}
+    moon_ids.discard(None)
+    if moon_ids:
+        MoonListEntry.objects.update_for_moons(moon_ids)
+        caches.invalidate_moon_details(moon_ids)
+    instance.loaded_moon_id = instance.moon_id
+
+
+@receiver(post_save, sender=Label)
+def label_saved(sender, instance, **kwargs):
+    MoonListEntry.objects.filter(moon__label=instance).update(
+        label_name=instance.name, label_style=instance.style
+    )
+    caches.invalidate_moon_list()
+    caches.invalidate_details()
+
+
+@receiver(post_delete, sender=Label)
+def label_deleted(sender, instance, **kwargs):
+    MoonListEntry.objects.filter(label_name=instance.name).update(
+        label_name="", label_style=""
+    )
+    caches.invalidate_moon_list()
+    caches.invalidate_details()
@@ -8,8 +8,18 @@ from allianceauth.services.hooks import get_extension_logger
 from app_utils.esi import fetch_esi_status
 from app_utils.logging import LoggerAddTag
 
-from . import __title__
-from .models import EveOreType, Extraction, Moon, Owner, Refinery
+from . import __title__, caches
+from .models import (
+    EveOreType,
+    Extraction,
+    ExtractionLedgerSummary,
+    MiningLedgerSummary,
+    Moon,
+    MoonListEntry,
+    Notification,
+    Owner,
+    Refinery,
+)
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
@@ -38,10 +48,12 @@ def run_regular_updates():
 def update_owner(owner_pk):
     """Update refineries and extractions for given owner."""
     if fetch_esi_status().is_ok:
+        caches.invalidate_owner_token(owner_pk)
         chain(
             update_refineries_from_esi_for_owner.si(owner_pk),
             fetch_notifications_from_esi_for_owner.si(owner_pk),
             update_extractions_for_owner.si(owner_pk),
+            update_moon_list_for_owner.si(owner_pk),
             mark_successful_update_for_owner.si(owner_pk),
         ).delay()
     else:
@@ -69,6 +81,13 @@ def update_extractions_for_owner(owner_pk):
     owner.update_extractions()
 
 
+@shared_task
+def update_moon_list_for_owner(owner_pk):
+    """Update moon list entries for moons of a owner."""
+    owner = Owner.objects.get(pk=owner_pk)
+    MoonListEntry.objects.update_for_owner(owner)
+
+
 @shared_task
 def mark_successful_update_for_owner(owner_pk):
     """Mark a successful update for this corporation."""
@@ -111,14 +130,31 @@ def update_mining_ledger_for_refinery(refinery_id):
 
 
 @shared_task
-def run_calculated_properties_update():
-    """Update the calculated properties of all moons and all extractions."""
+def run_calculated_properties_update(full_update=False):
+    """Update the calculated properties of moons and extractions.
+
+    Only moons and extractions with changed ore prices are updated,
+    unless a full update is requested.
+    """
     if fetch_esi_status().is_ok:
+        if full_update:
+            update_calculated_properties = [
+                update_moons.si().set(priority=TASK_PRIORITY_LOWER),
+                update_extractions.si().set(priority=TASK_PRIORITY_LOWER),
+                update_mining_ledger_summary_values.si().set(
+                    priority=TASK_PRIORITY_LOWER
+                ),
+            ]
+        else:
+            update_calculated_properties = [
+                update_calculated_properties_for_ore_types.s().set(
+                    priority=TASK_PRIORITY_LOWER
+                )
+            ]
         chain(
             update_market_prices.si().set(priority=TASK_PRIORITY_LOWER),
             update_current_ore_prices.si().set(priority=TASK_PRIORITY_LOWER),
-            update_moons.si().set(priority=TASK_PRIORITY_LOWER),
-            update_extractions.si().set(priority=TASK_PRIORITY_LOWER),
+            *update_calculated_properties,
         ).delay()
     else:
         logger.warning("ESI ist not available. Aborting.")
@@ -132,26 +168,85 @@ def update_market_prices():
 
 @shared_task
 def update_current_ore_prices():
-    """Update current prices for all ore types."""
-    EveOreType.objects.update_current_prices()
+    """Update current prices for all ore types.
+
+    Returns the IDs of ore types with changed prices.
+    """
+    result = EveOreType.objects.update_current_prices()
+    if result.changed_ore_type_ids:
+        caches.invalidate_ore_prices()
+    return sorted(result.changed_ore_type_ids)
 
 
 @shared_task
-def update_moons():
-    """Update the calculated properties of all moons."""
-    moon_pks = Moon.objects.values_list("pk", flat=True)
-    logger.info("Updating calculated properties for %d moons ...", len(moon_pks))
-    for moon_pk in moon_pks:
-        update_moon_calculated_properties.apply_async(
-            kwargs={"moon_pk": moon_pk}, priority=TASK_PRIORITY_LOWER
-        )
+def update_calculated_properties_for_ore_types(ore_type_ids):
+    """Update the calculated properties of moons and extractions with given ores."""
+    if not ore_type_ids:
+        logger.info("No ore prices have changed. Nothing to update.")
+        return
+    moons_qs = Moon.objects.filter_ore_types(ore_type_ids)
+    moons_count = moons_qs.update_calculated_properties()
+    MoonListEntry.objects.update_for_moons(moons_qs.values_list("pk", flat=True))
+    extractions_count = Extraction.objects.filter_ore_types(
+        ore_type_ids
+    ).update_calculated_properties()
+    caches.invalidate_details()
+    caches.invalidate_extractions()
+    summaries_count = MiningLedgerSummary.objects.update_values(ore_type_ids)
+    caches.invalidate_mining_ledger()
+    extraction_summaries_count = ExtractionLedgerSummary.objects.update_values(
+        ore_type_ids
+    )
+    logger.info(
+        "Updated calculated properties for %d moons, %d extractions, "
+        "%d mining ledger summaries and %d extraction ledger summaries "
+        "with changed prices for %d ore types",
+        moons_count,
+        extractions_count,
+        summaries_count,
+        extraction_summaries_count,
+        len(ore_type_ids),
+    )
+
+
+@shared_task
+def update_mining_ledger_summary_values():
+    """Update the values of all mining ledger summaries
+    and extraction ledger summaries from current prices.
+    """
+    updated_count = MiningLedgerSummary.objects.update_values()
+    extraction_updated_count = ExtractionLedgerSummary.objects.update_values()
+    caches.invalidate_mining_ledger()
+    logger.info(
+        "Updated values for %d mining ledger summaries "
+        "and %d extraction ledger summaries",
+        updated_count,
+        extraction_updated_count,
+    )
+
+
+@shared_task
+def update_moons(moon_pks=None):
+    """Update the calculated properties of all moons or the given moons only."""
+    moons_qs = Moon.objects.all()
+    if moon_pks is not None:
+        moons_qs = moons_qs.filter(pk__in=moon_pks)
+    updated_count = moons_qs.update_calculated_properties()
+    MoonListEntry.objects.update_for_moons(moon_pks)
+    if moon_pks is not None:
+        caches.invalidate_moon_details(moon_pks)
+    else:
+        caches.invalidate_details()
+    logger.info("Updated calculated properties for %d moons", updated_count)
 
 
 @shared_task
 def update_moon_calculated_properties(moon_pk):
-    """Update all calculated properties for given moon."""
-    moon = Moon.objects.get(pk=moon_pk)
-    moon.update_calculated_properties()
+    """Update all calculated properties for given moon.
+
+    Deprecated: Use update_moons() instead. Kept for already queued tasks.
+    """
+    update_moons([moon_pk])
 
 
 @shared_task
@@ -172,20 +267,32 @@ def update_moon_products_from_latest_extraction(moon_pk):
 
 
 @shared_task
-def update_extractions():
-    """Update the calculated properties of all extractions."""
-    extraction_pks = Extraction.objects.values_list("pk", flat=True)
-    logger.info(
-        "Updating calculated properties for %d extractions ...", len(extraction_pks)
-    )
-    for extraction_pk in extraction_pks:
-        update_extraction_calculated_properties.apply_async(
-            kwargs={"extraction_pk": extraction_pk}, priority=TASK_PRIORITY_LOWER
-        )
+def update_extractions(extraction_pks=None):
+    """Update the calculated properties of all extractions or the given ones only."""
+    extractions_qs = Extraction.objects.all()
+    if extraction_pks is not None:
+        extractions_qs = extractions_qs.filter(pk__in=extraction_pks)
+    updated_count = extractions_qs.update_calculated_properties()
+    if extraction_pks is not None:
+        caches.invalidate_extraction_details(extraction_pks)
+    else:
+        caches.invalidate_details()
+    caches.invalidate_extractions()
+    logger.info("Updated calculated properties for %d extractions", updated_count)
 
 
 @shared_task
 def update_extraction_calculated_properties(extraction_pk):
-    """Update all calculated properties for given extraction."""
-    extraction = Extraction.objects.get(pk=extraction_pk)
-    extraction.update_calculated_properties()
+    """Update all calculated properties for given extraction.
+
+    Deprecated: Use update_extractions() instead. Kept for already queued tasks.
+    """
+    update_extractions([extraction_pk])
+
+
+@shared_task
+def delete_obsolete_notifications() -> int:
+    """Delete notifications which are no longer needed and return count."""
+    deleted_count = Notification.objects.delete_obsolete()
+    logger.info("Deleted %d obsolete notifications", deleted_count)
+    return deleted_count
@@ -1,6 +1,8 @@
 import json
 
+from django.core.cache import cache
 from django.http import JsonResponse
+from django.test import override_settings
 from eveuniverse.models import EveEntity, EveMarketPrice, EveType
 
 from allianceauth.eveonline.models import EveCharacter
@@ -80,3 +82,25 @@ def json_response_to_python_2(response: JsonResponse, data_key="data") -> object
 def json_response_to_dict_2(response: JsonResponse, key="id", data_key="data") -> dict:
     """Convert JSON response into dict by given key."""
     return {x[key]: x for x in json_response_to_python_2(response, data_key)}
+
+
+def isolated_cache(test_class):
+    """Class decorator giving each test of a test class its own empty cache.
+
+    Tests must not use the shared cache of the test settings,
+    because entries would survive database rollbacks between tests.
+    """
+    original_setup = test_class.setUp
+
+    def setUp(self):
+        cache.clear()
+        original_setup(self)
+
+    test_class.setUp = setUp
+    caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"moonmining-{test_class.__name__}",
+        }
+    }
+    return override_settings(CACHES=caches)(test_class)
@@ -0,0 +1,287 @@
+import datetime as dt
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from allianceauth.authentication.models import CharacterOwnership
+from allianceauth.eveonline.models import EveCharacter
+from app_utils.testing import NoSocketsTestCase, create_user_from_evecharacter
+
+from .. import caches
+from ..models import Extraction, Label, Moon, MoonListEntry, Refinery
+from . import helpers
+from .testdata.factories import ExtractionFactory, MoonFactory, RefineryFactory
+from .testdata.load_allianceauth import load_allianceauth
+from .testdata.load_eveuniverse import load_eveuniverse
+
+
+@helpers.isolated_cache
+class TestCharacter2User(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_allianceauth()
+        cls.user, _ = create_user_from_evecharacter(1001)
+
+    def test_should_return_users_for_owned_characters_only(self):
+        # when
+        result = caches.character_2_user([1001, 1002])
+        # then
+        self.assertDictEqual(result, {1001: self.user.pk})
+
+    def test_should_not_query_database_again_for_cached_characters(self):
+        # given
+        caches.character_2_user([1001, 1002])
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = caches.character_2_user([1001, 1002])
+        # then
+        self.assertDictEqual(result, {1001: self.user.pk})
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_should_invalidate_when_character_ownership_is_created(self):
+        # given
+        caches.character_2_user([1001, 1002])
+        user_2, _ = create_user_from_evecharacter(1002)
+        # when
+        result = caches.character_2_user([1001, 1002])
+        # then
+        self.assertDictEqual(result, {1001: self.user.pk, 1002: user_2.pk})
+
+    def test_should_invalidate_when_character_ownership_is_deleted(self):
+        # given
+        user_3, _ = create_user_from_evecharacter(1003)
+        caches.character_2_user([1003])
+        # when
+        CharacterOwnership.objects.filter(
+            character=EveCharacter.objects.get(character_id=1003)
+        ).delete()
+        # then
+        self.assertDictEqual(caches.character_2_user([1003]), {})
+
+
+@helpers.isolated_cache
+class TestMoonListOptions(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+
+    def setUp(self) -> None:
+        self.moon = MoonFactory(create_products=False)
+
+    def test_should_fetch_options_once(self):
+        # given
+        fetch_func = Mock(return_value=["alpha", "bravo"])
+        caches.moon_list_options("scope", "column", fetch_func)
+        # when
+        result = caches.moon_list_options("scope", "column", fetch_func)
+        # then
+        self.assertListEqual(result, ["alpha", "bravo"])
+        self.assertEqual(fetch_func.call_count, 1)
+
+    def test_should_invalidate_when_moon_list_changes(self):
+        # given
+        fetch_func = Mock(return_value=["alpha"])
+        caches.moon_list_options("scope", "column", fetch_func)
+        # when
+        self.moon.label = Label.objects.create(name="Dummy")
+        self.moon.save()
+        caches.moon_list_options("scope", "column", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+    def test_should_invalidate_when_label_is_renamed(self):
+        # given
+        label = Label.objects.create(name="Dummy")
+        self.moon.label = label
+        self.moon.save()
+        fetch_func = Mock(return_value=["Dummy"])
+        caches.moon_list_options("scope", "column", fetch_func)
+        # when
+        label.name = "Other"
+        label.save()
+        caches.moon_list_options("scope", "column", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+    def test_should_not_invalidate_when_moon_list_is_unchanged(self):
+        # given
+        fetch_func = Mock(return_value=["alpha"])
+        caches.moon_list_options("scope", "column", fetch_func)
+        # when
+        self.moon.save()
+        caches.moon_list_options("scope", "column", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 1)
+
+    def test_should_not_update_moon_list_when_listed_fields_are_unchanged(self):
+        # given
+        moon = Moon.objects.get(pk=self.moon.pk)
+        moon.products_updated_at = now()
+        # when
+        with CaptureQueriesContext(connection) as context:
+            moon.save()
+        # then
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "moonmining_moonlistentry" in query["sql"]
+            ]
+        )
+
+    def test_should_update_moon_list_when_value_has_changed(self):
+        # given
+        moon = Moon.objects.get(pk=self.moon.pk)
+        moon.value = 12_345
+        # when
+        moon.save()
+        # then
+        self.assertEqual(MoonListEntry.objects.get(pk=moon.pk).value, 12_345)
+
+
+@helpers.isolated_cache
+class TestDetails(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+
+    def setUp(self) -> None:
+        self.moon = MoonFactory(create_products=False)
+
+    def test_should_fetch_details_once(self):
+        # given
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        # when
+        result = caches.moon_details(self.moon.pk, "en", fetch_func)
+        # then
+        self.assertDictEqual(result, {"body_html": "alpha"})
+        self.assertEqual(fetch_func.call_count, 1)
+
+    def test_should_cache_details_per_language(self):
+        # given
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        # when
+        caches.moon_details(self.moon.pk, "de", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+    def test_should_invalidate_moon_details_when_moon_is_saved(self):
+        # given
+        other_moon = MoonFactory(create_products=False)
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        caches.moon_details(other_moon.pk, "en", fetch_func)
+        # when
+        self.moon.save()
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        caches.moon_details(other_moon.pk, "en", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 3)
+
+    def test_should_invalidate_details_of_both_moons_when_refinery_moves(self):
+        # given
+        other_moon = MoonFactory(create_products=False)
+        RefineryFactory(moon=self.moon)
+        refinery = Refinery.objects.get(moon=self.moon)
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        caches.moon_details(other_moon.pk, "en", fetch_func)
+        # when
+        refinery.moon = other_moon
+        refinery.save()
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        caches.moon_details(other_moon.pk, "en", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 4)
+
+    def test_should_invalidate_extraction_details_when_status_changes(self):
+        # given
+        refinery = RefineryFactory(moon=self.moon)
+        extraction = ExtractionFactory(
+            refinery=refinery,
+            chunk_arrival_at=now() - dt.timedelta(hours=1),
+            auto_fracture_at=now() + dt.timedelta(hours=2),
+            status=Extraction.Status.STARTED,
+        )
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.extraction_details(extraction.pk, "en", fetch_func)
+        # when
+        Extraction.objects.filter(pk=extraction.pk).update_status()
+        caches.extraction_details(extraction.pk, "en", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+    def test_should_invalidate_all_details(self):
+        # given
+        fetch_func = Mock(return_value={"body_html": "alpha"})
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        # when
+        caches.invalidate_details()
+        caches.moon_details(self.moon.pk, "en", fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+
+@helpers.isolated_cache
+class TestOwnerToken(NoSocketsTestCase):
+    def test_should_fetch_token_once(self):
+        # given
+        fetch_func = Mock(return_value=(42, now() + dt.timedelta(minutes=20)))
+        caches.owner_token_pk(1, fetch_func)
+        # when
+        result = caches.owner_token_pk(1, fetch_func)
+        # then
+        self.assertEqual(result, 42)
+        self.assertEqual(fetch_func.call_count, 1)
+
+    def test_should_not_cache_token_about_to_expire(self):
+        # given
+        fetch_func = Mock(return_value=(42, now() + dt.timedelta(seconds=30)))
+        caches.owner_token_pk(1, fetch_func)
+        # when
+        caches.owner_token_pk(1, fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 2)
+
+    def test_should_invalidate_token_of_owner(self):
+        # given
+        fetch_func = Mock(return_value=(42, now() + dt.timedelta(minutes=20)))
+        caches.owner_token_pk(1, fetch_func)
+        caches.owner_token_pk(2, fetch_func)
+        # when
+        caches.invalidate_owner_token(1)
+        caches.owner_token_pk(1, fetch_func)
+        caches.owner_token_pk(2, fetch_func)
+        # then
+        self.assertEqual(fetch_func.call_count, 3)
+
+
+@helpers.isolated_cache
+class TestDataVersions(NoSocketsTestCase):
+    def test_should_not_reuse_versions_after_cache_was_cleared(self):
+        # given
+        caches.invalidate_extractions()
+        old_versions = caches.data_versions(caches.EXTRACTIONS_KEY)
+        cache.clear()
+        # when
+        caches.invalidate_extractions()
+        new_versions = caches.data_versions(caches.EXTRACTIONS_KEY)
+        # then
+        self.assertNotEqual(new_versions, old_versions)
+
+    def test_should_change_version_when_invalidated(self):
+        # given
+        old_versions = caches.data_versions(caches.EXTRACTIONS_KEY)
+        # when
+        caches.invalidate_extractions()
+        # then
+        self.assertNotEqual(caches.data_versions(caches.EXTRACTIONS_KEY), old_versions)
@@ -1,9 +1,16 @@
 import datetime as dt
+import json
 
 from django.test import TestCase
 from django.utils.timezone import now
 
-from ..core import CalculatedExtraction, CalculatedExtractionProduct
+from ..core import (
+    CalculatedExtraction,
+    CalculatedExtractionProduct,
+    MoonSurveyProduct,
+    parse_moon_surveys,
+)
+from .testdata.survey_data import fetch_survey_data
 
 
 class TestCalculatedExtractionProduct(TestCase):
@@ -116,3 +123,137 @@ class TestCalculatedExtraction(TestCase):
         # then
         self.assertAlmostEqual(products[0].amount, 0.45, places=2)
         self.assertAlmostEqual(products[1].amount, 0.55, places=2)
+
+    def test_should_convert_to_dict_and_back(self):
+        # given
+        base_time = now().replace(microsecond=0)
+        extraction = CalculatedExtraction(
+            refinery_id=1,
+            status=CalculatedExtraction.Status.READY,
+            started_at=base_time,
+            started_by=1001,
+            chunk_arrival_at=base_time + dt.timedelta(days=20),
+            products=CalculatedExtractionProduct.create_list_from_dict(
+                {"45506": 7_683_200.5, "46676": 9_604_000}
+            ),
+        )
+        # when
+        data = json.loads(json.dumps(extraction.to_dict()))
+        result = CalculatedExtraction.from_dict(data)
+        # then
+        self.assertEqual(result, extraction)
+
+
+class TestParseMoonSurveys(TestCase):
+    def test_should_parse_surveys(self):
+        # given
+        survey_data = fetch_survey_data()
+        # when
+        surveys = list(parse_moon_surveys(survey_data.get(2)))
+        # then
+        self.assertEqual(len(surveys), 2)
+        survey = surveys[0]
+        self.assertEqual(survey.moon_name, "Auga V - Moon 1")
+        self.assertEqual(survey.moon_id, 40161708)
+        self.assertTrue(survey.is_valid)
+        self.assertListEqual(
+            survey.products,
+            [
+                MoonSurveyProduct(ore_type_id=45506, amount=0.19, line_no=3),
+                MoonSurveyProduct(ore_type_id=46676, amount=0.23, line_no=4),
+                MoonSurveyProduct(ore_type_id=46678, amount=0.25, line_no=5),
+                MoonSurveyProduct(ore_type_id=46689, amount=0.33, line_no=6),
+            ],
+        )
+        self.assertEqual(surveys[1].moon_id, 40161709)
+        self.assertEqual(len(surveys[1].products), 4)
+
+    def test_should_handle_duplicate_lines(self):
+        # given
+        survey = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\n"
+            "\tBitumens\t0.5\t45492\t30002542\t40161707\t40161708\n"
+        )
+        # when
+        surveys = list(parse_moon_surveys(survey + survey))
+        # then
+        self.assertEqual(len(surveys), 2)
+        for survey in surveys:
+            self.assertEqual(survey.moon_id, 40161708)
+            self.assertEqual(len(survey.products), 2)
+
+    def test_should_ignore_empty_lines(self):
+        # given
+        text = (
+            "\r\n"
+            "Auga V - Moon 1\r\n"
+            "\r\n"
+            "\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\r\n"
+            "\r\n"
+        )
+        # when
+        surveys = list(parse_moon_surveys(text))
+        # then
+        self.assertEqual(len(surveys), 1)
+        self.assertTrue(surveys[0].is_valid)
+
+    def test_should_report_errors_by_line(self):
+        # given
+        text = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\tabc\t45506\t30002542\t40161707\t40161708\n"
+            "\tCubic Bistot\t0.23\t46676\n"
+            "Auga V - Moon 2\n"
+            "\tBitumens\t0.27\t45492\t30002542\t40161707\t40161709\n"
+        )
+        # when
+        surveys = list(parse_moon_surveys(text))
+        # then
+        self.assertEqual(len(surveys), 2)
+        self.assertFalse(surveys[0].is_valid)
+        self.assertListEqual(
+            surveys[0].errors, ["line 2: ValueError", "line 3: IndexError"]
+        )
+        self.assertTrue(surveys[1].is_valid)
+
+    def test_should_report_error_for_mismatching_moon_ids(self):
+        # given
+        text = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\n"
+            "\tBitumens\t0.5\t45492\t30002542\t40161707\t40161709\n"
+        )
+        # when
+        surveys = list(parse_moon_surveys(text))
+        # then
+        self.assertListEqual(surveys[0].errors, ["line 3: Moon ID does not match"])
+
+    def test_should_report_error_for_duplicate_ore_types(self):
+        # given
+        text = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\n"
+            "\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\n"
+        )
+        # when
+        surveys = list(parse_moon_surveys(text))
+        # then
+        self.assertListEqual(surveys[0].errors, ["line 3: Duplicate ore type"])
+
+    def test_should_report_error_for_products_without_moon(self):
+        # when
+        surveys = list(
+            parse_moon_surveys("\tCinnabar\t0.5\t45506\t30002542\t40161707\t40161708\n")
+        )
+        # then
+        self.assertEqual(len(surveys), 1)
+        self.assertFalse(surveys[0].is_valid)
+
+    def test_should_report_survey_without_products_as_invalid(self):
+        # when
+        surveys = list(parse_moon_surveys("invalid input"))
+        # then
+        self.assertEqual(len(surveys), 1)
+        self.assertFalse(surveys[0].is_valid)
+        self.assertEqual(surveys[0].error_summary(), "line 1: Survey has no products")
@@ -7,18 +7,20 @@ from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.timezone import now
 from django_webtest import WebTest
-from eveuniverse.models import EveMoon
+from eveuniverse.models import EveMarketPrice, EveMoon
 
 from app_utils.esi import EsiStatus
 from app_utils.testing import NoSocketsTestCase, create_user_from_evecharacter
 
 from .. import tasks
-from ..models import Owner, Refinery
+from ..constants import EveTypeId
+from ..models import Extraction, Moon, Owner, Refinery
 from . import helpers
 from .testdata.esi_client_stub import esi_client_stub
 from .testdata.factories import (
     ExtractionFactory,
     MoonFactory,
+    MoonProductFactory,
     OwnerFactory,
     RefineryFactory,
 )
@@ -32,6 +34,7 @@ TASKS_PATH = "moonmining.tasks"
 VIEWS_PATH = "moonmining.views"
 
 
+@helpers.isolated_cache
 class TestUI(WebTest):
     @classmethod
     def setUpClass(cls):
@@ -54,6 +57,7 @@ class TestUI(WebTest):
     # TODO: Add more UI tests
 
 
+@helpers.isolated_cache
 @patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 100, 60))
 @patch(MODELS_PATH + ".EveSolarSystem.nearest_celestial", new=nearest_celestial_stub)
 @override_settings(CELERY_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
@@ -176,6 +180,57 @@ class TestUpdateTasks(NoSocketsTestCase):
         self.assertIsNotNone(ore.extras.current_price)
 
 
+@helpers.isolated_cache
+@patch(TASKS_PATH + ".fetch_esi_status", lambda: EsiStatus(True, 100, 60))
+@override_settings(CELERY_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
+class TestUpdateCalculatedProperties(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_eve_entities_from_allianceauth()
+        helpers.generate_market_prices()
+
+    @patch(TASKS_PATH + ".EveMarketPrice.objects.update_from_esi")
+    def test_should_update_moons_and_extractions_with_changed_prices_only(
+        self, mock_update_prices
+    ):
+        # given
+        mock_update_prices.return_value = None
+        moon_1 = MoonFactory()
+        extraction = ExtractionFactory(refinery=RefineryFactory(moon=moon_1))
+        moon_2 = MoonFactory(create_products=False)
+        MoonProductFactory(moon=moon_2, ore_type_id=EveTypeId.CINNABAR, amount=1.0)
+        Moon.objects.update(value=1.0)
+        Extraction.objects.update(value=1.0)
+        EveMarketPrice.objects.filter(eve_type_id=EveTypeId.CHROMITE).update(
+            average_price=4_000
+        )
+        # when
+        tasks.run_calculated_properties_update.delay()
+        # then
+        moon_1.refresh_from_db()
+        self.assertAlmostEqual(moon_1.value, moon_1.calc_value())
+        extraction.refresh_from_db()
+        self.assertAlmostEqual(extraction.value, extraction.calc_value())
+        moon_2.refresh_from_db()
+        self.assertEqual(moon_2.value, 1.0)
+
+    @patch(TASKS_PATH + ".EveMarketPrice.objects.update_from_esi")
+    def test_should_update_all_moons_when_requested(self, mock_update_prices):
+        # given
+        mock_update_prices.return_value = None
+        moon = MoonFactory()
+        Moon.objects.update(value=1.0)
+        # when
+        tasks.run_calculated_properties_update.delay(full_update=True)
+        # then
+        moon.refresh_from_db()
+        self.assertAlmostEqual(moon.value, moon.calc_value())
+
+
+@helpers.isolated_cache
 class TestProcessSurveyInput(TestCase):
     @classmethod
     def setUpClass(cls):
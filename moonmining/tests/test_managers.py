@@ -3,15 +3,42 @@ from unittest.mock import patch
 
 import pytz
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
-from eveuniverse.models import EveMarketPrice, EveType
+from eveuniverse.models import EveEntity, EveMarketPrice, EveMoon, EveType
 
 from app_utils.testing import NoSocketsTestCase
 
-from ..models import EveOreType, Extraction, Moon, Refinery
+from ..constants import EveTypeId
+from ..core import CalculatedExtraction, CalculatedExtractionProduct
+from ..models import (
+    EveOreType,
+    EveOreTypeExtras,
+    Extraction,
+    ExtractionLedgerSummary,
+    Label,
+    MiningLedgerRecord,
+    MiningLedgerSummary,
+    Moon,
+    MoonListEntry,
+    Notification,
+    OreQualityClass,
+    OreRarityClass,
+    Refinery,
+)
 from . import helpers
-from .testdata.factories import ExtractionFactory, OwnerFactory, RefineryFactory
+from .testdata.factories import (
+    ExtractionFactory,
+    ExtractionProductFactory,
+    MiningLedgerRecordFactory,
+    MoonFactory,
+    MoonProductFactory,
+    NotificationFactory,
+    OwnerFactory,
+    RefineryFactory,
+)
 from .testdata.load_allianceauth import load_allianceauth
 from .testdata.load_eveuniverse import load_eveuniverse
 from .testdata.survey_data import fetch_survey_data
@@ -25,6 +52,54 @@ class TestEveOreTypeManager(TestCase):
         super().setUpClass()
         load_eveuniverse()
 
+    def test_should_return_quality_classes(self):
+        # when
+        result = EveOreType.objects.quality_classes()
+        # then
+        self.assertEqual(result[EveTypeId.ZEOLITES], OreQualityClass.REGULAR)
+        self.assertEqual(result[EveTypeId.BRIMFUL_ZEOLITES], OreQualityClass.IMPROVED)
+        self.assertEqual(
+            result[EveTypeId.GLISTENING_ZEOLITES], OreQualityClass.EXCELLENT
+        )
+
+    def test_should_create_extras_with_classes(self):
+        # when
+        EveOreType.objects.update_classes(
+            [EveTypeId.GLISTENING_ZEOLITES, EveTypeId.CINNABAR]
+        )
+        # then
+        zeolites = EveOreType.objects.get(id=EveTypeId.GLISTENING_ZEOLITES)
+        self.assertEqual(zeolites.extras.quality_class, OreQualityClass.EXCELLENT)
+        self.assertEqual(zeolites.extras.rarity_class, OreRarityClass.R4)
+        cinnabar = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        self.assertEqual(cinnabar.extras.quality_class, OreQualityClass.REGULAR)
+        self.assertEqual(cinnabar.extras.rarity_class, OreRarityClass.R32)
+
+    def test_should_update_classes_of_existing_extras(self):
+        # given
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        EveOreTypeExtras.objects.create(ore_type=ore_type, current_price=42)
+        # when
+        EveOreType.objects.update_classes([EveTypeId.CINNABAR])
+        # then
+        ore_type.extras.refresh_from_db()
+        self.assertEqual(ore_type.extras.current_price, 42)
+        self.assertEqual(ore_type.extras.rarity_class, OreRarityClass.R32)
+
+    def test_should_create_missing_extras_only(self):
+        # given
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        EveOreTypeExtras.objects.create(ore_type=ore_type, current_price=42)
+        # when
+        EveOreType.objects.update_missing_classes(
+            [EveTypeId.GLISTENING_ZEOLITES, EveTypeId.CINNABAR]
+        )
+        # then
+        zeolites = EveOreType.objects.get(id=EveTypeId.GLISTENING_ZEOLITES)
+        self.assertEqual(zeolites.extras.quality_class, OreQualityClass.EXCELLENT)
+        ore_type.extras.refresh_from_db()
+        self.assertEqual(ore_type.extras.rarity_class, OreRarityClass.NONE)
+
     @patch(MANAGERS_PATH + ".MOONMINING_USE_REPROCESS_PRICING", False)
     def test_should_update_current_prices_with_market_price(self):
         # given
@@ -34,6 +109,8 @@ class TestEveOreTypeManager(TestCase):
         EveOreType.objects.update_current_prices()
         # then
         self.assertEqual(ore_type.extras.current_price, 42)
+        self.assertEqual(ore_type.extras.quality_class, OreQualityClass.REGULAR)
+        self.assertEqual(ore_type.extras.rarity_class, OreRarityClass.R32)
 
     @patch(MANAGERS_PATH + ".MOONMINING_REPROCESSING_YIELD", 0.7)
     @patch(MANAGERS_PATH + ".MOONMINING_USE_REPROCESS_PRICING", True)
@@ -51,6 +128,61 @@ class TestEveOreTypeManager(TestCase):
         # then
         self.assertEqual(ore_type.extras.current_price, 4002.25)
 
+    @patch(MANAGERS_PATH + ".MOONMINING_USE_REPROCESS_PRICING", True)
+    def test_should_update_current_prices_of_all_ores_in_bulk(self):
+        # given
+        helpers.generate_market_prices()
+        ore_types = list(EveOreType.objects.all())
+        EveOreTypeExtras.objects.filter(ore_type=ore_types[0]).delete()
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = EveOreType.objects.update_current_prices()
+        # then
+        select_queries = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        self.assertLessEqual(len(select_queries), 5)
+        self.assertEqual(result.created_count, 1)
+        self.assertEqual(result.updated_count, len(ore_types) - 1)
+        for ore_type in ore_types:
+            ore_type.extras.refresh_from_db()
+            self.assertAlmostEqual(
+                ore_type.extras.current_price, ore_type.calc_refined_value_per_unit()
+            )
+
+    @patch(MANAGERS_PATH + ".MOONMINING_USE_REPROCESS_PRICING", False)
+    def test_should_report_ore_types_with_changed_prices(self):
+        # given
+        cinnabar = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        chromite = EveOreType.objects.get(id=EveTypeId.CHROMITE)
+        EveMarketPrice.objects.create(eve_type=cinnabar, average_price=1_000)
+        EveMarketPrice.objects.create(eve_type=chromite, average_price=1_000)
+        EveOreType.objects.update_current_prices()
+        EveMarketPrice.objects.filter(eve_type=cinnabar).update(average_price=1_005)
+        EveMarketPrice.objects.filter(eve_type=chromite).update(average_price=1_200)
+        # when
+        result = EveOreType.objects.update_current_prices(change_threshold=0.01)
+        # then
+        self.assertSetEqual(result.changed_ore_type_ids, {EveTypeId.CHROMITE})
+        cinnabar.extras.refresh_from_db()
+        self.assertEqual(cinnabar.extras.current_price, 1_000)
+        chromite.extras.refresh_from_db()
+        self.assertEqual(chromite.extras.current_price, 1_200)
+
+    @patch(MANAGERS_PATH + ".MOONMINING_USE_REPROCESS_PRICING", False)
+    def test_should_set_unknown_pricing_method_when_no_market_price(self):
+        # given
+        ore_type = EveOreType.objects.get(name="Cinnabar")
+        # when
+        EveOreType.objects.update_current_prices()
+        # then
+        self.assertIsNone(ore_type.extras.current_price)
+        self.assertEqual(
+            ore_type.extras.pricing_method, EveOreTypeExtras.PricingMethod.UNKNOWN
+        )
+
 
 class TestExtractionManager(TestCase):
     @classmethod
@@ -109,6 +241,23 @@ class TestExtractionManager(TestCase):
         extraction_4.refresh_from_db()
         self.assertEqual(extraction_4.status, Extraction.Status.CANCELED)
 
+    def test_should_detect_jackpot_of_ore_types_without_extras(self):
+        # given
+        extraction = ExtractionFactory(create_products=False)
+        EveOreTypeExtras.objects.filter(
+            ore_type_id=EveTypeId.GLISTENING_ZEOLITES
+        ).delete()
+        calculated = extraction.to_calculated_extraction()
+        calculated.status = CalculatedExtraction.Status.READY
+        calculated.products = CalculatedExtractionProduct.create_list_from_dict(
+            {str(EveTypeId.GLISTENING_ZEOLITES.value): 100_000}
+        )
+        # when
+        Extraction.objects.update_from_calculated(calculated)
+        # then
+        extraction.refresh_from_db()
+        self.assertTrue(extraction.is_jackpot)
+
 
 class TestProcessSurveyInput(NoSocketsTestCase):
     @classmethod
@@ -158,6 +307,781 @@ class TestProcessSurveyInput(NoSocketsTestCase):
         self.assertEqual(m2.products.get(ore_type_id=46676).amount, 0.21)
         self.assertEqual(m2.products.get(ore_type_id=46678).amount, 0.29)
 
+    def test_should_replace_products_of_existing_moon(self):
+        # given
+        moon = MoonFactory(eve_moon=EveMoon.objects.get(id=40161708))
+        # when
+        result = Moon.objects.update_moons_from_survey(self.survey_data.get(2))
+        # then
+        self.assertTrue(result)
+        moon.refresh_from_db()
+        self.assertSetEqual(
+            set(moon.products.values_list("ore_type_id", flat=True)),
+            {45506, 46676, 46678, 46689},
+        )
+        self.assertEqual(moon.rarity_class, moon.calc_rarity_class())
+        self.assertEqual(moon.value, moon.calc_value())
+
+    def test_should_process_surveys_with_constant_number_of_queries(self):
+        # given
+        survey_1 = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\t0.19\t45506\t30002542\t40161707\t40161708\n"
+        )
+        survey_2 = (
+            "Auga V - Moon 2\n"
+            "\tBitumens\t0.27\t45492\t30002542\t40161707\t40161709\n"
+            "Helgatild IX - Moon 12\n"
+            "\tEuxenite\t0.11\t45495\t30002063\t40131683\t40131695\n"
+        )
+        # when
+        with CaptureQueriesContext(connection) as context_1:
+            Moon.objects.update_moons_from_survey(survey_1)
+        with CaptureQueriesContext(connection) as context_2:
+            Moon.objects.update_moons_from_survey(survey_2)
+        # then
+        self.assertEqual(Moon.objects.count(), 3)
+        self.assertEqual(len(context_1), len(context_2))
+
+    @patch(MANAGERS_PATH + ".notify")
+    def test_should_report_invalid_survey_and_process_valid_ones(self, mock_notify):
+        # given
+        text = (
+            "Auga V - Moon 1\n"
+            "\tCinnabar\tabc\t45506\t30002542\t40161707\t40161708\n"
+            "Auga V - Moon 2\n"
+            "\tBitumens\t0.27\t45492\t30002542\t40161707\t40161709\n"
+        )
+        # when
+        result = Moon.objects.update_moons_from_survey(text, self.user)
+        # then
+        self.assertFalse(result)
+        self.assertFalse(Moon.objects.filter(pk=40161708).exists())
+        m2 = Moon.objects.get(pk=40161709)
+        self.assertEqual(m2.products.count(), 1)
+        _, kwargs = mock_notify.call_args
+        self.assertIn("Auga V - Moon 1: FAILED - line 2: ValueError", kwargs["message"])
+        self.assertIn("Auga V - Moon 2: OK", kwargs["message"])
+
+
+class TestMiningLedgerRecordManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_eve_entities_from_allianceauth()
+        cls.refinery = RefineryFactory()
+
+    def test_should_create_update_and_skip_records(self):
+        # given
+        day = dt.date(2021, 4, 18)
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=day,
+            character_id=1001,
+            corporation_id=2001,
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=100,
+        )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=day,
+            character_id=1002,
+            corporation_id=2001,
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=200,
+        )
+        records = [
+            {
+                "character_id": 1001,
+                "last_updated": day,
+                "quantity": 150,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            },
+            {
+                "character_id": 1002,
+                "last_updated": day,
+                "quantity": 200,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            },
+            {
+                "character_id": 1099,
+                "last_updated": day,
+                "quantity": 300,
+                "recorded_corporation_id": 2099,
+                "type_id": EveTypeId.CINNABAR,
+            },
+        ]
+        # when
+        result = MiningLedgerRecord.objects.update_or_create_from_esi(
+            refinery=self.refinery, records=records, character_2_user={}
+        )
+        # then
+        self.assertEqual(result, (1, 1))
+        ledger = {
+            obj.character_id: obj.quantity for obj in self.refinery.mining_ledger.all()
+        }
+        self.assertDictEqual(ledger, {1001: 150, 1002: 200, 1099: 300})
+        self.assertTrue(EveEntity.objects.filter(id=1099).exists())
+        self.assertTrue(EveEntity.objects.filter(id=2099).exists())
+
+    def test_should_rebuild_summaries_from_first_changed_day_only(self):
+        # given
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=dt.date(2021, 3, 1),
+            character_id=1001,
+            corporation_id=2001,
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=100,
+        )
+        records = [
+            {
+                "character_id": 1001,
+                "last_updated": dt.date(2021, 3, 1),
+                "quantity": 100,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            },
+            {
+                "character_id": 1001,
+                "last_updated": dt.date(2021, 4, 18),
+                "quantity": 200,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            },
+        ]
+        # when
+        with patch(
+            MANAGERS_PATH + ".MiningLedgerSummaryManager.update_for_refinery"
+        ) as mock_summary, patch(
+            MANAGERS_PATH + ".ExtractionLedgerSummaryManager.update_for_refinery"
+        ) as mock_extraction_summary:
+            MiningLedgerRecord.objects.update_or_create_from_esi(
+                refinery=self.refinery, records=records, character_2_user={}
+            )
+        # then
+        _, kwargs = mock_summary.call_args
+        self.assertEqual(kwargs["start_day"], dt.date(2021, 4, 18))
+        _, kwargs = mock_extraction_summary.call_args
+        self.assertEqual(kwargs["start_day"], dt.date(2021, 4, 18))
+
+    def test_should_store_records_with_constant_number_of_queries(self):
+        # given
+        records = [
+            {
+                "character_id": 1001,
+                "last_updated": dt.date(2021, 4, 1) + dt.timedelta(days=num),
+                "quantity": 100 + num,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            }
+            for num in range(25)
+        ]
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = MiningLedgerRecord.objects.update_or_create_from_esi(
+                refinery=self.refinery, records=records, character_2_user={}
+            )
+        # then
+        self.assertEqual(result, (25, 0))
+        self.assertLessEqual(len(context.captured_queries), 10)
+
+    def test_should_add_totals_to_records(self):
+        # given
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        EveOreTypeExtras.objects.update_or_create(
+            ore_type=ore_type, defaults={"current_price": 10}
+        )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=dt.date(2021, 4, 18),
+            character_id=1001,
+            corporation_id=2001,
+            ore_type=ore_type,
+            quantity=100,
+        )
+        # when
+        obj = self.refinery.mining_ledger.with_totals().get()
+        # then
+        self.assertEqual(obj.unit_price, 10)
+        self.assertEqual(obj.total_price, 1_000)
+        self.assertEqual(obj.total_volume, 100 * ore_type.volume)
+
+    def test_should_not_aggregate_records_by_default(self):
+        # when
+        query = str(MiningLedgerRecord.objects.all().query)
+        # then
+        self.assertNotIn("GROUP BY", query)
+
+
+class TestMiningLedgerSummaryManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_eve_entities_from_allianceauth()
+        helpers.generate_market_prices()
+        cls.refinery = RefineryFactory()
+        cls.user = cls.refinery.owner.character_ownership.user
+
+    def test_should_roll_up_ledger_by_month(self):
+        # given
+        for day, quantity in [
+            (dt.date(2021, 3, 31), 50),
+            (dt.date(2021, 4, 1), 100),
+            (dt.date(2021, 4, 18), 200),
+        ]:
+            MiningLedgerRecordFactory(
+                refinery=self.refinery,
+                day=day,
+                character_id=1001,
+                corporation_id=2001,
+                ore_type_id=EveTypeId.CINNABAR,
+                quantity=quantity,
+                user=self.user,
+            )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=dt.date(2021, 4, 18),
+            character_id=1002,
+            corporation_id=2001,
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=400,
+        )
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        # when
+        result = MiningLedgerSummary.objects.update_for_refinery(
+            refinery=self.refinery, start_day=dt.date(2021, 4, 18)
+        )
+        # then
+        self.assertEqual(result, 1)
+        obj = MiningLedgerSummary.objects.get(refinery=self.refinery)
+        self.assertEqual(obj.user, self.user)
+        self.assertEqual(obj.month, dt.date(2021, 4, 1))
+        self.assertEqual(obj.quantity, 300)
+        self.assertAlmostEqual(obj.volume, 300 * ore_type.volume)
+        self.assertAlmostEqual(obj.value, 300 * ore_type.extras.current_price)
+
+    def test_should_update_values_from_current_prices(self):
+        # given
+        obj = MiningLedgerSummary.objects.create(
+            user=self.user,
+            refinery=self.refinery,
+            month=dt.date(2021, 4, 1),
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=300,
+            volume=3_000,
+            value=1,
+        )
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        # when
+        result = MiningLedgerSummary.objects.update_values([EveTypeId.CINNABAR])
+        # then
+        self.assertEqual(result, 1)
+        obj.refresh_from_db()
+        self.assertAlmostEqual(obj.value, 300 * ore_type.extras.current_price)
+
+
+class TestExtractionLedgerSummaryManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_eve_entities_from_allianceauth()
+        helpers.generate_market_prices()
+        cls.refinery = RefineryFactory()
+        cls.user = cls.refinery.owner.character_ownership.user
+
+    def test_should_summarize_ledger_of_extractions_in_window(self):
+        # given
+        extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=dt.datetime(2021, 4, 15, 12, 0, tzinfo=pytz.UTC),
+            status=Extraction.Status.COMPLETED,
+        )
+        old_extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=dt.datetime(2021, 3, 1, 12, 0, tzinfo=pytz.UTC),
+            status=Extraction.Status.COMPLETED,
+        )
+        for day, quantity in [
+            (dt.date(2021, 4, 14), 50),
+            (dt.date(2021, 4, 15), 100),
+            (dt.date(2021, 4, 18), 200),
+        ]:
+            MiningLedgerRecordFactory(
+                refinery=self.refinery,
+                day=day,
+                character_id=1001,
+                corporation_id=2001,
+                ore_type_id=EveTypeId.CINNABAR,
+                quantity=quantity,
+                user=self.user,
+            )
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        # when
+        result = ExtractionLedgerSummary.objects.update_for_refinery(
+            refinery=self.refinery, start_day=dt.date(2021, 4, 18)
+        )
+        # then
+        self.assertEqual(result, 1)
+        obj = extraction.ledger_summaries.get()
+        self.assertEqual(obj.character_id, 1001)
+        self.assertEqual(obj.user, self.user)
+        self.assertEqual(obj.quantity, 300)
+        self.assertAlmostEqual(obj.volume, 300 * ore_type.volume)
+        self.assertAlmostEqual(obj.value, 300 * ore_type.extras.current_price)
+        self.assertFalse(old_extraction.ledger_summaries.exists())
+
+    def test_should_summarize_many_extractions_with_one_ledger_query(self):
+        # given
+        extractions = [
+            ExtractionFactory(
+                refinery=self.refinery,
+                chunk_arrival_at=dt.datetime(2021, month, 10, 12, 0, tzinfo=pytz.UTC),
+                status=Extraction.Status.COMPLETED,
+            )
+            for month in [1, 2, 3]
+        ]
+        for month, quantity in [(1, 100), (2, 200), (3, 300)]:
+            for day in [10, 12]:
+                MiningLedgerRecordFactory(
+                    refinery=self.refinery,
+                    day=dt.date(2021, month, day),
+                    character_id=1001,
+                    corporation_id=2001,
+                    ore_type_id=EveTypeId.CINNABAR,
+                    quantity=quantity,
+                    user=self.user,
+                )
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = ExtractionLedgerSummary.objects.update_for_extractions(extractions)
+        # then
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in context.captured_queries
+                    if "moonmining_miningledgerrecord" in query["sql"]
+                ]
+            ),
+            1,
+        )
+        quantities = [
+            extraction.ledger_summaries.get().quantity for extraction in extractions
+        ]
+        self.assertListEqual(quantities, [200, 400, 600])
+
+    def test_should_update_summaries_when_ledger_changes(self):
+        # given
+        extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=dt.datetime(2021, 4, 15, 12, 0, tzinfo=pytz.UTC),
+            status=Extraction.Status.COMPLETED,
+        )
+        records = [
+            {
+                "character_id": 1001,
+                "last_updated": dt.date(2021, 4, 16),
+                "quantity": 100,
+                "recorded_corporation_id": 2001,
+                "type_id": EveTypeId.CINNABAR,
+            }
+        ]
+        # when
+        MiningLedgerRecord.objects.update_or_create_from_esi(
+            refinery=self.refinery, records=records, character_2_user={}
+        )
+        # then
+        obj = extraction.ledger_summaries.get()
+        self.assertEqual(obj.quantity, 100)
+
+    def test_should_update_values_from_current_prices(self):
+        # given
+        extraction = ExtractionFactory(
+            refinery=self.refinery, status=Extraction.Status.COMPLETED
+        )
+        obj = ExtractionLedgerSummary.objects.create(
+            extraction=extraction,
+            character_id=1001,
+            ore_type_id=EveTypeId.CINNABAR,
+            quantity=300,
+            volume=3_000,
+            value=1,
+        )
+        ore_type = EveOreType.objects.get(id=EveTypeId.CINNABAR)
+        # when
+        result = ExtractionLedgerSummary.objects.update_values([EveTypeId.CINNABAR])
+        # then
+        self.assertEqual(result, 1)
+        obj.refresh_from_db()
+        self.assertAlmostEqual(obj.value, 300 * ore_type.extras.current_price)
+
+
+class TestMoonQuerySet(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        helpers.generate_market_prices()
+
+    def test_should_update_calculated_properties(self):
+        # given
+        moon_1 = MoonFactory(value=None)
+        moon_2 = MoonFactory(create_products=False, value=None)
+        MoonProductFactory(moon=moon_2, ore_type_id=EveTypeId.BITUMENS, amount=0.4)
+        MoonProductFactory(moon=moon_2, ore_type_id=EveTypeId.CINNABAR, amount=0.6)
+        moon_3 = MoonFactory(create_products=False, value=1.0, rarity_class=64)
+        # when
+        result = Moon.objects.all().update_calculated_properties()
+        # then
+        self.assertEqual(result, 3)
+        for moon in [moon_1, moon_2, moon_3]:
+            moon.refresh_from_db()
+            self.assertAlmostEqual(moon.value, moon.calc_value())
+            self.assertEqual(moon.rarity_class, moon.calc_rarity_class())
+        self.assertEqual(moon_2.rarity_class, OreRarityClass.R32)
+        self.assertIsNone(moon_3.value)
+        self.assertEqual(moon_3.rarity_class, OreRarityClass.NONE)
+
+    def test_should_update_rarity_class_of_ore_types_without_extras(self):
+        # given
+        moon = MoonFactory(create_products=False, rarity_class=OreRarityClass.NONE)
+        MoonProductFactory(moon=moon, ore_type_id=EveTypeId.CINNABAR, amount=1.0)
+        EveOreTypeExtras.objects.filter(ore_type_id=EveTypeId.CINNABAR).delete()
+        # when
+        Moon.objects.filter(pk=moon.pk).update_calculated_properties()
+        # then
+        moon.refresh_from_db()
+        self.assertEqual(moon.rarity_class, OreRarityClass.R32)
+        self.assertEqual(moon.rarity_class, moon.calc_rarity_class())
+
+    def test_should_update_moons_in_chunks(self):
+        # given
+        moons = [MoonFactory() for _ in range(3)]
+        Moon.objects.update(value=None)
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = Moon.objects.all().update_calculated_properties(chunk_size=2)
+        # then
+        self.assertEqual(result, 3)
+        update_queries = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(update_queries), 2)
+        for moon in moons:
+            moon.refresh_from_db()
+            self.assertAlmostEqual(moon.value, moon.calc_value())
+
+    def test_should_update_given_moons_only(self):
+        # given
+        moon_1 = MoonFactory()
+        Moon.objects.filter(pk=moon_1.pk).update(value=None)
+        moon_2 = MoonFactory()
+        Moon.objects.filter(pk=moon_2.pk).update(value=None)
+        # when
+        Moon.objects.filter(pk=moon_1.pk).update_calculated_properties()
+        # then
+        moon_1.refresh_from_db()
+        self.assertIsNotNone(moon_1.value)
+        moon_2.refresh_from_db()
+        self.assertIsNone(moon_2.value)
+
+    def test_should_filter_moons_by_ore_types(self):
+        # given
+        moon_1 = MoonFactory()
+        moon_2 = MoonFactory(create_products=False)
+        MoonProductFactory(moon=moon_2, ore_type_id=EveTypeId.CINNABAR, amount=1.0)
+        # when
+        result = Moon.objects.filter_ore_types([EveTypeId.CHROMITE])
+        # then
+        self.assertQuerysetEqual(result, [moon_1], ordered=False)
+
+
+class TestMoonListEntryManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_market_prices()
+
+    def test_should_create_entries_for_moons(self):
+        # given
+        label = Label.objects.create(name="Dummy", style=Label.Style.RED)
+        moon = MoonFactory(eve_moon=EveMoon.objects.get(id=40161708), label=label)
+        refinery = RefineryFactory(moon=moon)
+        extraction = ExtractionFactory(refinery=refinery)
+        MoonListEntry.objects.all().delete()
+        # when
+        result = MoonListEntry.objects.update_for_moons()
+        # then
+        self.assertEqual(result, 1)
+        entry = MoonListEntry.objects.get(pk=moon.pk)
+        self.assertEqual(entry.name, "Auga V - 1")
+        self.assertEqual(entry.solar_system_name, "Auga")
+        self.assertEqual(entry.constellation_name, "Hed")
+        self.assertEqual(entry.region_name, "Heimatar")
+        self.assertEqual(entry.label_name, "Dummy")
+        self.assertEqual(entry.label_style, Label.Style.RED)
+        self.assertTrue(entry.has_refinery)
+        self.assertEqual(entry.refinery_name, refinery.name)
+        self.assertEqual(entry.owner, refinery.owner)
+        self.assertEqual(entry.owner_name, "Wayne Technologies [WYN]")
+        self.assertEqual(entry.corporation_name, "Wayne Technologies")
+        self.assertEqual(entry.alliance_name, "Wayne Enterprises")
+        self.assertEqual(entry.extraction_pk, extraction.pk)
+        self.assertTrue(entry.has_extraction)
+        self.assertEqual(entry.rarity_class, moon.rarity_class)
+        self.assertAlmostEqual(entry.value, moon.value)
+
+    def test_should_update_entries_of_both_moons_when_refinery_moves(self):
+        # given
+        old_moon = MoonFactory(eve_moon=EveMoon.objects.get(id=40161708))
+        new_moon = MoonFactory(eve_moon=EveMoon.objects.get(id=40161709))
+        RefineryFactory(moon=old_moon)
+        refinery = Refinery.objects.get(moon=old_moon)
+        # when
+        refinery.moon = new_moon
+        refinery.save()
+        # then
+        self.assertFalse(MoonListEntry.objects.get(pk=old_moon.pk).has_refinery)
+        self.assertTrue(MoonListEntry.objects.get(pk=new_moon.pk).has_refinery)
+
+    def test_should_update_existing_entries_in_chunks(self):
+        # given
+        moons = [MoonFactory() for _ in range(3)]
+        Moon.objects.update(value=1.0)
+        # when
+        result = MoonListEntry.objects.update_for_moons(chunk_size=2)
+        # then
+        self.assertEqual(result, 3)
+        for moon in moons:
+            self.assertEqual(MoonListEntry.objects.get(pk=moon.pk).value, 1.0)
+
+    def test_should_update_given_moons_only(self):
+        # given
+        moon_1 = MoonFactory()
+        moon_2 = MoonFactory()
+        Moon.objects.update(value=1.0)
+        # when
+        MoonListEntry.objects.update_for_moons([moon_1.pk])
+        # then
+        self.assertEqual(MoonListEntry.objects.get(pk=moon_1.pk).value, 1.0)
+        self.assertNotEqual(MoonListEntry.objects.get(pk=moon_2.pk).value, 1.0)
+
+    def test_should_update_moons_of_owner(self):
+        # given
+        refinery = RefineryFactory()
+        former_refinery = RefineryFactory(owner=refinery.owner)
+        ExtractionFactory(refinery=refinery)
+        Refinery.objects.filter(pk=former_refinery.pk).update(moon=None)
+        # when
+        MoonListEntry.objects.update_for_owner(refinery.owner)
+        # then
+        entry = MoonListEntry.objects.get(pk=refinery.moon.pk)
+        self.assertTrue(entry.has_extraction)
+        entry = MoonListEntry.objects.get(pk=former_refinery.moon.pk)
+        self.assertFalse(entry.has_refinery)
+        self.assertIsNone(entry.owner)
+
+
+class TestExtractionQuerySet(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        helpers.generate_eve_entities_from_allianceauth()
+        helpers.generate_market_prices()
+
+    def test_should_update_calculated_properties(self):
+        # given
+        refinery = RefineryFactory()
+        extraction_1 = ExtractionFactory(refinery=refinery, create_products=False)
+        ExtractionProductFactory(
+            extraction=extraction_1,
+            ore_type_id=EveTypeId.GLISTENING_ZEOLITES,
+            volume=100_000,
+        )
+        ExtractionProductFactory(
+            extraction=extraction_1, ore_type_id=46283, volume=200_000
+        )
+        extraction_2 = ExtractionFactory(refinery=refinery, create_products=False)
+        ExtractionProductFactory(
+            extraction=extraction_2,
+            ore_type_id=EveTypeId.GLISTENING_ZEOLITES,
+            volume=100_000,
+        )
+        ExtractionProductFactory(
+            extraction=extraction_2,
+            ore_type_id=EveTypeId.BRIMFUL_ZEOLITES,
+            volume=200_000,
+        )
+        extraction_3 = ExtractionFactory(refinery=refinery, create_products=False)
+        Extraction.objects.update(value=1.0, is_jackpot=False)
+        # when
+        result = Extraction.objects.all().update_calculated_properties()
+        # then
+        self.assertEqual(result, 3)
+        for extraction in [extraction_1, extraction_2, extraction_3]:
+            extraction.refresh_from_db()
+            self.assertAlmostEqual(extraction.value, extraction.calc_value())
+        self.assertTrue(extraction_1.is_jackpot)
+        self.assertFalse(extraction_2.is_jackpot)
+        self.assertIsNone(extraction_3.value)
+        self.assertIsNone(extraction_3.is_jackpot)
+
+    def test_should_update_with_constant_number_of_queries(self):
+        # given
+        refinery = RefineryFactory()
+        for _ in range(5):
+            ExtractionFactory(refinery=refinery)
+        Extraction.objects.update(value=None)
+        # when
+        with CaptureQueriesContext(connection) as context:
+            result = Extraction.objects.all().update_calculated_properties(
+                chunk_size=10
+            )
+        # then
+        self.assertEqual(result, 5)
+        self.assertLessEqual(len(context.captured_queries), 5)
+        for extraction in Extraction.objects.all():
+            self.assertAlmostEqual(extraction.value, extraction.calc_value())
+
+    def test_should_update_given_extractions_only(self):
+        # given
+        refinery = RefineryFactory()
+        extraction_1 = ExtractionFactory(refinery=refinery)
+        extraction_2 = ExtractionFactory(refinery=refinery)
+        Extraction.objects.update(value=None)
+        # when
+        Extraction.objects.filter(pk=extraction_1.pk).update_calculated_properties()
+        # then
+        extraction_1.refresh_from_db()
+        self.assertIsNotNone(extraction_1.value)
+        extraction_2.refresh_from_db()
+        self.assertIsNone(extraction_2.value)
+
+
+class TestNotificationManager(NoSocketsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        load_eveuniverse()
+        load_allianceauth()
+        cls.owner = OwnerFactory()
+
+    def _refinery_with_all_notifications_processed(self):
+        return RefineryFactory(
+            owner=self.owner,
+            last_notification_id=9_999_999_999,
+            last_notification_timestamp=now(),
+        )
+
+    def test_should_delete_old_notifications_of_finished_extractions(self):
+        # given
+        refinery = self._refinery_with_all_notifications_processed()
+        old_extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=now() - dt.timedelta(days=120),
+            status=Extraction.Status.COMPLETED,
+        )
+        old_notif = NotificationFactory(extraction=old_extraction)
+        recent_extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=now() - dt.timedelta(days=30),
+            status=Extraction.Status.COMPLETED,
+        )
+        recent_notif = NotificationFactory(extraction=recent_extraction)
+        # when
+        result = Notification.objects.delete_obsolete(max_age_days=90)
+        # then
+        self.assertEqual(result, 1)
+        self.assertFalse(Notification.objects.filter(pk=old_notif.pk).exists())
+        self.assertTrue(Notification.objects.filter(pk=recent_notif.pk).exists())
+
+    def test_should_keep_old_notifications_of_open_extractions(self):
+        # given
+        refinery = self._refinery_with_all_notifications_processed()
+        extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=now() - dt.timedelta(days=120),
+            status=Extraction.Status.STARTED,
+        )
+        notif = NotificationFactory(extraction=extraction)
+        # when
+        result = Notification.objects.delete_obsolete(max_age_days=90)
+        # then
+        self.assertEqual(result, 0)
+        self.assertTrue(Notification.objects.filter(pk=notif.pk).exists())
+
+    def test_should_delete_oldest_notifications_exceeding_row_budget(self):
+        # given
+        refinery = self._refinery_with_all_notifications_processed()
+        notifs = [
+            NotificationFactory(
+                extraction=ExtractionFactory(
+                    refinery=refinery,
+                    started_at=now() - dt.timedelta(days=days),
+                    status=Extraction.Status.COMPLETED,
+                )
+            )
+            for days in [30, 20, 10]
+        ]
+        # when
+        result = Notification.objects.delete_obsolete(max_age_days=90, max_per_owner=2)
+        # then
+        self.assertEqual(result, 1)
+        self.assertSetEqual(
+            set(Notification.objects.values_list("pk", flat=True)),
+            {notifs[1].pk, notifs[2].pk},
+        )
+
+    def test_should_keep_old_notifications_not_yet_processed(self):
+        # given
+        refinery = RefineryFactory(
+            owner=self.owner,
+            last_notification_id=1,
+            last_notification_timestamp=now() - dt.timedelta(days=150),
+        )
+        extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=now() - dt.timedelta(days=120),
+            status=Extraction.Status.COMPLETED,
+        )
+        notif = NotificationFactory(extraction=extraction)
+        # when
+        result = Notification.objects.delete_obsolete(max_age_days=90, max_per_owner=0)
+        # then
+        self.assertEqual(result, 0)
+        self.assertTrue(Notification.objects.filter(pk=notif.pk).exists())
+
+    def test_should_keep_old_notifications_of_refineries_without_cursor(self):
+        # given
+        refinery = RefineryFactory(owner=self.owner)
+        extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=now() - dt.timedelta(days=120),
+            status=Extraction.Status.COMPLETED,
+        )
+        notif = NotificationFactory(extraction=extraction)
+        # when
+        result = Notification.objects.delete_obsolete(max_age_days=90, max_per_owner=0)
+        # then
+        self.assertEqual(result, 0)
+        self.assertTrue(Notification.objects.filter(pk=notif.pk).exists())
+
 
 class TestRefineryManager(NoSocketsTestCase):
     @classmethod
@@ -3,13 +3,17 @@ from unittest.mock import patch
 
 import pytz
 
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from esi.models import Token
-from eveuniverse.models import EveMarketPrice, EveMoon, EveType
+from eveuniverse.models import EveEntity, EveMarketPrice, EveMoon, EveType
 
 from app_utils.testdata_factories import UserFactory
 from app_utils.testing import NoSocketsTestCase
 
+from moonmining import caches
 from moonmining.constants import EveTypeId
 from moonmining.core import CalculatedExtraction, CalculatedExtractionProduct
 from moonmining.models import (
@@ -18,6 +22,7 @@ from moonmining.models import (
     NotificationType,
     OreQualityClass,
     OreRarityClass,
+    Owner,
     Refinery,
 )
 
@@ -527,6 +532,7 @@ class TestOreQualityClass(NoSocketsTestCase):
         self.assertIn("+100%", OreQualityClass.EXCELLENT.bootstrap_tag_html)
 
 
+@helpers.isolated_cache
 class TestOwner(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls):
@@ -558,6 +564,7 @@ class TestOwner(NoSocketsTestCase):
             owner.fetch_token()
 
 
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 class TestOwnerFetchNotifications(NoSocketsTestCase):
     @classmethod
@@ -585,7 +592,72 @@ class TestOwnerFetchNotifications(NoSocketsTestCase):
         self.assertEqual(obj.details["moonID"], 40161708)
         self.assertEqual(obj.details["structureID"], 1000000000001)
 
+    def test_should_resolve_names_of_new_senders_only(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        _, character_ownership = helpers.create_default_user_from_evecharacter(1005)
+        owner = OwnerFactory(character_ownership=character_ownership)
+        EveEntity.objects.create(id=3099)
+        # when
+        with patch(
+            "eveuniverse.managers.EveEntityManagerBase.update_from_esi_by_id"
+        ) as mock_update_from_esi_by_id:
+            owner.fetch_notifications_from_esi()
+        # then
+        for args, _ in mock_update_from_esi_by_id.call_args_list:
+            self.assertNotIn(3099, set(args[0]))
+
+    def test_should_remember_newest_notification(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        _, character_ownership = helpers.create_default_user_from_evecharacter(1005)
+        owner = OwnerFactory(character_ownership=character_ownership)
+        # when
+        owner.fetch_notifications_from_esi()
+        # then
+        owner.refresh_from_db()
+        self.assertEqual(owner.last_notification_id, 1005000105)
+        self.assertEqual(
+            owner.last_notification_timestamp,
+            dt.datetime(2019, 11, 22, 5, 0, tzinfo=pytz.UTC),
+        )
 
+    def test_should_only_store_notifications_newer_than_high_water_mark(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        _, character_ownership = helpers.create_default_user_from_evecharacter(1005)
+        owner = OwnerFactory(
+            character_ownership=character_ownership,
+            last_notification_id=1005000103,
+            last_notification_timestamp=dt.datetime(
+                2019, 11, 22, 3, 0, tzinfo=pytz.UTC
+            ),
+        )
+        # when
+        owner.fetch_notifications_from_esi()
+        # then
+        self.assertSetEqual(
+            set(owner.notifications.values_list("notification_id", flat=True)),
+            {1005000104, 1005000105},
+        )
+
+    def test_should_not_store_anything_when_no_new_notifications(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        _, character_ownership = helpers.create_default_user_from_evecharacter(1005)
+        owner = OwnerFactory(character_ownership=character_ownership)
+        owner.fetch_notifications_from_esi()
+        # when
+        with CaptureQueriesContext(connection) as ctx:
+            owner.fetch_notifications_from_esi()
+        # then
+        self.assertEqual(owner.notifications.count(), 5)
+        self.assertTrue(
+            all(query["sql"].startswith("SELECT") for query in ctx.captured_queries)
+        )
+
+
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 @patch(MODELS_PATH + ".notify_admins_throttled", lambda *args, **kwargs: None)
 class TestOwnerUpdateRefineries(NoSocketsTestCase):
@@ -689,7 +761,53 @@ class TestOwnerUpdateRefineries(NoSocketsTestCase):
         # then
         self.assertSetEqual(Refinery.objects.ids(), {1000000000001, 1000000000002})
 
+    @patch(
+        MODELS_PATH + ".EveSolarSystem.nearest_celestial", new=nearest_celestial_stub
+    )
+    def test_should_fetch_token_once(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        with patch.object(
+            Owner, "fetch_token", autospec=True, side_effect=Owner.fetch_token
+        ) as spy_fetch_token:
+            self.owner.update_refineries_from_esi()
+        # then
+        self.assertEqual(spy_fetch_token.call_count, 1)
+        self.assertSetEqual(Refinery.objects.ids(), {1000000000001, 1000000000002})
+
+    @patch(
+        MODELS_PATH + ".EveSolarSystem.nearest_celestial", new=nearest_celestial_stub
+    )
+    def test_should_cache_primary_key_of_token_only(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        # when
+        self.owner.update_refineries_from_esi()
+        # then
+        self.assertEqual(
+            cache.get(f"{caches.OWNER_TOKEN_KEY}_{self.owner.pk}"),
+            self.owner.fetch_token().pk,
+        )
 
+    @patch(
+        MODELS_PATH + ".EveSolarSystem.nearest_celestial", new=nearest_celestial_stub
+    )
+    def test_should_update_existing_refineries(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        moon = MoonFactory(eve_moon=EveMoon.objects.get(id=40161708))
+        RefineryFactory(id=1000000000001, moon=moon, name="Old name", owner=self.owner)
+        # when
+        self.owner.update_refineries_from_esi()
+        # then
+        refinery = Refinery.objects.get(id=1000000000001)
+        self.assertEqual(refinery.name, "Auga - Paradise Alpha")
+        self.assertEqual(refinery.moon, moon)
+        self.assertEqual(moon.list_entry.refinery_name, "Auga - Paradise Alpha")
+
+
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 class TestOwnerUpdateExtractions(NoSocketsTestCase):
     @classmethod
@@ -729,6 +847,7 @@ class TestOwnerUpdateExtractions(NoSocketsTestCase):
         self.assertIsNotNone(extraction.is_jackpot)
 
 
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 class TestOwnerUpdateExtractionsFromEsi(NoSocketsTestCase):
     @classmethod
@@ -801,6 +920,7 @@ class TestOwnerUpdateExtractionsFromEsi(NoSocketsTestCase):
         self.assertTrue(started_extraction.canceled_at)
 
 
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 class TestOwnerUpdateExtractionsFromNotifications(NoSocketsTestCase):
     @classmethod
@@ -1151,7 +1271,89 @@ class TestOwnerUpdateExtractionsFromNotifications(NoSocketsTestCase):
         # then
         self.assertEqual(moon.products.count(), 3)
 
+    def test_should_resume_from_stored_extraction_state(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        owner = OwnerFactory()
+        refinery = RefineryFactory(owner=owner)
+        extraction = ExtractionFactory(
+            refinery=refinery, create_products=False, status=Extraction.Status.STARTED
+        )
+        calc_extraction = extraction.to_calculated_extraction()
+        started_notif = NotificationFactory2(
+            extraction=calc_extraction, owner=owner, create_products=True
+        )
+        owner.update_extractions_from_notifications()
+        started_by_id = started_notif.details["startedBy"]
+        started_notif.delete()
+        calc_extraction.status = CalculatedExtraction.Status.READY
+        finished_notif = NotificationFactory2(
+            extraction=calc_extraction,
+            owner=owner,
+            timestamp=extraction.chunk_arrival_at,
+        )
+        # when
+        owner.update_extractions_from_notifications()
+        # then
+        extraction.refresh_from_db()
+        self.assertEqual(extraction.status, Extraction.Status.READY)
+        refinery.refresh_from_db()
+        self.assertEqual(
+            refinery.calculated_extraction["status"],
+            CalculatedExtraction.Status.READY,
+        )
+        self.assertEqual(refinery.calculated_extraction["started_by"], started_by_id)
+        self.assertEqual(refinery.last_notification_id, finished_notif.notification_id)
+
+    def test_should_not_process_notifications_again(self, mock_esi):
+        # given
+        mock_esi.client = esi_client_stub
+        owner = OwnerFactory()
+        refinery = RefineryFactory(owner=owner)
+        extraction = ExtractionFactory(
+            refinery=refinery, create_products=False, status=Extraction.Status.STARTED
+        )
+        NotificationFactory2(
+            extraction=extraction.to_calculated_extraction(),
+            owner=owner,
+            create_products=True,
+        )
+        owner.update_extractions_from_notifications()
+        # when
+        with patch(
+            MODELS_PATH + ".Refinery.update_extractions_from_notifications"
+        ) as mock_update:
+            owner.update_extractions_from_notifications()
+        # then
+        self.assertFalse(mock_update.called)
+
+    def test_should_update_extraction_created_after_notification_was_processed(
+        self, mock_esi
+    ):
+        # given
+        mock_esi.client = esi_client_stub
+        owner = OwnerFactory()
+        refinery = RefineryFactory(owner=owner)
+        calc_extraction = CalculatedExtractionFactory(refinery_id=refinery.id)
+        NotificationFactory2(
+            extraction=calc_extraction, owner=owner, create_products=True
+        )
+        owner.update_extractions_from_notifications()
+        extraction = ExtractionFactory(
+            refinery=refinery,
+            started_at=calc_extraction.started_at,
+            chunk_arrival_at=calc_extraction.chunk_arrival_at,
+            auto_fracture_at=calc_extraction.auto_fracture_at,
+            create_products=False,
+            status=Extraction.Status.STARTED,
+        )
+        # when
+        owner.update_extractions_from_notifications()
+        # then
+        self.assertTrue(extraction.products.exists())
+
 
+@helpers.isolated_cache
 @patch(MODELS_PATH + ".esi")
 class TestOwnerUpdateMiningLedger(NoSocketsTestCase):
     @classmethod
@@ -1189,6 +1391,9 @@ class TestOwnerUpdateMiningLedger(NoSocketsTestCase):
         self.assertEqual(obj.quantity, 500)
         self.assertEqual(obj.corporation_id, 2001)
         self.assertEqual(obj.ore_type_id, 45506)
+        summary = refinery.mining_ledger_summaries.get(user=obj.user)
+        self.assertEqual(summary.month, dt.date(2017, 9, 1))
+        self.assertEqual(summary.quantity, 500)
 
     def test_should_update_existing_mining_ledger(self, mock_esi):
         # given
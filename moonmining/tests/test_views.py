@@ -4,9 +4,13 @@ from unittest.mock import Mock, patch
 import pytz
 
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connection
+from django.db.models import Sum
 from django.http import Http404
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.utils.timezone import now
 from esi.models import Token
 from eveuniverse.models import EveMarketPrice, EveMoon
@@ -18,8 +22,18 @@ from app_utils.testing import (
     json_response_to_python,
 )
 
-from .. import views
-from ..models import EveOreType, Extraction, Label, Moon, Owner
+from .. import caches, tasks, views
+from ..models import (
+    EveOreType,
+    EveOreTypeExtras,
+    Extraction,
+    ExtractionLedgerSummary,
+    Label,
+    MiningLedgerSummary,
+    Moon,
+    MoonListEntry,
+    Owner,
+)
 from . import helpers
 from .testdata.factories import (
     EveEntityCharacterFactory,
@@ -27,6 +41,7 @@ from .testdata.factories import (
     ExtractionFactory,
     MiningLedgerRecordFactory,
     MoonFactory,
+    OwnerFactory,
     RefineryFactory,
 )
 from .testdata.load_allianceauth import load_allianceauth
@@ -35,6 +50,7 @@ from .testdata.load_eveuniverse import load_eveuniverse
 MODULE_PATH = "moonmining.views"
 
 
+@helpers.isolated_cache
 class TestOwner(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -117,6 +133,7 @@ class TestOwner(TestCase):
             orig_view(request, token)
 
 
+@helpers.isolated_cache
 class TestMoonsData(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -223,6 +240,60 @@ class TestMoonsData(TestCase):
         data = self._response_to_dict(response)
         self.assertSetEqual(set(data.keys()), {40161708})
 
+    def test_should_return_not_modified_for_next_draw_of_unchanged_data(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1001,
+            permissions=["moonmining.basic_access", "moonmining.view_all_moons"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        url = f"/moonmining/moons_data/{views.MoonsCategory.ALL}"
+        etag = self.client.get(url + "?draw=1&start=0&length=10")["ETag"]
+        # when
+        response = self.client.get(
+            url + "?length=10&draw=2&start=0", HTTP_IF_NONE_MATCH=etag
+        )
+        # then
+        self.assertEqual(response.status_code, 304)
+
+    def test_should_return_data_for_different_page_of_unchanged_data(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1001,
+            permissions=["moonmining.basic_access", "moonmining.view_all_moons"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        url = f"/moonmining/moons_data/{views.MoonsCategory.ALL}"
+        etag = self.client.get(url + "?draw=1&start=0&length=10")["ETag"]
+        # when
+        response = self.client.get(
+            url + "?draw=2&start=10&length=10", HTTP_IF_NONE_MATCH=etag
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+
+    def test_should_filter_moons_by_drop_down_values(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1001,
+            permissions=["moonmining.basic_access", "moonmining.view_all_moons"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(
+            f"/moonmining/moons_data/{views.MoonsCategory.ALL}"
+            "?columns[7][search][value]=^Auga$&columns[7][search][regex]=true"
+            "&columns[14][search][value]=^Dummy$&columns[14][search][regex]=true"
+            "&columns[8][search][value]=^no$&columns[8][search][regex]=true"
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = self._response_to_dict(response)
+        self.assertSetEqual(set(data.keys()), {40161708})
+
     def test_should_return_fdd_for_all_moons(self):
         # given
         user, _ = create_user_from_evecharacter(
@@ -254,7 +325,36 @@ class TestMoonsData(TestCase):
         self.assertListEqual(data["has_extraction_str"], [])
         self.assertIn("ERROR", data["invalid_column"][0])
 
+    def test_should_return_cached_fdd_on_repeat_loads(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.view_all_moons"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        url = (
+            f"/moonmining/moons_fdd_data/{views.MoonsCategory.ALL}"
+            "?columns=region_name,rarity_class_str,has_refinery_str"
+        )
+        self.client.get(url)
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = json_response_to_python(response)
+        self.assertListEqual(data["region_name"], ["Heimatar", "Metropolis"])
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "moonmining_moonlistentry" in query["sql"]
+            ]
+        )
+
 
+@helpers.isolated_cache
 class TestMoonInfo(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -287,7 +387,29 @@ class TestMoonInfo(TestCase):
         # then
         self.assertTemplateUsed(response, "moonmining/modals/moon_details.html")
 
+    def test_should_serve_moon_details_from_cache(self):
+        # given
+        moon = MoonFactory()
+        user, _ = create_user_from_evecharacter(
+            1002, permissions=["moonmining.basic_access"]
+        )
+        self.client.force_login(user)
+        self.client.get(f"/moonmining/moon/{moon.pk}")
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/moonmining/moon/{moon.pk}")
+        # then
+        self.assertContains(response, moon.name)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "moonmining_moon" in query["sql"]
+            ]
+        )
+
 
+@helpers.isolated_cache
 class TestViewsAreWorking(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -385,6 +507,7 @@ class TestViewsAreWorking(TestCase):
         self.assertTemplateUsed(response, "moonmining/extractions.html")
 
 
+@helpers.isolated_cache
 class TestExtractionsData(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -405,6 +528,19 @@ class TestExtractionsData(TestCase):
         EveMarketPrice.objects.create(eve_type_id=45506, average_price=10)
         cls.user_1003, _ = create_user_from_evecharacter(1003)
 
+    @staticmethod
+    def _url(category, **params) -> str:
+        query = {}
+        for num, column in enumerate(views.ExtractionListJson.columns):
+            query[f"columns[{num}][data]"] = column
+            query[f"columns[{num}][name]"] = ""
+        query.update(params)
+        return (
+            reverse("moonmining:extractions_data", args=[category.value])
+            + "?"
+            + urlencode(query)
+        )
+
     def test_should_show_extraction(self):
         # given
         MiningLedgerRecordFactory(
@@ -425,18 +561,93 @@ class TestExtractionsData(TestCase):
         )
         self.client.force_login(user)
         # when
-        response = self.client.get(
-            f"/moonmining/extractions_data/{views.ExtractionsCategory.PAST}",
-        )
+        response = self.client.get(self._url(views.ExtractionsCategory.PAST))
         # then
         self.assertEqual(response.status_code, 200)
-        data = json_response_to_dict(response)
+        data = helpers.json_response_to_dict_2(response)
         self.assertSetEqual(set(data.keys()), {self.extraction.pk})
         obj = data[self.extraction.pk]
         self.assertIn("2019-Nov-20 00:01", obj["chunk_arrival_at"]["display"])
         self.assertEqual(obj["corporation_name"], "Wayne Technologies [WYN]")
         self.assertIn("modalExtractionLedger", obj["details"])
 
+    def test_should_show_mined_value_of_extraction(self):
+        # given
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            character_id=1001,
+            day=dt.date(2019, 11, 20),
+            corporation_id=2001,
+            ore_type_id=45506,
+            quantity=100,
+            user=self.user_1003,
+        )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            character_id=1001,
+            day=dt.date(2019, 11, 30),
+            corporation_id=2001,
+            ore_type_id=45506,
+            quantity=200,
+            user=self.user_1003,
+        )
+        EveOreType.objects.update_current_prices(use_process_pricing=False)
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(self._url(views.ExtractionsCategory.PAST))
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = helpers.json_response_to_dict_2(response)
+        self.assertEqual(data[self.extraction.pk]["mined_value"], 100 * 10)
+        self.assertEqual(
+            json_response_to_python(response)["totals"]["mined_value"], 1000
+        )
+
+    def test_should_use_constant_number_of_queries(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=[
+                "moonmining.basic_access",
+                "moonmining.extractions_access",
+                "moonmining.view_moon_ledgers",
+            ],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        url = self._url(views.ExtractionsCategory.PAST)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        query_count_1 = len(context.captured_queries)
+        for num in range(5):
+            chunk_arrival_at = dt.datetime(2019, 10, 1 + num, 0, 1, tzinfo=pytz.UTC)
+            ExtractionFactory(
+                refinery=self.refinery,
+                chunk_arrival_at=chunk_arrival_at,
+                auto_fracture_at=chunk_arrival_at + dt.timedelta(hours=3),
+                started_at=chunk_arrival_at - dt.timedelta(days=20),
+                status=Extraction.Status.COMPLETED,
+            )
+            MiningLedgerRecordFactory(
+                refinery=self.refinery,
+                character_id=1001,
+                day=chunk_arrival_at.date(),
+                corporation_id=2001,
+                user=self.user_1003,
+            )
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(helpers.json_response_to_dict_2(response)), 6)
+        self.assertEqual(len(context.captured_queries), query_count_1)
+
     def test_should_not_show_extraction(self):
         # given
         user, _ = create_user_from_evecharacter(
@@ -446,9 +657,7 @@ class TestExtractionsData(TestCase):
         )
         self.client.force_login(user)
         # when
-        response = self.client.get(
-            f"/moonmining/extractions_data/{views.ExtractionsCategory.PAST}",
-        )
+        response = self.client.get(self._url(views.ExtractionsCategory.PAST))
         # then
         self.assertEqual(response.status_code, 302)
 
@@ -468,12 +677,10 @@ class TestExtractionsData(TestCase):
         )
         self.client.force_login(user)
         # when
-        response = self.client.get(
-            f"/moonmining/extractions_data/{views.ExtractionsCategory.PAST}",
-        )
+        response = self.client.get(self._url(views.ExtractionsCategory.PAST))
         # then
         self.assertEqual(response.status_code, 200)
-        data = json_response_to_dict(response)
+        data = helpers.json_response_to_dict_2(response)
         obj = data[self.extraction.pk]
         self.assertNotIn("modalExtractionLedger", obj["details"])
 
@@ -490,16 +697,163 @@ class TestExtractionsData(TestCase):
         )
         self.client.force_login(user)
         # when
-        response = self.client.get(
-            f"/moonmining/extractions_data/{views.ExtractionsCategory.PAST}",
-        )
+        response = self.client.get(self._url(views.ExtractionsCategory.PAST))
         # then
         self.assertEqual(response.status_code, 200)
-        data = json_response_to_dict(response)
+        data = helpers.json_response_to_dict_2(response)
         obj = data[self.extraction.pk]
         self.assertNotIn("modalExtractionLedger", obj["details"])
 
+    def test_should_page_and_order_extractions(self):
+        # given
+        for num in range(2):
+            chunk_arrival_at = dt.datetime(2019, 10, 1 + num, 0, 1, tzinfo=pytz.UTC)
+            ExtractionFactory(
+                refinery=self.refinery,
+                chunk_arrival_at=chunk_arrival_at,
+                auto_fracture_at=chunk_arrival_at + dt.timedelta(hours=3),
+                started_at=chunk_arrival_at - dt.timedelta(days=20),
+                status=Extraction.Status.COMPLETED,
+            )
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(
+            self._url(
+                views.ExtractionsCategory.PAST,
+                **{"start": 0, "length": 2, "order[0][column]": 0},
+                **{"order[0][dir]": "desc"},
+            )
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        result = json_response_to_python(response)
+        self.assertEqual(result["recordsTotal"], 3)
+        self.assertEqual(result["recordsFiltered"], 3)
+        days = [obj["chunk_arrival_at"]["sort"][:10] for obj in result["data"]]
+        self.assertListEqual(days, ["2019-11-20", "2019-10-02"])
+
+    def test_should_return_totals_of_all_pages(self):
+        # given
+        chunk_arrival_at = dt.datetime(2019, 10, 1, 0, 1, tzinfo=pytz.UTC)
+        extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=chunk_arrival_at,
+            auto_fracture_at=chunk_arrival_at + dt.timedelta(hours=3),
+            started_at=chunk_arrival_at - dt.timedelta(days=20),
+            status=Extraction.Status.COMPLETED,
+        )
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(
+            self._url(views.ExtractionsCategory.PAST, **{"start": 0, "length": 1})
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        result = json_response_to_python(response)
+        self.assertEqual(len(result["data"]), 1)
+        extractions = [self.extraction, extraction]
+        self.assertAlmostEqual(
+            result["totals"]["volume"],
+            sum(
+                obj.products.aggregate(total=Sum("volume"))["total"]
+                for obj in extractions
+            ),
+        )
+        self.assertAlmostEqual(
+            result["totals"]["value"], sum(obj.value for obj in extractions)
+        )
+
+    def test_should_filter_extractions_by_column(self):
+        # given
+        chunk_arrival_at = dt.datetime(2019, 10, 1, 0, 1, tzinfo=pytz.UTC)
+        extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=chunk_arrival_at,
+            auto_fracture_at=chunk_arrival_at + dt.timedelta(hours=3),
+            started_at=chunk_arrival_at - dt.timedelta(days=20),
+            status=Extraction.Status.CANCELED,
+        )
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(
+            self._url(
+                views.ExtractionsCategory.PAST,
+                **{"columns[10][search][value]": "canceled"},
+            )
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = helpers.json_response_to_dict_2(response)
+        self.assertSetEqual(set(data.keys()), {extraction.pk})
+
+    def test_should_return_fdd_for_past_extractions(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        # when
+        response = self.client.get(
+            f"/moonmining/extractions_fdd_data/{views.ExtractionsCategory.PAST.value}"
+            "?columns=alliance_name,corporation_name,region_name,"
+            "constellation_name,moon_name,rarity_class_str,status_str,invalid_column"
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = json_response_to_python(response)
+        self.assertListEqual(data["alliance_name"], ["Wayne Enterprises"])
+        self.assertListEqual(data["corporation_name"], ["Wayne Technologies"])
+        self.assertListEqual(data["region_name"], ["Heimatar"])
+        self.assertListEqual(data["constellation_name"], ["Hed"])
+        self.assertListEqual(data["moon_name"], ["Auga V - Moon 1"])
+        self.assertListEqual(data["status_str"], ["completed"])
+        self.assertEqual(len(data["rarity_class_str"]), 1)
+        self.assertIn("ERROR", data["invalid_column"][0])
+
+    def test_should_fetch_fdd_options_with_one_query_per_column(self):
+        # given
+        user, _ = create_user_from_evecharacter(
+            1002,
+            permissions=["moonmining.basic_access", "moonmining.extractions_access"],
+            scopes=Owner.esi_scopes(),
+        )
+        self.client.force_login(user)
+        url = (
+            f"/moonmining/extractions_fdd_data/{views.ExtractionsCategory.PAST.value}"
+            "?columns=corporation_name,status_str"
+        )
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        # then
+        self.assertEqual(response.status_code, 200)
+        extraction_queries = [
+            query
+            for query in context.captured_queries
+            if "moonmining_extraction" in query["sql"]
+        ]
+        self.assertEqual(len(extraction_queries), 2)
+        self.assertTrue(all("DISTINCT" in query["sql"] for query in extraction_queries))
+
 
+@helpers.isolated_cache
 class TestReportsData(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -514,6 +868,7 @@ class TestReportsData(TestCase):
             permissions=["moonmining.basic_access", "moonmining.reports_access"],
             scopes=Owner.esi_scopes(),
         )
+        cls.user_2, _ = create_user_from_evecharacter(1003)
         MoonFactory(
             eve_moon=EveMoon.objects.get(id=40131695), products_updated_by=cls.user
         )
@@ -521,14 +876,150 @@ class TestReportsData(TestCase):
             eve_moon=EveMoon.objects.get(id=40161709), products_updated_by=cls.user
         )
 
+    def test_should_return_not_modified_when_data_is_unchanged(self):
+        # given
+        self.client.force_login(self.user)
+        response = self.client.get("/moonmining/report_owned_value_data")
+        etag = response["ETag"]
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                "/moonmining/report_owned_value_data", HTTP_IF_NONE_MATCH=etag
+            )
+        # then
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "moonmining_moonlistentry" in query["sql"]
+            ]
+        )
+
+    def test_should_return_data_when_data_has_changed(self):
+        # given
+        self.client.force_login(self.user)
+        response = self.client.get("/moonmining/report_owned_value_data")
+        etag = response["ETag"]
+        caches.invalidate_moon_list()
+        # when
+        response = self.client.get(
+            "/moonmining/report_owned_value_data", HTTP_IF_NONE_MATCH=etag
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_should_return_data_when_main_character_of_user_has_changed(self):
+        # given
+        self.client.force_login(self.user)
+        etag = self.client.get("/moonmining/report_user_uploaded_data")["ETag"]
+        main_character = self.user.profile.main_character
+        main_character.corporation_name = "New Corporation"
+        main_character.save()
+        # when
+        response = self.client.get(
+            "/moonmining/report_user_uploaded_data", HTTP_IF_NONE_MATCH=etag
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+
+    def test_should_not_share_etag_between_users(self):
+        # given
+        user_3, _ = create_user_from_evecharacter(
+            1005,
+            permissions=["moonmining.basic_access", "moonmining.reports_access"],
+        )
+        self.client.force_login(self.user)
+        etag = self.client.get("/moonmining/report_ore_prices_data")["ETag"]
+        self.client.force_login(user_3)
+        # when
+        response = self.client.get(
+            "/moonmining/report_ore_prices_data", HTTP_IF_NONE_MATCH=etag
+        )
+        # then
+        self.assertEqual(response.status_code, 200)
+
     def test_should_return_owned_moon_values(self):
         # given
+        moon_2 = Moon.objects.get(pk=40131695)
+        RefineryFactory(moon=moon_2, owner=self.refinery.owner)
+        Moon.objects.filter(pk=self.moon.pk).update(value=300)
+        Moon.objects.filter(pk=moon_2.pk).update(value=100)
+        MoonListEntry.objects.update_for_moons()
+        self.client.force_login(self.user)
+        # when
+        response = self.client.get("/moonmining/report_owned_value_data")
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = json_response_to_python(response)
+        self.assertEqual(len(data), 3)
+        moon_row_1, moon_row_2, total_row = data
+        self.assertEqual(moon_row_1["corporation"], "Wayne Technologies [WYN] (2)")
+        self.assertIn("Auga V - 1", moon_row_1["moon"]["display"])
+        self.assertEqual(moon_row_1["region"], "Heimatar")
+        self.assertEqual(moon_row_1["rank"], 1)
+        self.assertEqual(moon_row_1["grand_total_percent"], 75)
+        self.assertIn("Helgatild", moon_row_2["moon"]["display"])
+        self.assertEqual(moon_row_2["rank"], 2)
+        self.assertEqual(moon_row_2["grand_total_percent"], 25)
+        self.assertTrue(total_row["is_total"])
+        self.assertEqual(total_row["total"], 400)
+
+    def test_should_not_merge_owners_with_the_same_name(self):
+        # given
+        moon_2 = Moon.objects.get(pk=40131695)
+        owner_2 = OwnerFactory(
+            character_ownership=None,
+            corporation=EveCorporationInfo.objects.get(corporation_id=2002),
+        )
+        RefineryFactory(moon=moon_2, owner=owner_2)
+        Moon.objects.filter(pk=self.moon.pk).update(value=300)
+        Moon.objects.filter(pk=moon_2.pk).update(value=100)
+        MoonListEntry.objects.update_for_moons()
+        MoonListEntry.objects.filter(has_refinery=True).update(owner_name="Dummy")
         self.client.force_login(self.user)
         # when
         response = self.client.get("/moonmining/report_owned_value_data")
         # then
         self.assertEqual(response.status_code, 200)
-        # TODO: Test values
+        data = json_response_to_python(response)
+        total_rows = [row for row in data if row["is_total"]]
+        self.assertListEqual(sorted(row["total"] for row in total_rows), [100, 300])
+        self.assertListEqual(
+            [row["corporation"] for row in total_rows], ["Dummy (1)", "Dummy (1)"]
+        )
+
+    def test_should_return_cached_owned_moon_values(self):
+        # given
+        self.client.force_login(self.user)
+        self.client.get("/moonmining/report_owned_value_data")
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/moonmining/report_owned_value_data")
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json_response_to_python(response)), 2)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "moonmining_moonlistentry" in query["sql"]
+            ]
+        )
+
+    def test_should_update_owned_moon_values_after_recalculation(self):
+        # given
+        Moon.objects.filter(pk=self.moon.pk).update(value=123)
+        MoonListEntry.objects.update_for_moons()
+        self.client.force_login(self.user)
+        self.client.get("/moonmining/report_owned_value_data")
+        # when
+        tasks.update_moons()
+        response = self.client.get("/moonmining/report_owned_value_data")
+        # then
+        data = json_response_to_python(response)
+        self.assertAlmostEqual(data[1]["total"], self.moon.calc_value())
 
     def test_should_return_user_mining_data(self):
         # given
@@ -586,6 +1077,9 @@ class TestReportsData(TestCase):
             quantity=600,
             user=self.user,
         )
+        MiningLedgerSummary.objects.update_for_refinery(
+            refinery=self.refinery, start_day=months_3.date() - dt.timedelta(days=1)
+        )
         self.client.force_login(self.user)
         # when
         with patch(MODULE_PATH + ".now") as mock_now:
@@ -604,6 +1098,44 @@ class TestReportsData(TestCase):
         self.assertEqual(row["volume_month_3"], 600 * 10)
         self.assertEqual(row["price_month_3"], 20 * 600)
 
+    def test_should_return_user_mining_data_with_one_query(self):
+        # given
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=now().date(),
+            character=EveEntityCharacterFactory(),
+            corporation=EveEntityCorporationFactory(),
+            ore_type_id=45506,
+            quantity=100,
+            user=self.user,
+        )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            day=now().date() - dt.timedelta(days=200),
+            character=EveEntityCharacterFactory(),
+            corporation=EveEntityCorporationFactory(),
+            ore_type_id=45506,
+            quantity=100,
+            user=self.user_2,
+        )
+        MiningLedgerSummary.objects.update_for_refinery(
+            refinery=self.refinery, start_day=now().date() - dt.timedelta(days=200)
+        )
+        self.client.force_login(self.user)
+        # when
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/moonmining/report_user_mining_data")
+        # then
+        self.assertEqual(response.status_code, 200)
+        data = json_response_to_dict(response)
+        self.assertSetEqual(set(data.keys()), {self.user.id})
+        report_queries = [
+            query
+            for query in context.captured_queries
+            if "moonmining_miningledgersummary" in query["sql"]
+        ]
+        self.assertEqual(len(report_queries), 1)
+
     def test_should_return_user_uploads_data(self):
         # given
         self.client.force_login(self.user)
@@ -634,6 +1166,7 @@ class TestReportsData(TestCase):
         self.assertEqual(ore["rarity_str"], "R32")
 
 
+@helpers.isolated_cache
 class TestExtractionLedgerData(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -651,7 +1184,7 @@ class TestExtractionLedgerData(TestCase):
             started_at=now() - dt.timedelta(days=3),
             status=Extraction.Status.STARTED,
         )
-        user_1003, _ = create_user_from_evecharacter(
+        cls.user_1003, _ = create_user_from_evecharacter(
             1003,
             permissions=[
                 "moonmining.basic_access",
@@ -668,7 +1201,7 @@ class TestExtractionLedgerData(TestCase):
             ore_type_id=45506,
             corporation_id=2001,
             quantity=100,
-            user=user_1003,
+            user=cls.user_1003,
         )
 
     def test_should_show_ledger(self):
@@ -707,3 +1240,47 @@ class TestExtractionLedgerData(TestCase):
         )
         # then
         self.assertEqual(response.status_code, 302)
+
+    def test_should_sum_identical_records_per_character(self):
+        # given
+        user_1002, _ = create_user_from_evecharacter(
+            1002,
+            permissions=[
+                "moonmining.basic_access",
+                "moonmining.extractions_access",
+                "moonmining.view_moon_ledgers",
+            ],
+            scopes=Owner.esi_scopes(),
+        )
+        extraction = ExtractionFactory(
+            refinery=self.refinery,
+            chunk_arrival_at=dt.datetime(2021, 4, 18, 0, 0, 0, tzinfo=pytz.UTC),
+            auto_fracture_at=dt.datetime(2021, 4, 18, 3, 0, 0, tzinfo=pytz.UTC),
+            status=Extraction.Status.COMPLETED,
+        )
+        EveOreTypeExtras.objects.update_or_create(
+            ore_type_id=45506, defaults={"current_price": 10}
+        )
+        MiningLedgerRecordFactory(
+            refinery=self.refinery,
+            character_id=1001,
+            day=dt.date(2021, 4, 19),
+            ore_type_id=45506,
+            corporation_id=2001,
+            quantity=100,
+            user=self.user_1003,
+        )
+        ExtractionLedgerSummary.objects.update_for_extractions([extraction])
+        self.client.force_login(user_1002)
+        # when
+        response = self.client.get(f"/moonmining/extraction_ledger/{extraction.pk}")
+        # then
+        self.assertEqual(response.context["total_value"], 2_000)
+        character_totals = list(response.context["character_totals"])
+        self.assertEqual(len(character_totals), 1)
+        self.assertEqual(character_totals[0]["character_total_price"], 2_000)
+        self.assertEqual(character_totals[0]["character_percent_value"], 100)
+        ore_totals = response.context["ore_totals"]
+        self.assertEqual(len(ore_totals), 1)
+        self.assertEqual(ore_totals[0]["ore_total_quantity"], 200)
+        self.assertEqual(ore_totals[0]["ore_total_price"], 2_000)
@@ -0,0 +1,58 @@
+# flake8: noqa
+"""script benchmarks the moon survey parser with large inputs
+
+This script can be executed directly from shell.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+myauth_dir = Path(__file__).parent.parent.parent.parent.parent / "myauth"
+sys.path.insert(0, str(myauth_dir))
+
+import django
+
+# init and setup django project
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myauth.settings.local")
+django.setup()
+
+"""SCRIPT"""
+import random
+import timeit
+
+from moonmining.core import parse_moon_surveys
+
+MOON_COUNTS = [1_250, 2_500, 5_000, 10_000]
+REPEATS = 3
+ORE_TYPE_IDS = [45490, 45491, 45492, 45493, 45494, 45495, 45506, 45510, 46676]
+
+
+def generate_survey_input(moon_count: int) -> str:
+    lines = [
+        "Moon\tMoon Product\tQuantity\tOre TypeID\tSolarSystemID\tPlanetID\tMoonID"
+    ]
+    for num in range(moon_count):
+        moon_id = 40_000_000 + num
+        lines.append(f"Dummy {num} - Moon 1")
+        for ore_type_id in random.sample(ORE_TYPE_IDS, k=4):
+            lines.append(
+                f"\tDummy Ore\t0.25\t{ore_type_id}\t30002542\t40161707\t{moon_id}"
+            )
+    return "\r\n".join(lines)
+
+
+print(f"Benchmarking survey parser with {MOON_COUNTS} moons...")
+for moon_count in MOON_COUNTS:
+    text = generate_survey_input(moon_count)
+    duration = min(
+        timeit.repeat(
+            lambda: sum(1 for _ in parse_moon_surveys(text)),
+            number=1,
+            repeat=REPEATS,
+        )
+    )
+    print(
+        f"{moon_count:>6,} moons: {duration * 1000:8.1f} ms "
+        f"({duration / moon_count * 1_000_000:.1f} µs per moon)"
+    )
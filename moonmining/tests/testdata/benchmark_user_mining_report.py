@@ -0,0 +1,119 @@
+# flake8: noqa
+"""script benchmarks the user mining report with a large mining ledger
+
+Generates mining ledger records for the existing refineries and users,
+measures the report and removes the generated records again.
+Please only run this against a test database.
+
+This script can be executed directly from shell.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+myauth_dir = Path(__file__).parent.parent.parent.parent.parent / "myauth"
+sys.path.insert(0, str(myauth_dir))
+
+import django
+
+# init and setup django project
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myauth.settings.local")
+django.setup()
+
+"""SCRIPT"""
+import datetime as dt
+import itertools
+import math
+import random
+import timeit
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from eveuniverse.models import EveEntity
+
+from moonmining import views
+from moonmining.models import MiningLedgerRecord, MiningLedgerSummary, Refinery
+
+ROW_COUNT = 5_000_000
+DAYS = 180
+BATCH_SIZE = 10_000
+REPEATS = 3
+CHARACTER_ID_START = 3_900_000_000
+CORPORATION_ID = 3_800_000_000
+ORE_TYPE_IDS = [45490, 45491, 45492, 45493, 45494, 45495, 45506, 45510, 46676]
+
+refineries = list(Refinery.objects.all())
+users = list(User.objects.filter(profile__main_character__isnull=False))
+if not refineries or not users:
+    print("Need at least one refinery and one user with a main - aborting")
+    sys.exit(1)
+
+character_count = math.ceil(ROW_COUNT / (len(refineries) * DAYS * len(ORE_TYPE_IDS)))
+character_ids = range(CHARACTER_ID_START, CHARACTER_ID_START + character_count)
+EveEntity.objects.bulk_create(
+    [
+        EveEntity(id=CORPORATION_ID, name="Benchmark Corp", category="corporation"),
+        *[
+            EveEntity(id=character_id, name=f"Miner {num}", category="character")
+            for num, character_id in enumerate(character_ids)
+        ],
+    ],
+    ignore_conflicts=True,
+)
+character_2_user = {
+    character_id: random.choice(users) for character_id in character_ids
+}
+first_day = now().date() - dt.timedelta(days=DAYS - 1)
+combinations = itertools.islice(
+    itertools.product(refineries, range(DAYS), character_ids, ORE_TYPE_IDS),
+    ROW_COUNT,
+)
+
+print(f"Generating {ROW_COUNT:,} mining ledger records...")
+while True:
+    batch = [
+        MiningLedgerRecord(
+            refinery=refinery,
+            day=first_day + dt.timedelta(days=day_offset),
+            character_id=character_id,
+            corporation_id=CORPORATION_ID,
+            ore_type_id=ore_type_id,
+            quantity=random.randint(1_000, 50_000),
+            user=character_2_user[character_id],
+        )
+        for refinery, day_offset, character_id, ore_type_id in itertools.islice(
+            combinations, BATCH_SIZE
+        )
+    ]
+    if not batch:
+        break
+    MiningLedgerRecord.objects.bulk_create(batch, ignore_conflicts=True)
+
+print("Updating mining ledger summaries...")
+for refinery in refineries:
+    MiningLedgerSummary.objects.update_for_refinery(refinery, first_day)
+
+request = RequestFactory().get("/moonmining/report_user_mining_data")
+request.user = User.objects.filter(is_superuser=True).first() or users[0]
+request.user.is_superuser = True
+with CaptureQueriesContext(connection) as context:
+    views.report_user_mining_data(request)
+duration = min(
+    timeit.repeat(
+        lambda: views.report_user_mining_data(request), number=1, repeat=REPEATS
+    )
+)
+print(f"User mining report: {duration * 1000:.1f} ms")
+print(f"Queries: {len(context.captured_queries)}")
+for query in context.captured_queries:
+    print(query["sql"])
+
+print("Removing generated mining ledger records...")
+MiningLedgerRecord.objects.filter(character_id__in=character_ids).delete()
+for refinery in refineries:
+    MiningLedgerSummary.objects.update_for_refinery(refinery, first_day)
+EveEntity.objects.filter(id__in=[CORPORATION_ID, *character_ids]).delete()
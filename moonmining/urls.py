@@ -14,9 +14,14 @@ urlpatterns = [
     path("extractions", views.extractions, name="extractions"),
     path(
         "extractions_data/<str:category>",
-        views.extractions_data,
+        views.ExtractionListJson.as_view(),
         name="extractions_data",
     ),
+    path(
+        "extractions_fdd_data/<str:category>",
+        views.extractions_fdd_data,
+        name="extractions_fdd_data",
+    ),
     path(
         "extraction/<int:extraction_pk>",
         views.extraction_details,
@@ -1,6 +1,10 @@
 import datetime as dt
+import hashlib
+import re
 from enum import Enum
-from typing import Union
+from functools import partial
+from typing import List, Optional, Tuple, Union
+from urllib.parse import urlencode
 
 from django_datatables_view.base_datatable_view import BaseDatatableView
 
@@ -9,29 +13,19 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import (
-    Case,
-    Count,
-    ExpressionWrapper,
-    F,
-    FloatField,
-    IntegerField,
-    Min,
-    OuterRef,
-    Q,
-    Subquery,
-    Sum,
-    Value,
-    When,
-)
-from django.db.models.functions import Coalesce, Concat
+from django.db.models import Case, Count, F, Min, Q, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, Concat, Rank
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.utils.html import format_html, strip_tags
 from django.utils.timezone import now
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import cache_control, cache_page
+from django.views.decorators.http import etag
 from esi.decorators import token_required
 
 from allianceauth.eveonline.evelinks import dotlan
@@ -41,7 +35,7 @@ from app_utils.allianceauth import notify_admins
 from app_utils.logging import LoggerAddTag
 from app_utils.views import fontawesome_modal_button_html, link_html, yesno_str
 
-from . import __title__, helpers, tasks
+from . import __title__, caches, helpers, tasks
 from .app_settings import (
     MOONMINING_ADMIN_NOTIFICATIONS_ENABLED,
     MOONMINING_COMPLETED_EXTRACTIONS_HOURS_UNTIL_STALE,
@@ -49,14 +43,68 @@ from .app_settings import (
     MOONMINING_USE_REPROCESS_PRICING,
     MOONMINING_VOLUME_PER_MONTH,
 )
-from .constants import DATE_FORMAT, DATETIME_FORMAT, EveGroupId
+from .constants import DATE_FORMAT, DATETIME_FORMAT
 from .forms import MoonScanForm
 from .helpers import user_perms_lookup
-from .models import EveOreType, Extraction, Moon, Owner, Refinery
+from .models import (
+    EveOreType,
+    Extraction,
+    ExtractionProduct,
+    MiningLedgerSummary,
+    Moon,
+    MoonListEntry,
+    OreRarityClass,
+    Owner,
+    Refinery,
+)
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
 
+ETAG_TIME_BUCKET_SECONDS = 300
+ETAG_IGNORED_PARAMS = {"draw", "_"}
+
+
+def conditional_json(*data_names: str, time_bucket: Optional[int] = None):
+    """Decorate a JSON data view to answer conditional GET requests.
+
+    The ETag is a fingerprint of the versions of the given data,
+    the user's permissions and the requested URL.
+    Query parameters which change with every request,
+    e.g. the draw counter of DataTables, are not part of the fingerprint.
+    Views with time dependent data can also be fingerprinted
+    by a time bucket in seconds.
+    """
+
+    def etag_func(request, *args, **kwargs) -> str:
+        parts = [
+            caches.data_versions(*data_names),
+            str(request.user.pk),
+            ",".join(sorted(request.user.get_all_permissions())),
+            request.path,
+            _query_fingerprint(request),
+            get_language(),
+        ]
+        if time_bucket:
+            parts.append(str(int(now().timestamp() // time_bucket)))
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def decorator(view_func):
+        return cache_control(private=True, no_cache=True)(etag(etag_func)(view_func))
+
+    return decorator
+
+
+def _query_fingerprint(request) -> str:
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        if key not in ETAG_IGNORED_PARAMS
+        for value in values
+    )
+    return urlencode(params)
+
+
 class ExtractionsCategory(str, helpers.EnumToDict, Enum):
     UPCOMING = "upcoming"
     PAST = "past"
@@ -145,107 +193,327 @@ def extractions(request):
     return render(request, "moonmining/extractions.html", context)
 
 
-@login_required
-@permission_required(["moonmining.extractions_access", "moonmining.basic_access"])
-def extractions_data(request, category):
-    data = list()
-    stale_cutoff = now() - dt.timedelta(
-        hours=MOONMINING_COMPLETED_EXTRACTIONS_HOURS_UNTIL_STALE
+@method_decorator(
+    conditional_json(
+        caches.EXTRACTIONS_KEY,
+        caches.MOON_LIST_KEY,
+        caches.MINING_LEDGER_KEY,
+        time_bucket=ETAG_TIME_BUCKET_SECONDS,
+    ),
+    name="get",
+)
+class ExtractionListJson(
+    PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableView
+):
+    model = Extraction
+    permission_required = (
+        "moonmining.extractions_access",
+        "moonmining.basic_access",
     )
-    extractions_qs = (
-        Extraction.objects.annotate_volume()
-        .selected_related_defaults()
-        .select_related(
-            "refinery__moon__eve_moon__eve_planet__eve_solar_system",
-            "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation",
-            "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region",
+    columns = [
+        "chunk_arrival_at",
+        "refinery",
+        "location",
+        "labels",
+        "volume",
+        "value",
+        "mined_value",
+        "details",
+        "corporation_name",
+        "alliance_name",
+        "status_str",
+        "moon_name",
+        "region_name",
+        "constellation_name",
+        "rarity_class_str",
+        "id",
+    ]
+
+    # define column names that will be used in sorting
+    # order is important and should be same as order of columns
+    # displayed by datatables. For non sortable columns use empty
+    # value like ''
+    order_columns = [
+        "chunk_arrival_at",
+        "refinery__name",
+        "refinery__moon__eve_moon__name",
+        "",
+        "volume",
+        "value",
+        "mined_value",
+        "",
+        # hidden columns below
+        "refinery__owner__corporation__corporation_name",
+        "refinery__owner__corporation__alliance__alliance_name",
+        "status_str",
+        "refinery__moon__eve_moon__name",
+        "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region__name",
+        "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__name",
+        "refinery__moon__rarity_class",
+        "pk",
+    ]
+
+    def get_initial_queryset(self) -> models.QuerySet:
+        return self.initial_queryset(self.kwargs["category"])
+
+    @classmethod
+    def initial_queryset(cls, category: str) -> models.QuerySet:
+        """Return extractions of a category with all filterable columns."""
+        stale_cutoff = now() - dt.timedelta(
+            hours=MOONMINING_COMPLETED_EXTRACTIONS_HOURS_UNTIL_STALE
         )
-    )
-    if category == ExtractionsCategory.UPCOMING:
-        extractions_qs = extractions_qs.filter(
-            auto_fracture_at__gte=stale_cutoff
-        ).exclude(status=Extraction.Status.CANCELED)
-    elif category == ExtractionsCategory.PAST:
-        extractions_qs = extractions_qs.filter(
-            auto_fracture_at__lt=stale_cutoff
-        ) | extractions_qs.filter(status=Extraction.Status.CANCELED)
-    else:
-        extractions_qs = Extraction.objects.none()
-    can_see_ledger = request.user.has_perm("moonmining.view_moon_ledgers")
-    for extraction in extractions_qs:
-        corporation_name = extraction.refinery.owner.name
-        alliance_name = extraction.refinery.owner.alliance_name
-        moon = extraction.refinery.moon
-        moon_name = str(moon)
-        refinery_name = str(extraction.refinery.name)
-        solar_system = moon.eve_moon.eve_planet.eve_solar_system
-        constellation = region = solar_system.eve_constellation
-        region = constellation.eve_region
-        location = format_html(
-            "{}<br><i>{}</i>",
-            link_html(dotlan.solar_system_url(solar_system.name), moon_name),
-            region.name,
+        extractions_qs = Extraction.objects.annotate(
+            status_str=Case(
+                *[
+                    When(status=status, then=Value(str(label)))
+                    for status, label in Extraction.Status.choices
+                ],
+                default=Value(""),
+                output_field=models.CharField(),
+            )
+        ).annotate(
+            rarity_class_str=Concat(
+                Value("R"),
+                F("refinery__moon__rarity_class"),
+                output_field=models.CharField(),
+            )
         )
-        if (
-            extraction.status == Extraction.Status.COMPLETED
-            and extraction.ledger.exists()
-        ):
-            mined_value = extraction.ledger.aggregate(Sum(F("total_price")))[
-                "total_price__sum"
-            ]
-            actions_html = (
-                extraction_ledger_button_html(extraction) + "&nbsp;"
-                if can_see_ledger
-                else ""
+        if category == ExtractionsCategory.UPCOMING:
+            return extractions_qs.filter(auto_fracture_at__gte=stale_cutoff).exclude(
+                status=Extraction.Status.CANCELED
             )
-        else:
-            actions_html = ""
-            mined_value = None
-        actions_html += extraction_details_button_html(extraction.pk)
-        actions_html += "&nbsp;" + moon_details_button_html(extraction.refinery.moon)
-        status_html = format_html(
-            "{}<br>{}",
-            extraction.chunk_arrival_at.strftime(DATETIME_FORMAT),
-            extraction.status_enum.bootstrap_tag_html,
+        if category == ExtractionsCategory.PAST:
+            return extractions_qs.filter(
+                Q(auto_fracture_at__lt=stale_cutoff)
+                | Q(status=Extraction.Status.CANCELED)
+            )
+        return Extraction.objects.none()
+
+    def filter_queryset(self, qs) -> models.QuerySet:
+        """use parameters passed in GET request to filter queryset"""
+        qs = self._apply_search_filter(
+            qs, 8, "refinery__owner__corporation__corporation_name"
         )
-        data.append(
-            {
-                "id": extraction.pk,
-                "chunk_arrival_at": {
-                    "display": status_html,
-                    "sort": extraction.chunk_arrival_at,
-                },
-                "refinery": {
-                    "display": extraction.refinery.name_html(),
-                    "sort": refinery_name,
-                },
-                "location": {
-                    "display": location,
-                    "sort": moon_name,
-                },
-                "labels": moon.labels_html(),
-                "volume": extraction.volume,
-                "value": extraction.value if extraction.value else None,
-                "mined_value": mined_value,
-                "details": actions_html,
-                "corporation_name": corporation_name,
-                "alliance_name": alliance_name,
-                "moon_name": moon_name,
-                "region_name": region.name,
-                "constellation_name": constellation.name,
-                "rarity_class": moon.get_rarity_class_display(),
-                "is_jackpot_str": yesno_str(extraction.is_jackpot),
-                "is_ready": extraction.chunk_arrival_at <= now(),
-                "status": extraction.status,
-                "status_str": Extraction.Status(extraction.status).label,
-            }
+        qs = self._apply_search_filter(
+            qs, 9, "refinery__owner__corporation__alliance__alliance_name"
         )
-    return JsonResponse(data, safe=False)
+        qs = self._apply_search_filter(qs, 10, "status_str")
+        qs = self._apply_search_filter(qs, 11, "refinery__moon__eve_moon__name")
+        qs = self._apply_search_filter(
+            qs,
+            12,
+            "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region__name",
+        )
+        qs = self._apply_search_filter(
+            qs,
+            13,
+            "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__name",
+        )
+        qs = self._apply_search_filter(qs, 14, "rarity_class_str")
+
+        search = self.request.GET.get("search[value]", None)
+        if search:
+            qs = qs.filter(
+                Q(refinery__moon__eve_moon__name__istartswith=search)
+                | Q(refinery__name__istartswith=search)
+            )
+        self._filtered_qs = qs
+        return qs
+
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        filtered_qs = getattr(self, "_filtered_qs", None)
+        if filtered_qs is not None and "data" in context:
+            context["totals"] = self._totals(filtered_qs)
+        return context
+
+    @staticmethod
+    def _totals(qs) -> dict:
+        """Return totals for all filtered extractions across all pages."""
+        volume = ExtractionProduct.objects.filter(
+            extraction__in=qs.values("pk")
+        ).aggregate(total=Sum("volume"))["total"]
+        value = qs.aggregate(total=Sum("value"))["total"]
+        mined_value = (
+            qs.filter(status=Extraction.Status.COMPLETED)
+            .annotate_mined_value()
+            .aggregate(total=Sum("mined_value"))["total"]
+        )
+        return {
+            "volume": volume or 0,
+            "value": value or 0,
+            "mined_value": mined_value or 0,
+        }
+
+    def _apply_search_filter(self, qs, column_num, field) -> models.QuerySet:
+        my_filter = self.request.GET.get(f"columns[{column_num}][search][value]", None)
+        if my_filter:
+            if self.request.GET.get(f"columns[{column_num}][search][regex]", False):
+                kwargs = {f"{field}__iregex": my_filter}
+            else:
+                kwargs = {f"{field}__istartswith": my_filter}
+            return qs.filter(**kwargs)
+        return qs
+
+    def ordering(self, qs) -> models.QuerySet:
+        # expensive annotations are only added here,
+        # so that counting the records does not need them
+        qs = (
+            qs.annotate_volume()
+            .annotate_mined_value()
+            .selected_related_defaults()
+            .select_related(
+                "refinery__moon__eve_moon__eve_planet__eve_solar_system",
+                "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation",
+                "refinery__moon__eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region",
+            )
+        )
+        return super().ordering(qs)
+
+    def render_column(self, row, column) -> Union[str, dict]:
+        if column == "id":
+            return row.pk
+        if column in {"volume", "value"}:
+            return getattr(row, column) or None
+        if column == "mined_value":
+            return self._mined_value(row)
+        if column == "chunk_arrival_at":
+            return {
+                "display": format_html(
+                    "{}<br>{}",
+                    row.chunk_arrival_at.strftime(DATETIME_FORMAT),
+                    row.status_enum.bootstrap_tag_html,
+                ),
+                "sort": row.chunk_arrival_at,
+            }
+        if column == "refinery":
+            return {"display": row.refinery.name_html(), "sort": row.refinery.name}
+        if column == "corporation_name":
+            return row.refinery.owner.name
+        if column == "alliance_name":
+            return row.refinery.owner.alliance_name
+        if column == "details":
+            return self._render_details(row)
+        result = self._render_moon(row.refinery.moon, column)
+        if result is not None:
+            return result
+        return super().render_column(row, column)
+
+    def _render_moon(self, moon, column) -> Union[str, dict, None]:
+        moon_name = str(moon)
+        solar_system = moon.eve_moon.eve_planet.eve_solar_system
+        constellation = solar_system.eve_constellation
+        if column == "location":
+            return {
+                "display": format_html(
+                    "{}<br><i>{}</i>",
+                    link_html(dotlan.solar_system_url(solar_system.name), moon_name),
+                    constellation.eve_region.name,
+                ),
+                "sort": moon_name,
+            }
+        if column == "labels":
+            return moon.labels_html()
+        if column == "moon_name":
+            return moon_name
+        if column == "region_name":
+            return constellation.eve_region.name
+        if column == "constellation_name":
+            return constellation.name
+        return None
+
+    @staticmethod
+    def _mined_value(row):
+        if row.status == Extraction.Status.COMPLETED:
+            return row.mined_value
+        return None
+
+    def _render_details(self, row) -> str:
+        if self._mined_value(row) is not None and self.request.user.has_perm(
+            "moonmining.view_moon_ledgers"
+        ):
+            details_html = extraction_ledger_button_html(row) + "&nbsp;"
+        else:
+            details_html = ""
+        details_html += extraction_details_button_html(row.pk)
+        details_html += "&nbsp;" + moon_details_button_html(row.refinery.moon)
+        return details_html
+
+
+@login_required
+@permission_required(["moonmining.extractions_access", "moonmining.basic_access"])
+@conditional_json(
+    caches.EXTRACTIONS_KEY,
+    caches.MOON_LIST_KEY,
+    caches.MINING_LEDGER_KEY,
+    time_bucket=ETAG_TIME_BUCKET_SECONDS,
+)
+def extractions_fdd_data(request, category) -> JsonResponse:
+    """Provide lists for drop down fields."""
+    qs = ExtractionListJson.initial_queryset(category)
+    columns = request.GET.get("columns")
+    result = dict()
+    if columns:
+        for column in columns.split(","):
+            if column in EXTRACTIONS_FDD_FIELDS:
+                options = _extractions_fdd_options(qs, EXTRACTIONS_FDD_FIELDS[column])
+            else:
+                options = [f"** ERROR: Invalid column name '{column}' **"]
+            result[column] = options
+    return JsonResponse(result, safe=False)
+
+
+EXTRACTIONS_FDD_FIELDS = {
+    "alliance_name": "refinery__owner__corporation__alliance__alliance_name",
+    "corporation_name": "refinery__owner__corporation__corporation_name",
+    "region_name": (
+        "refinery__moon__eve_moon__eve_planet__eve_solar_system"
+        "__eve_constellation__eve_region__name"
+    ),
+    "constellation_name": (
+        "refinery__moon__eve_moon__eve_planet__eve_solar_system"
+        "__eve_constellation__name"
+    ),
+    "moon_name": "refinery__moon__eve_moon__name",
+    "rarity_class_str": "rarity_class_str",
+    "status_str": "status_str",
+}
+
+
+def _extractions_fdd_options(qs: models.QuerySet, field: str) -> List[str]:
+    """Fetch distinct options of a column from the extractions."""
+    values = (
+        qs.exclude(**{f"{field}__isnull": True})
+        .order_by()
+        .values_list(field, flat=True)
+        .distinct()
+    )
+    return sorted(values, key=str.casefold)
 
 
 @login_required
 @permission_required(["moonmining.extractions_access", "moonmining.basic_access"])
 def extraction_details(request, extraction_pk: int):
+    details = caches.extraction_details(
+        extraction_pk,
+        get_language(),
+        partial(_extraction_details_data, extraction_pk),
+    )
+    context = {
+        "page_title": details["page_title"],
+        "extraction_pk": extraction_pk,
+        "body_html": details["body_html"],
+    }
+    if request.GET.get("new_page"):
+        context["title"] = _("Extraction")
+        context["content_html"] = details["body_html"]
+        return render(request, "moonmining/_generic_modal_page.html", context)
+    else:
+        return render(request, "moonmining/modals/extraction_details.html", context)
+
+
+def _extraction_details_data(extraction_pk: int) -> dict:
+    """Render the details of an extraction for caching."""
     extraction = get_object_or_404(
         Extraction.objects.annotate_volume().select_related(
             "refinery",
@@ -259,19 +527,15 @@ def extraction_details(request, extraction_pk: int):
         ),
         pk=extraction_pk,
     )
-    context = {
+    return {
         "page_title": (
             f"{extraction.refinery.moon} "
             f"| {extraction.chunk_arrival_at.strftime(DATE_FORMAT)}"
         ),
-        "extraction": extraction,
+        "body_html": render_to_string(
+            "moonmining/partials/extraction_details.html", {"extraction": extraction}
+        ),
     }
-    if request.GET.get("new_page"):
-        context["title"] = _("Extraction")
-        context["content_file"] = "moonmining/partials/extraction_details.html"
-        return render(request, "moonmining/_generic_modal_page.html", context)
-    else:
-        return render(request, "moonmining/modals/extraction_details.html", context)
 
 
 @login_required
@@ -292,36 +556,14 @@ def extraction_ledger(request, extraction_pk: int):
         ),
         pk=extraction_pk,
     )
-    ledger = extraction.ledger.select_related(
-        "character", "corporation", "user__profile__main_character", "ore_type"
-    )
-    total_value = ledger.aggregate(Sum(F("total_price")))["total_price__sum"]
-    total_volume = ledger.aggregate(Sum(F("total_volume")))["total_volume__sum"]
-    sum_price = ExpressionWrapper(
-        F("quantity") * Coalesce(F("unit_price"), 0), output_field=FloatField()
+    summaries = extraction.ledger_summaries.select_related(
+        "character", "ore_type", "user__profile__main_character"
     )
-    sum_volume = ExpressionWrapper(
-        F("quantity") * F("ore_type__volume"), output_field=IntegerField()
+    total_value, total_volume, character_totals, ore_totals = _extraction_ledger_totals(
+        summaries
     )
-    character_totals = (
-        ledger.values(
-            character_name=F("character__name"),
-            main_name=F("user__profile__main_character__character_name"),
-            corporation_name=F("user__profile__main_character__corporation_name"),
-        )
-        .annotate(character_total_price=Sum(sum_price, distinct=True))
-        .annotate(character_total_volume=Sum(sum_volume, distinct=True))
-        .annotate(
-            character_percent_value=ExpressionWrapper(
-                F("character_total_price") / Value(total_value) * Value(100),
-                output_field=IntegerField(),
-            )
-        )
-        .annotate(
-            character_percent_volume=F("character_total_volume")
-            / Value(total_volume)
-            * Value(100)
-        )
+    ledger = extraction.ledger.with_totals().select_related(
+        "character", "corporation", "user__profile__main_character"
     )
     context = {
         "page_title": (
@@ -333,6 +575,7 @@ def extraction_ledger(request, extraction_pk: int):
         "total_volume": total_volume,
         "ledger": ledger,
         "character_totals": character_totals,
+        "ore_totals": ore_totals,
     }
     if request.GET.get("new_page"):
         context["title"] = _("Extraction Ledger")
@@ -341,6 +584,61 @@ def extraction_ledger(request, extraction_pk: int):
     return render(request, "moonmining/modals/extraction_ledger.html", context)
 
 
+def _extraction_ledger_totals(summaries) -> tuple:
+    """Calculate totals, totals by character and totals by ore
+    from the ledger summaries of an extraction.
+    """
+    characters = {}
+    ores = {}
+    for summary in summaries:
+        try:
+            main_character = summary.user.profile.main_character
+        except AttributeError:
+            main_character = None
+        character = characters.setdefault(
+            summary.character_id,
+            {
+                "character_name": summary.character.name,
+                "main_name": main_character.character_name if main_character else None,
+                "corporation_name": (
+                    main_character.corporation_name if main_character else None
+                ),
+                "character_total_price": 0.0,
+                "character_total_volume": 0.0,
+            },
+        )
+        character["character_total_price"] += summary.value
+        character["character_total_volume"] += summary.volume
+        ore = ores.setdefault(
+            summary.ore_type_id,
+            {
+                "ore_type_name": summary.ore_type.name,
+                "ore_total_quantity": 0,
+                "ore_total_price": 0.0,
+                "ore_total_volume": 0.0,
+            },
+        )
+        ore["ore_total_quantity"] += summary.quantity
+        ore["ore_total_price"] += summary.value
+        ore["ore_total_volume"] += summary.volume
+    if not characters:
+        return None, None, [], []
+    total_value = sum(obj["character_total_price"] for obj in characters.values())
+    total_volume = sum(obj["character_total_volume"] for obj in characters.values())
+    for character in characters.values():
+        character["character_percent_value"] = (
+            round(character["character_total_price"] / total_value * 100)
+            if total_value
+            else None
+        )
+        character["character_percent_volume"] = (
+            round(character["character_total_volume"] / total_volume * 100)
+            if total_volume
+            else None
+        )
+    return total_value, total_volume, list(characters.values()), list(ores.values())
+
+
 @login_required()
 @permission_required("moonmining.basic_access")
 def moons(request):
@@ -358,8 +656,9 @@ def moons(request):
     return render(request, "moonmining/moons.html", context)
 
 
+@method_decorator(conditional_json(caches.MOON_LIST_KEY), name="get")
 class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableView):
-    model = Moon
+    model = MoonListEntry
     permission_required = "moonmining.basic_access"
     columns = [
         "id",
@@ -387,23 +686,23 @@ class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableVie
     # displayed by datatables. For non sortable columns use empty
     # value like ''
     order_columns = [
-        "pk",
         "name",
-        "refinery__eve_solar_system__name",
-        "refinery__name",
+        "solar_system_name",
+        "constellation_name",
+        "refinery_name",
         "",
         "value",
         "",
         # hidden columns below
-        "",
-        "",
-        "",
-        "",
-        "",
-        "",
-        "",
-        "",
-        "",
+        "solar_system_name",
+        "has_refinery",
+        "corporation_name",
+        "alliance_name",
+        "rarity_class",
+        "has_extraction",
+        "constellation_name",
+        "label_name",
+        "region_name",
         "",
         "",
     ]
@@ -415,40 +714,7 @@ class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableVie
 
     @classmethod
     def initial_queryset(cls, category: str, user: User) -> models.QuerySet:
-        current_extraction_qs = Extraction.objects.filter(
-            refinery__moon=OuterRef("pk"),
-            status__in=[Extraction.Status.STARTED, Extraction.Status.READY],
-        )
-        moon_query = (
-            Moon.objects.selected_related_defaults()
-            .annotate(extraction_pk=Subquery(current_extraction_qs.values("pk")[:1]))
-            .annotate(
-                has_refinery=Case(
-                    When(refinery__isnull=True, then=Value(False)), default=Value(True)
-                )
-            )
-            .annotate(
-                has_refinery_str=Case(
-                    When(has_refinery=False, then=Value("no")), default=Value("yes")
-                )
-            )
-            .annotate(
-                has_extraction=Case(
-                    When(extraction_pk__isnull=True, then=Value(False)),
-                    default=Value(True),
-                )
-            )
-            .annotate(
-                has_extraction_str=Case(
-                    When(has_extraction=False, then=Value("no")), default=Value("yes")
-                )
-            )
-            .annotate(
-                rarity_class_str=Concat(
-                    Value("R"), F("rarity_class"), output_field=models.CharField()
-                )
-            )
-        )
+        moon_query = MoonListEntry.objects.all()
         if category == MoonsCategory.ALL and user.has_perm("moonmining.view_all_moons"):
             pass
         elif (
@@ -456,74 +722,69 @@ class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableVie
             and user.has_perm("moonmining.extractions_access")
             or user.has_perm("moonmining.view_all_moons")
         ):
-            moon_query = moon_query.filter(refinery__isnull=False)
+            moon_query = moon_query.filter(has_refinery=True)
         elif category == MoonsCategory.UPLOADS and user.has_perm(
             "moonmining.upload_moon_scan"
         ):
             moon_query = moon_query.filter(products_updated_by=user)
         else:
-            moon_query = Moon.objects.none()
+            moon_query = MoonListEntry.objects.none()
         return moon_query
 
     def filter_queryset(self, qs) -> models.QuerySet:
         """use parameters passed in GET request to filter queryset"""
 
-        qs = self._apply_search_filter(
-            qs, 7, "eve_moon__eve_planet__eve_solar_system__name"
-        )
-        qs = self._apply_search_filter(qs, 8, "has_refinery_str")
-        qs = self._apply_search_filter(
-            qs, 9, "refinery__owner__corporation__corporation_name"
-        )
-        qs = self._apply_search_filter(
-            qs, 10, "refinery__owner__corporation__alliance__alliance_name"
-        )
-        qs = self._apply_search_filter(qs, 11, "rarity_class_str")
-        qs = self._apply_search_filter(qs, 12, "has_extraction_str")
-        qs = self._apply_search_filter(
-            qs, 13, "eve_moon__eve_planet__eve_solar_system__eve_constellation__name"
-        )
-        qs = self._apply_search_filter(qs, 14, "label__name")
-        qs = self._apply_search_filter(
-            qs,
-            15,
-            "eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region__name",
-        )
+        qs = self._apply_search_filter(qs, 7, "solar_system_name")
+        qs = self._apply_yesno_filter(qs, 8, "has_refinery")
+        qs = self._apply_search_filter(qs, 9, "corporation_name")
+        qs = self._apply_search_filter(qs, 10, "alliance_name")
+        qs = self._apply_rarity_filter(qs, 11)
+        qs = self._apply_yesno_filter(qs, 12, "has_extraction")
+        qs = self._apply_search_filter(qs, 13, "constellation_name")
+        qs = self._apply_search_filter(qs, 14, "label_name")
+        qs = self._apply_search_filter(qs, 15, "region_name")
 
         search = self.request.GET.get("search[value]", None)
         if search:
             qs = qs.filter(
-                Q(eve_moon__name__istartswith=search)
-                | Q(refinery__name__istartswith=search)
+                Q(name__istartswith=search) | Q(refinery_name__istartswith=search)
             )
         return qs
 
-        # qs = self._apply_search_filter(qs, 4, "user__profile__state__name")
-        # qs = self._apply_search_filter(qs, 6, "character__alliance_name")
-        # qs = self._apply_search_filter(qs, 7, "character__corporation_name")
-        # qs = self._apply_search_filter(
-        #     qs, 8, "user__profile__main_character__alliance_name"
-        # )
-        # qs = self._apply_search_filter(
-        #     qs, 9, "user__profile__main_character__corporation_name"
-        # )
-        # qs = self._apply_search_filter(
-        #     qs, 10, "user__profile__main_character__character_name"
-        # )
-        # qs = self._apply_search_filter(qs, 11, "unregistered")
-
-        # return qs
+    def _column_search(self, column_num) -> Tuple[str, bool]:
+        """Return the search value for a column and whether it is an exact match.
+
+        Values from the drop down filters are sent as escaped regex like ``^value$``
+        and are turned into exact matches, so they can use the indexes.
+        """
+        value = self.request.GET.get(f"columns[{column_num}][search][value]", "")
+        match = re.fullmatch(r"\^(.*)\$", value)
+        if match:
+            return re.sub(r"\\(.)", r"\1", match.group(1)), True
+        return value, False
 
     def _apply_search_filter(self, qs, column_num, field) -> models.QuerySet:
-        my_filter = self.request.GET.get(f"columns[{column_num}][search][value]", None)
-        if my_filter:
-            if self.request.GET.get(f"columns[{column_num}][search][regex]", False):
-                kwargs = {f"{field}__iregex": my_filter}
-            else:
-                kwargs = {f"{field}__istartswith": my_filter}
-            return qs.filter(**kwargs)
+        value, is_exact = self._column_search(column_num)
+        if is_exact:
+            return qs.filter(**{f"{field}__iexact": value})
+        if value:
+            return qs.filter(**{f"{field}__istartswith": value})
+        return qs
+
+    def _apply_yesno_filter(self, qs, column_num, field) -> models.QuerySet:
+        value, _ = self._column_search(column_num)
+        if value.lower() in {"yes", "no"}:
+            return qs.filter(**{field: value.lower() == "yes"})
         return qs
 
+    def _apply_rarity_filter(self, qs, column_num) -> models.QuerySet:
+        value, _ = self._column_search(column_num)
+        try:
+            rarity_class = int(value.upper().lstrip("R"))
+        except ValueError:
+            return qs
+        return qs.filter(rarity_class=rarity_class)
+
     def render_column(self, row, column) -> Union[str, dict]:
         if column == "id":
             return row.pk
@@ -534,44 +795,38 @@ class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableVie
             return result
         if column == "labels":
             return row.labels_html()
-        if column == "label_name":
-            return row.label.name if row.label else ""
         if column == "details":
             return self._render_details(row)
-        result = self._render_refinery(row, column)
-        if result:
-            return result
+        if column == "refinery":
+            return {"display": row.refinery_html(), "sort": row.refinery_name}
+        if column == "has_refinery_str":
+            return yesno_str(row.has_refinery)
+        if column == "has_extraction_str":
+            return yesno_str(row.has_extraction)
         return super().render_column(row, column)
 
     def _render_location(self, row, column):
-        solar_system = row.eve_moon.eve_planet.eve_solar_system
-        if solar_system.is_high_sec:
-            sec_class = "text-high-sec"
-        elif solar_system.is_low_sec:
-            sec_class = "text-low-sec"
-        else:
-            sec_class = "text-null-sec"
-        solar_system_link = format_html(
-            '{}&nbsp;<span class="{}">{}</span>',
-            link_html(dotlan.solar_system_url(solar_system.name), solar_system.name),
-            sec_class,
-            round(solar_system.security_status, 1),
-        )
-        constellation = row.eve_moon.eve_planet.eve_solar_system.eve_constellation
-        region = constellation.eve_region
-        location_html = format_html(
-            "{}<br><em>{}</em>", constellation.name, region.name
-        )
-        if column == "solar_system_name":
-            return solar_system.name
         if column == "solar_system_link":
-            return solar_system_link
+            security_status = round(row.security_status, 1)
+            if security_status >= 0.5:
+                sec_class = "text-high-sec"
+            elif security_status > 0:
+                sec_class = "text-low-sec"
+            else:
+                sec_class = "text-null-sec"
+            return format_html(
+                '{}&nbsp;<span class="{}">{}</span>',
+                link_html(
+                    dotlan.solar_system_url(row.solar_system_name),
+                    row.solar_system_name,
+                ),
+                sec_class,
+                security_status,
+            )
         if column == "location_html":
-            return location_html
-        if column == "region_name":
-            return region.name
-        if column == "constellation_name":
-            return constellation.name
+            return format_html(
+                "{}<br><em>{}</em>", row.constellation_name, row.region_name
+            )
         return None
 
     def _render_details(self, row):
@@ -585,95 +840,101 @@ class MoonListJson(PermissionRequiredMixin, LoginRequiredMixin, BaseDatatableVie
         details_html += moon_details_button_html(row)
         return details_html
 
-    def _render_refinery(self, row, column) -> Union[str, dict]:
-        if row.has_refinery:
-            refinery = row.refinery
-            refinery_html = refinery.name_html()
-            refinery_name = refinery.name
-            corporation_name = refinery.owner.name
-            alliance_name = refinery.owner.alliance_name
-        else:
-            refinery_html = "?"
-            refinery_name = ""
-            corporation_name = alliance_name = ""
-        if column == "corporation_name":
-            return corporation_name
-        if column == "alliance_name":
-            return alliance_name
-        if column == "refinery":
-            return {"display": refinery_html, "sort": refinery_name}
-        return ""
+
+MOONS_FDD_COLUMNS = {
+    "alliance_name",
+    "constellation_name",
+    "corporation_name",
+    "has_extraction_str",
+    "has_refinery_str",
+    "label_name",
+    "rarity_class_str",
+    "region_name",
+    "solar_system_name",
+}
+
+
+def _moons_fdd_options(qs: models.QuerySet, column: str) -> List[str]:
+    """Fetch distinct options of a column from the moon list."""
+    if column == "rarity_class_str":
+        field = "rarity_class"
+    elif column in {"has_extraction_str", "has_refinery_str"}:
+        field = column[: -len("_str")]
+    else:
+        field = column
+        qs = qs.exclude(**{field: ""})
+    values = qs.order_by(field).values_list(field, flat=True).distinct()
+    if column == "rarity_class_str":
+        return [f"R{value}" for value in values]
+    if field != column:
+        return [str(yesno_str(value)) for value in values]
+    return list(values)
 
 
 @login_required
 @permission_required("moonmining.basic_access")
+@conditional_json(caches.MOON_LIST_KEY)
 def moons_fdd_data(request, category) -> JsonResponse:
-    """Provide lists for drop down fields."""
+    """Provide lists for drop down fields.
+
+    Options are cached until the moon list changes.
+    """
     qs = MoonListJson.initial_queryset(category=category, user=request.user)
+    scope = (
+        hashlib.sha256(str(qs.query).encode("utf-8")).hexdigest()
+        if not qs.query.is_empty()
+        else None
+    )
     columns = request.GET.get("columns")
     result = dict()
     if columns:
         for column in columns.split(","):
-            if column == "alliance_name":
-                options = qs.exclude(
-                    refinery__owner__corporation__alliance__isnull=True,
-                ).values_list(
-                    "refinery__owner__corporation__alliance__alliance_name", flat=True
-                )
-            elif column == "corporation_name":
-                options = qs.exclude(refinery__isnull=True).values_list(
-                    "refinery__owner__corporation__corporation_name", flat=True
-                )
-            elif column == "region_name":
-                options = qs.values_list(
-                    "eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region__name",
-                    flat=True,
-                )
-            elif column == "constellation_name":
-                options = qs.values_list(
-                    "eve_moon__eve_planet__eve_solar_system__eve_constellation__name",
-                    flat=True,
-                )
-            elif column == "solar_system_name":
-                options = qs.values_list(
-                    "eve_moon__eve_planet__eve_solar_system__name",
-                    flat=True,
-                )
-            elif column == "rarity_class_str":
-                options = qs.values_list("rarity_class_str", flat=True)
-            elif column == "label_name":
-                options = qs.exclude(label__isnull=True).values_list(
-                    "label__name", flat=True
-                )
-            elif column == "has_refinery_str":
-                options = qs.values_list("has_refinery_str", flat=True)
-            elif column == "has_extraction_str":
-                if request.user.has_perm("moonmining.extractions_access"):
-                    options = qs.values_list("has_extraction_str", flat=True)
-                else:
-                    options = []
-            else:
+            if column not in MOONS_FDD_COLUMNS:
                 options = [f"** ERROR: Invalid column name '{column}' **"]
-            result[column] = sorted(list(set(options)), key=str.casefold)
+            elif not scope or (
+                column == "has_extraction_str"
+                and not request.user.has_perm("moonmining.extractions_access")
+            ):
+                options = []
+            else:
+                options = caches.moon_list_options(
+                    scope, column, partial(_moons_fdd_options, qs, column)
+                )
+            result[column] = options
     return JsonResponse(result, safe=False)
 
 
 @login_required
 @permission_required("moonmining.basic_access")
 def moon_details(request, moon_pk: int):
+    details = caches.moon_details(
+        moon_pk, get_language(), partial(_moon_details_data, moon_pk)
+    )
+    context = {
+        "page_title": details["page_title"],
+        "moon_pk": moon_pk,
+        "body_html": details["body_html"],
+    }
+    if request.GET.get("new_page"):
+        context["title"] = _("Moon")
+        context["content_html"] = details["body_html"]
+        return render(request, "moonmining/_generic_modal_page.html", context)
+    return render(request, "moonmining/modals/moon_details.html", context)
+
+
+def _moon_details_data(moon_pk: int) -> dict:
+    """Render the details of a moon for caching."""
     moon = get_object_or_404(Moon.objects.selected_related_defaults(), pk=moon_pk)
     context = {
-        "page_title": moon.name,
         "moon": moon,
         "use_reprocess_pricing": MOONMINING_USE_REPROCESS_PRICING,
         "reprocessing_yield": MOONMINING_REPROCESSING_YIELD * 100,
         "total_volume_per_month": MOONMINING_VOLUME_PER_MONTH / 1000000,
     }
-    if request.GET.get("new_page"):
-        context["title"] = _("Moon")
-        context["content_file"] = "moonmining/partials/moon_details.html"
-        return render(request, "moonmining/_generic_modal_page.html", context)
-    return render(request, "moonmining/modals/moon_details.html", context)
+    return {
+        "page_title": moon.name,
+        "body_html": render_to_string("moonmining/partials/moon_details.html", context),
+    }
 
 
 @permission_required(["moonmining.add_refinery_owner", "moonmining.basic_access"])
@@ -782,210 +1043,130 @@ def reports(request):
 
 @login_required()
 @permission_required(["moonmining.basic_access", "moonmining.reports_access"])
+@conditional_json(caches.MOON_LIST_KEY)
 def report_owned_value_data(request):
-    moon_query = Moon.objects.select_related(
-        "eve_moon",
-        "eve_moon__eve_planet__eve_solar_system",
-        "eve_moon__eve_planet__eve_solar_system__eve_constellation__eve_region",
-        "refinery",
-        "refinery__owner",
-        "refinery__owner__corporation",
-        "refinery__owner__corporation__alliance",
-    ).filter(refinery__isnull=False)
-    corporation_moons = {}
-    for moon in moon_query.order_by("eve_moon__name"):
-        corporation_name = moon.refinery.owner.name
-        if corporation_name not in corporation_moons:
-            corporation_moons[corporation_name] = {"moons": list(), "total": 0}
-        corporation_moons[corporation_name]["moons"].append(moon)
-        corporation_moons[corporation_name]["total"] += default_if_none(moon.value, 0)
-
-    moon_ranks = {
-        moon_pk: rank
-        for rank, moon_pk in enumerate(
-            moon_query.filter(value__isnull=False)
-            .order_by("-value")
-            .values_list("pk", flat=True)
+    data = caches.owned_value_report(get_language(), _owned_value_report_data)
+    return JsonResponse(data, safe=False)
+
+
+def _owned_value_report_data() -> List[dict]:
+    """Calculate rows of the owned value report with a single query."""
+    moons = (
+        MoonListEntry.objects.filter(has_refinery=True)
+        .annotate(
+            rank=Window(Rank(), order_by=F("value").desc(nulls_last=True)),
+            corporation_count=Window(Count("pk"), partition_by=[F("owner_id")]),
+            corporation_total=Window(Sum("value"), partition_by=[F("owner_id")]),
+            grand_total=Window(Sum("value")),
         )
-    }
-    grand_total = sum(
-        [corporation["total"] for corporation in corporation_moons.values()]
+        .order_by("owner_name", "owner_id", "name")
     )
     data = list()
-    for corporation_name, details in corporation_moons.items():
-        corporation = f"{corporation_name} ({len(details['moons'])})"
-        counter = 0
-        for moon in details["moons"]:
-            grand_total_percent = (
-                default_if_none(moon.value, 0) / grand_total * 100
-                if grand_total > 0
-                else None
-            )
-            rank = moon_ranks[moon.pk] + 1 if moon.pk in moon_ranks else None
-            data.append(
-                {
-                    "corporation": corporation,
-                    "moon": {"display": moon_link_html(moon), "sort": counter},
-                    "region": moon.region().name,
-                    "rarity_class": moon.rarity_tag_html,
-                    "value": moon.value,
-                    "rank": rank,
-                    "total": None,
-                    "is_total": False,
-                    "grand_total_percent": grand_total_percent,
-                }
-            )
-            counter += 1
+    previous_moon = None
+    counter = 0
+    for moon in moons:
+        if previous_moon and previous_moon.owner_id != moon.owner_id:
+            data.append(_owned_value_report_total_row(previous_moon, counter))
+            counter = 0
+        grand_total = default_if_none(moon.grand_total, 0)
         data.append(
             {
-                "corporation": corporation,
-                "moon": {"display": _("Total"), "sort": counter},
-                "region": None,
-                "rarity_class": None,
-                "value": None,
-                "rank": None,
-                "total": details["total"],
-                "is_total": True,
-                "grand_total_percent": None,
+                "corporation": _owned_value_report_corporation(moon),
+                "moon": {"display": moon_link_html(moon), "sort": counter},
+                "region": moon.region_name,
+                "rarity_class": OreRarityClass(moon.rarity_class).bootstrap_tag_html,
+                "value": moon.value,
+                "rank": moon.rank if moon.value is not None else None,
+                "total": None,
+                "is_total": False,
+                "grand_total_percent": (
+                    default_if_none(moon.value, 0) / grand_total * 100
+                    if grand_total > 0
+                    else None
+                ),
             }
         )
-    return JsonResponse(data, safe=False)
+        counter += 1
+        previous_moon = moon
+    if previous_moon:
+        data.append(_owned_value_report_total_row(previous_moon, counter))
+    return data
+
+
+def _owned_value_report_corporation(moon: MoonListEntry) -> str:
+    return f"{moon.owner_name} ({moon.corporation_count})"
+
+
+def _owned_value_report_total_row(moon: MoonListEntry, counter: int) -> dict:
+    return {
+        "corporation": _owned_value_report_corporation(moon),
+        "moon": {"display": str(_("Total")), "sort": counter},
+        "region": None,
+        "rarity_class": None,
+        "value": None,
+        "rank": None,
+        "total": default_if_none(moon.corporation_total, 0),
+        "is_total": True,
+        "grand_total_percent": None,
+    }
 
 
 @login_required()
 @permission_required(["moonmining.basic_access", "moonmining.reports_access"])
+@conditional_json(caches.MINING_LEDGER_KEY, caches.USERS_KEY, time_bucket=3600 * 24)
 def report_user_mining_data(request):
-    sum_volume = ExpressionWrapper(
-        F("mining_ledger__quantity") * F("mining_ledger__ore_type__volume"),
-        output_field=FloatField(),
-    )
-    sum_price = ExpressionWrapper(
-        F("mining_ledger__quantity")
-        * Coalesce(F("mining_ledger__ore_type__extras__current_price"), 0),
-        output_field=FloatField(),
-    )
-    today = now()
-    months_1 = today.replace(day=1) - dt.timedelta(days=1)
-    months_2 = months_1.replace(day=1) - dt.timedelta(days=1)
-    months_3 = months_2.replace(day=1) - dt.timedelta(days=1)
-    users_mining_totals = (
-        User.objects.filter(profile__main_character__isnull=False)
-        .select_related("profile__main_character", "profile__state")
-        .annotate(
-            volume_month_0=Sum(
-                sum_volume,
-                filter=Q(
-                    mining_ledger__day__month=today.month,
-                    mining_ledger__day__year=today.year,
-                ),
-                distinct=True,
-            )
+    first_day = now().date().replace(day=1)
+    months = [first_day]
+    while len(months) < 4:
+        months.append((months[-1] - dt.timedelta(days=1)).replace(day=1))
+    monthly_totals = dict()
+    for num, month in enumerate(months):
+        monthly_totals[f"volume_month_{num}"] = Coalesce(
+            Sum("volume", filter=Q(month=month)), Value(0.0)
         )
-        .annotate(
-            volume_month_1=Sum(
-                sum_volume,
-                filter=Q(
-                    mining_ledger__day__month=months_1.month,
-                    mining_ledger__day__year=months_1.year,
-                ),
-                distinct=True,
-            )
-        )
-        .annotate(
-            volume_month_2=Sum(
-                sum_volume,
-                filter=Q(
-                    mining_ledger__day__month=months_2.month,
-                    mining_ledger__day__year=months_2.year,
-                ),
-                distinct=True,
-            )
+        monthly_totals[f"price_month_{num}"] = Coalesce(
+            Sum("value", filter=Q(month=month)), Value(0.0)
         )
-        .annotate(
-            volume_month_3=Sum(
-                sum_volume,
-                filter=Q(
-                    mining_ledger__day__month=months_3.month,
-                    mining_ledger__day__year=months_3.year,
-                ),
-                distinct=True,
-            )
+    user_totals = (
+        MiningLedgerSummary.objects.filter(
+            month__gte=months[-1],
+            month__lte=months[0],
+            user__profile__main_character__isnull=False,
         )
-        .annotate(
-            price_month_0=Sum(
-                sum_price,
-                filter=Q(
-                    mining_ledger__day__month=today.month,
-                    mining_ledger__day__year=today.year,
-                ),
-                distinct=True,
-            )
-        )
-        .annotate(
-            price_month_1=Sum(
-                sum_price,
-                filter=Q(
-                    mining_ledger__day__month=months_1.month,
-                    mining_ledger__day__year=months_1.year,
-                ),
-                distinct=True,
-            )
-        )
-        .annotate(
-            price_month_2=Sum(
-                sum_price,
-                filter=Q(
-                    mining_ledger__day__month=months_2.month,
-                    mining_ledger__day__year=months_2.year,
-                ),
-                distinct=True,
-            )
-        )
-        .annotate(
-            price_month_3=Sum(
-                sum_price,
-                filter=Q(
-                    mining_ledger__day__month=months_3.month,
-                    mining_ledger__day__year=months_3.year,
-                ),
-                distinct=True,
-            )
+        .values(
+            "user_id",
+            name=F("user__profile__main_character__character_name"),
+            corporation_name=F("user__profile__main_character__corporation_name"),
+            alliance_ticker=F("user__profile__main_character__alliance_ticker"),
+            state=F("user__profile__state__name"),
         )
+        .annotate(**monthly_totals)
+        .order_by()
     )
     data = list()
-    for user in users_mining_totals:
-        corporation_name = user.profile.main_character.corporation_name
-        if user.profile.main_character.alliance_ticker:
-            corporation_name += f" [{user.profile.main_character.alliance_ticker}]"
-        if any(
-            [
-                user.volume_month_0,
-                user.volume_month_1,
-                user.volume_month_2,
-                user.volume_month_3,
-            ]
-        ):
-            data.append(
-                {
-                    "id": user.id,
-                    "name": str(user.profile.main_character),
-                    "corporation": corporation_name,
-                    "state": str(user.profile.state),
-                    "volume_month_0": default_if_false(user.volume_month_0, 0),
-                    "volume_month_1": default_if_false(user.volume_month_1, 0),
-                    "volume_month_2": default_if_false(user.volume_month_2, 0),
-                    "volume_month_3": default_if_false(user.volume_month_3, 0),
-                    "price_month_0": default_if_false(user.price_month_0, 0),
-                    "price_month_1": default_if_false(user.price_month_1, 0),
-                    "price_month_2": default_if_false(user.price_month_2, 0),
-                    "price_month_3": default_if_false(user.price_month_3, 0),
-                }
-            )
+    for totals in user_totals:
+        if not any(totals[f"volume_month_{num}"] for num in range(4)):
+            continue
+        corporation_name = totals["corporation_name"]
+        if totals["alliance_ticker"]:
+            corporation_name += f" [{totals['alliance_ticker']}]"
+        row = {
+            "id": totals["user_id"],
+            "name": totals["name"],
+            "corporation": corporation_name,
+            "state": totals["state"],
+        }
+        for num in range(4):
+            row[f"volume_month_{num}"] = totals[f"volume_month_{num}"]
+        for num in range(4):
+            row[f"price_month_{num}"] = totals[f"price_month_{num}"]
+        data.append(row)
     return JsonResponse(data, safe=False)
 
 
 @login_required()
 @permission_required(["moonmining.basic_access", "moonmining.reports_access"])
+@conditional_json(caches.MOON_LIST_KEY, caches.USERS_KEY)
 def report_user_uploaded_data(request) -> JsonResponse:
     data = list(
         Moon.objects.values(
@@ -1008,19 +1189,12 @@ def report_user_uploaded_data(request) -> JsonResponse:
 
 @login_required()
 @permission_required(["moonmining.basic_access", "moonmining.reports_access"])
+@conditional_json(caches.ORE_PRICES_KEY)
 def report_ore_prices_data(request) -> JsonResponse:
-    moon_ore_group_ids = [
-        EveGroupId.UNCOMMON_MOON_ASTEROIDS,
-        EveGroupId.UBIQUITOUS_MOON_ASTEROIDS,
-        EveGroupId.EXCEPTIONAL_MOON_ASTEROIDS,
-        EveGroupId.COMMON_MOON_ASTEROIDS,
-        EveGroupId.RARE_MOON_ASTEROIDS,
-    ]
     qs = (
         EveOreType.objects.filter(
-            eve_group_id__in=moon_ore_group_ids,
             published=True,
-            extras__isnull=False,
+            extras__rarity_class__gt=OreRarityClass.NONE,
             extras__current_price__isnull=False,
         )
         .exclude(name__icontains=" ")